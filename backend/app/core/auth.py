@@ -1,51 +1,122 @@
 """
 Authentication utilities for FastAPI backend
 """
+import time
 import jwt
-from typing import Optional
+from typing import Any, Optional, Tuple
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from supabase_auth.errors import AuthApiError
 from .config import settings
-from .database import get_supabase_client
+from .database import get_async_supabase_client
+from .jwt_keys import jwks_cache
+from .token_cache import VerifiedToken, token_claims_cache, token_digest
 import structlog
 
 logger = structlog.get_logger(__name__)
 security = HTTPBearer()
 
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+
+
+async def _resolve_signing_key(token: str) -> Tuple[Any, str, bool]:
+    """
+    Pick the verification key from the token header
+    Returns (key, algorithm, issued_by_supabase)
+    """
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    
+    if algorithm == "HS256":
+        if settings.SUPABASE_JWT_SECRET:
+            return settings.SUPABASE_JWT_SECRET, algorithm, True
+        # Legacy tokens signed with the backend secret
+        return settings.SECRET_KEY, algorithm, False
+    
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        signing_key = await jwks_cache.get_signing_key(header.get("kid"))
+        if signing_key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return signing_key.key, algorithm, True
+    
+    raise jwt.InvalidTokenError(f"Unsupported token algorithm: {algorithm}")
+
+
+async def _decode_token(token: str) -> VerifiedToken:
+    """Verify signature, expiry and audience locally"""
+    key, algorithm, issued_by_supabase = await _resolve_signing_key(token)
+    payload = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=settings.SUPABASE_JWT_AUDIENCE if issued_by_supabase else None,
+        options={"verify_exp": True, "verify_aud": issued_by_supabase}
+    )
+    return VerifiedToken(
+        claims={
+            **payload,
+            "user_id": payload.get("sub"),  # Endpoints read 'sub' or 'user_id'
+            "token": token
+        },
+        expires_at=payload.get("exp"),
+        issued_by_supabase=issued_by_supabase
+    )
+
+
+async def _check_revocation(token: str, verified: VerifiedToken):
+    """
+    Confirm the session with Supabase Auth at most once per AUTH_REVOCATION_CHECK_SECONDS
+    An explicit rejection fails the request; an unreachable auth server does not
+    """
+    interval = settings.AUTH_REVOCATION_CHECK_SECONDS
+    if interval <= 0 or not verified.issued_by_supabase:
+        return
+    
+    now = time.monotonic()
+    if verified.revocation_checked_at is not None and now - verified.revocation_checked_at < interval:
+        return
+    
+    try:
+        supabase = await get_async_supabase_client()
+        user_response = await supabase.auth.get_user(token)
+        if not user_response or not user_response.user:
+            raise jwt.InvalidTokenError("Token rejected by Supabase Auth")
+    except AuthApiError as e:
+        raise jwt.InvalidTokenError(f"Token rejected by Supabase Auth: {e}")
+    except jwt.InvalidTokenError:
+        raise
+    except Exception as e:
+        # Retry on the next cadence rather than on every request
+        logger.warning(f"Supabase revocation check skipped: {e}")
+    
+    verified.revocation_checked_at = now
+
+
 async def verify_jwt_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """
     Verify JWT token from Authorization header
+    Signature, expiry and audience are checked locally and the claims cached
+    until exp; Supabase Auth is only consulted periodically for revocation
     Returns the decoded token payload
     """
     try:
         # Extract token from credentials
         token = credentials.credentials
+        token_key = token_digest(token)
+        
+        verified = token_claims_cache.get(token_key)
+        if verified is None:
+            verified = await _decode_token(token)
+            if verified.expires_at is not None:
+                token_claims_cache.put(token_key, verified)
         
-        # For Supabase tokens, we can verify using Supabase client
-        # or decode directly with the JWT secret
         try:
-            # Try to get user from Supabase using the token
-            supabase = get_supabase_client()
-            user_response = supabase.auth.get_user(token)
-            if user_response.user:
-                return {
-                    "sub": user_response.user.id,  # Use 'sub' field as expected by endpoints
-                    "user_id": user_response.user.id,
-                    "email": user_response.user.email,
-                    "token": token
-                }
-        except Exception as supabase_error:
-            logger.warning(f"Supabase token verification failed: {supabase_error}")
-            
-        # Fallback to manual JWT verification
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=["HS256"],
-            options={"verify_exp": True}
-        )
+            await _check_revocation(token, verified)
+        except jwt.InvalidTokenError:
+            token_claims_cache.discard(token_key)
+            raise
         
-        return payload
+        return verified.claims
         
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -0,0 +1,207 @@
+"""
+Write-behind buffered inserts
+Collects rows in memory and flushes them as bulk inserts on size/time thresholds
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from .config import settings
+from .database import get_async_supabase_client
+from .postgres import postgres_enabled
+from .resilience import is_transient_error
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """Buffered bulk-insert writer for a single append-only table"""
+
+    def __init__(
+        self,
+        table: str,
+        batch_size: int,
+        flush_interval: float,
+        max_queue_size: int,
+        pg_insert: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+    ):
+        self.table = table
+        self.pg_insert = pg_insert
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "rows_written": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "dropped_rows": 0,
+            "rejected_rows": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start the background flush loop"""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(f"✅ Buffered writer for {self.table} started (batch={self.batch_size}, interval={self.flush_interval}s)")
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._queue:
+            if not await self.flush():
+                break
+
+        if self._queue:
+            logger.warning(f"⚠️  {len(self._queue)} {self.table} rows not written on shutdown")
+        logger.info(f"🔄 Buffered writer for {self.table} stopped")
+
+    async def add(self, row: Dict[str, Any]):
+        """
+        Queue a row for insertion
+        Without a running flush loop the row is inserted immediately and failures raise,
+        as they would for an unbuffered insert
+        """
+        row.setdefault('created_at', datetime.utcnow().isoformat())
+
+        if not self.running:
+            await self._insert([row])
+            self._stats["rows_written"] += 1
+            return
+
+        if len(self._queue) >= self.max_queue_size:
+            self._queue.popleft()
+            self._stats["dropped_rows"] += 1
+
+        self._queue.append(row)
+
+        if len(self._queue) >= self.batch_size:
+            self._flush_event.set()
+
+    async def flush(self) -> bool:
+        """
+        Insert up to one batch of buffered rows
+        Transient failures re-queue the unwritten rows and return False; a batch the
+        database rejects is bisected so only the offending rows are dropped
+        """
+        async with self._flush_lock:
+            if not self._queue:
+                return True
+
+            batch: List[Dict[str, Any]] = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+
+            started = time.perf_counter()
+            written = 0
+            pending = [batch]  # stack of chunks, next chunk to write last
+            while pending:
+                chunk = pending.pop()
+                try:
+                    await self._insert(chunk)
+                    written += len(chunk)
+                except Exception as e:
+                    if is_transient_error(e):
+                        self._stats["failed_flushes"] += 1
+                        self._stats["rows_written"] += written
+                        unwritten = chunk + [row for part in reversed(pending) for row in part]
+                        self._requeue(unwritten)
+                        logger.error(f"❌ Failed to flush {len(unwritten)} {self.table} rows, will retry: {e}")
+                        return False
+                    if len(chunk) == 1:
+                        self._stats["rejected_rows"] += 1
+                        logger.error(f"❌ Dropping {self.table} row rejected by the database: {e} ({chunk[0]})")
+                        continue
+                    middle = len(chunk) // 2
+                    pending.extend([chunk[middle:], chunk[:middle]])
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._stats["rows_written"] += written
+            self._stats["flushes"] += 1
+            self._stats["last_flush_ms"] = elapsed_ms
+            self._stats["total_flush_ms"] += elapsed_ms
+            self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+            return True
+
+    async def _insert(self, batch: List[Dict[str, Any]]):
+        """Write one batch - direct Postgres when enabled, PostgREST otherwise"""
+        if self.pg_insert is not None and postgres_enabled():
+            await self.pg_insert(batch)
+            return
+        supabase = await get_async_supabase_client()
+        await supabase.table(self.table).insert(batch, default_to_null=False).execute()
+
+    def _requeue(self, batch: List[Dict[str, Any]]):
+        """Put a failed batch back at the front, dropping the oldest rows if full"""
+        overflow = len(self._queue) + len(batch) - self.max_queue_size
+        if overflow > 0:
+            batch = batch[overflow:]
+            self._stats["dropped_rows"] += overflow
+        self._queue.extendleft(reversed(batch))
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+
+            while self._queue:
+                if not await self.flush():
+                    break
+                if len(self._queue) < self.batch_size:
+                    break
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and flush latency for health reporting"""
+        flushes = self._stats["flushes"]
+        return {
+            "table": self.table,
+            "running": self.running,
+            "queue_depth": len(self._queue),
+            "rows_written": self._stats["rows_written"],
+            "flushes": flushes,
+            "failed_flushes": self._stats["failed_flushes"],
+            "dropped_rows": self._stats["dropped_rows"],
+            "rejected_rows": self._stats["rejected_rows"],
+            "last_flush_ms": round(self._stats["last_flush_ms"], 3),
+            "avg_flush_ms": round(self._stats["total_flush_ms"] / flushes, 3) if flushes else 0.0,
+            "max_flush_ms": round(self._stats["max_flush_ms"], 3)
+        }
+
+
+async def _insert_usage_logs_pg(batch: List[Dict[str, Any]]):
+    from ..repositories.postgres import get_postgres_repository
+    await get_postgres_repository().insert_usage_logs(batch)
+
+
+usage_log_writer = BatchWriter(
+    'usage_logs',
+    batch_size=settings.USAGE_LOG_BATCH_SIZE,
+    flush_interval=settings.USAGE_LOG_FLUSH_INTERVAL_SECONDS,
+    max_queue_size=settings.USAGE_LOG_MAX_QUEUE_SIZE,
+    pg_insert=_insert_usage_logs_pg
+)
@@ -0,0 +1,189 @@
+"""
+Read-through query cache for hot Supabase lookups
+In-process LRU with TTL by default, optional Redis backend via REDIS_URL
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """Size-bounded LRU cache with a per-entry TTL"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class RedisCacheBackend:
+    """Redis-backed cache shared across workers; values are stored as JSON"""
+
+    name = "redis"
+
+    def __init__(self, url: str, namespace: str = "kswifi:cache:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self.namespace = namespace
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        raw = await self._redis.get(self.namespace + key)
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._redis.set(self.namespace + key, json.dumps(value, default=str), px=int(ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self.namespace + key)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        keys = [key async for key in self._redis.scan_iter(match=f"{self.namespace}{prefix}*")]
+        if keys:
+            await self._redis.delete(*keys)
+
+    def size(self) -> Optional[int]:
+        return None
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class QueryCache:
+    """Read-through cache keyed by table + filters, with explicit invalidation"""
+
+    def __init__(self, backend, default_ttl: float):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+
+    @staticmethod
+    def make_key(table: str, filters: Dict[str, Any]) -> str:
+        """Build a stable cache key such as ``users:id=abc``"""
+        parts = "&".join(f"{name}={filters[name]}" for name in sorted(filters))
+        return f"{table}:{parts}"
+
+    async def get_or_load(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Return the cached value for table+filters, calling loader on a miss
+        None results are not cached so missing rows are re-checked next time
+        """
+        key = self.make_key(table, filters)
+
+        try:
+            found, value = await self.backend.get(key)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache read failed for {key}: {e}")
+            found, value = False, None
+
+        if found:
+            self._stats["hits"] += 1
+            return value
+
+        self._stats["misses"] += 1
+        value = await loader()
+
+        if value is not None:
+            try:
+                await self.backend.set(key, value, ttl if ttl is not None else self.default_ttl)
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.warning(f"Cache write failed for {key}: {e}")
+
+        return value
+
+    async def invalidate(self, table: str, **filters: Any) -> None:
+        """Drop the entry for an exact table+filters combination"""
+        self._stats["invalidations"] += 1
+        try:
+            await self.backend.delete(self.make_key(table, filters))
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache invalidation failed for {table}: {e}")
+
+    async def invalidate_table(self, table: str) -> None:
+        """Drop every cached entry for a table"""
+        self._stats["invalidations"] += 1
+        try:
+            await self.backend.delete_prefix(f"{table}:")
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache invalidation failed for {table}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for health reporting"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "backend": self.backend.name,
+            "entries": self.backend.size(),
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def _create_backend():
+    """Pick the configured cache backend, falling back to in-process memory"""
+    if settings.CACHE_BACKEND == "redis":
+        try:
+            backend = RedisCacheBackend(settings.REDIS_URL)
+            logger.info("✅ Query cache using Redis backend")
+            return backend
+        except Exception as e:
+            logger.warning(f"⚠️  Redis cache unavailable, using in-process cache: {e}")
+
+    return MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+
+
+query_cache = QueryCache(_create_backend(), settings.CACHE_DEFAULT_TTL_SECONDS)
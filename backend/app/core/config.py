@@ -38,14 +38,43 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str = Field(..., description="Supabase service role key - Get from project settings")
     SUPABASE_ANON_KEY: str = Field(..., description="Supabase anon key - Get from project settings")
     
-    # Database - No longer needed (using Supabase HTTP client)
-    DATABASE_URL: Optional[str] = Field(default=None, description="Not used - kept for backward compatibility")
+    # Direct Postgres backend for hot paths (optional, requires asyncpg)
+    DATABASE_URL: Optional[str] = Field(default=None, description="Postgres DSN, only used when DB_BACKEND=asyncpg")
+    DB_BACKEND: str = Field(default="postgrest", description="Data backend: postgrest, asyncpg (direct Postgres hot paths) or memory (offline perf runs)")
+    DB_POOL_MIN_SIZE: int = Field(default=2, description="Min pooled Postgres connections")
+    DB_POOL_MAX_SIZE: int = Field(default=10, description="Max pooled Postgres connections")
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100, description="Prepared statements cached per connection - forced to 0 when DATABASE_URL has pgbouncer=true (transaction pooler)")
+    
+    # Thread pool for legacy synchronous Supabase calls (see run_db)
+    DB_EXECUTOR_MAX_WORKERS: int = Field(default=16, description="Max threads for blocking Supabase calls - tune against Supabase connection limits")
+    
+    # Shared HTTP connection pool for all Supabase traffic (PostgREST, auth, RPC)
+    SUPABASE_HTTP2: bool = Field(default=True, description="Multiplex Supabase requests over HTTP/2")
+    SUPABASE_MAX_CONNECTIONS: int = Field(default=100, description="Max open connections to Supabase")
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=20, description="Idle connections kept alive for reuse")
+    SUPABASE_KEEPALIVE_EXPIRY_SECONDS: float = Field(default=30.0, description="Seconds an idle connection is kept before closing")
+    SUPABASE_CONNECT_TIMEOUT_SECONDS: float = Field(default=5.0, description="Timeout for establishing a Supabase connection")
+    SUPABASE_REQUEST_TIMEOUT_SECONDS: float = Field(default=10.0, description="Per-request read/write timeout for Supabase calls")
+    
+    # Resilience for Supabase calls (see core/resilience.py)
+    DB_CALL_DEADLINE_SECONDS: float = Field(default=15.0, description="Overall deadline for one database call including retries")
+    DB_RETRY_ATTEMPTS: int = Field(default=3, description="Max attempts for idempotent reads on transient failures")
+    DB_RETRY_BASE_DELAY_SECONDS: float = Field(default=0.1, description="Base delay for jittered exponential retry backoff")
+    DB_BREAKER_FAILURE_THRESHOLD: int = Field(default=5, description="Consecutive failures before the circuit breaker opens")
+    DB_BREAKER_RECOVERY_SECONDS: float = Field(default=30.0, description="Seconds the breaker stays open before a trial call")
     
     # Security - PUT YOUR REAL SECRET KEY HERE
     SECRET_KEY: str = Field(..., description="Secret key for JWT - Generate with: openssl rand -hex 32")
     JWT_ALGORITHM: str = Field(default="HS256", description="JWT algorithm")
     JWT_EXPIRATION_HOURS: int = Field(default=24, description="JWT expiration in hours")
     
+    # Local verification of Supabase access tokens
+    SUPABASE_JWT_SECRET: Optional[str] = Field(default=None, description="Supabase project JWT secret for HS256 tokens (falls back to SECRET_KEY)")
+    SUPABASE_JWT_AUDIENCE: str = Field(default="authenticated", description="Expected aud claim of Supabase access tokens")
+    SUPABASE_JWKS_REFRESH_SECONDS: float = Field(default=600.0, description="Background refresh interval for asymmetric signing keys")
+    AUTH_REVOCATION_CHECK_SECONDS: float = Field(default=300.0, description="How often a token is re-checked with Supabase Auth for revocation (0 disables)")
+    AUTH_TOKEN_CACHE_SIZE: int = Field(default=10000, description="Max verified tokens whose claims are cached until exp (0 disables)")
+    
     # CORS
     ALLOWED_ORIGINS: List[str] = Field(
         default=[
@@ -61,6 +90,27 @@ class Settings(BaseSettings):
     # Redis for background tasks
     REDIS_URL: str = Field(default="redis://localhost:6379", description="Redis connection URL")
     
+    # Background jobs (monitoring loops, session downloads) - disable on API workers
+    # when a separate worker process (backend/worker.py) runs them
+    RUN_BACKGROUND_JOBS: bool = Field(default=True, description="Run monitoring loops and session downloads inside the API process")
+    SESSION_DOWNLOAD_POLL_SECONDS: float = Field(default=5.0, description="How often the worker picks up sessions in downloading status")
+    SESSION_DOWNLOAD_CLAIM_SECONDS: int = Field(default=60, description="Lease on a claimed session download; renewed by progress updates, reclaimed by another process once it lapses")
+    
+    # Leader election for background monitoring loops
+    LEADER_ELECTION_BACKEND: str = Field(default="file", description="Lease store: redis (REDIS_URL, multi-host), postgres (DATABASE_URL advisory lock), file (single host) or none")
+    LEADER_LEASE_TTL_SECONDS: float = Field(default=30.0, description="Leader lease TTL - a failed leader is replaced within this window")
+    LEADER_LOCK_DIR: Optional[str] = Field(default=None, description="Directory for file leases (defaults to the system temp dir)")
+    
+    # Read-through query cache for hot lookups
+    CACHE_BACKEND: str = Field(default="memory", description="Query cache backend: memory or redis (uses REDIS_URL)")
+    CACHE_DEFAULT_TTL_SECONDS: float = Field(default=60.0, description="Default TTL for cached query results")
+    CACHE_MAX_ENTRIES: int = Field(default=10000, description="Max entries held by the in-process cache")
+    
+    # Registry of user ids known to have a users row
+    KNOWN_USERS_BACKEND: str = Field(default="memory", description="Known-user registry backend: memory or redis (uses REDIS_URL)")
+    KNOWN_USERS_MAX_ENTRIES: int = Field(default=100000, description="Max user ids held in the in-process known-user set")
+    KNOWN_USERS_TTL_SECONDS: float = Field(default=86400.0, description="TTL of known-user entries in Redis")
+    
     # eSIM Provider Configuration - NOW OPTIONAL (we have inbuilt eSIM generation)
     # These are only needed if you want to use external eSIM providers alongside our inbuilt system
     ESIM_PROVIDER_API_URL: Optional[str] = Field(default=None, description="External eSIM provider API URL (optional)")
@@ -71,6 +121,27 @@ class Settings(BaseSettings):
     # Data monitoring
     DATA_CHECK_INTERVAL_MINUTES: int = Field(default=5, description="Data balance check interval")
     LOW_DATA_THRESHOLD_MB: float = Field(default=100.0, description="Low data warning threshold")
+    MONITORING_CONCURRENCY: int = Field(default=16, description="Max eSIMs/users synced in parallel by the monitoring loops")
+    MONITORING_SHARDS: int = Field(default=1, description="Worker processes split monitoring into this many hash(user_id) shards (needs a lease store and RUN_BACKGROUND_JOBS=false on the API)")
+    MONITORING_INCREMENTAL: bool = Field(default=True, description="Re-evaluate only packs whose updated_at moved since the last cycle")
+    MONITORING_FULL_SCAN_INTERVAL_MINUTES: int = Field(default=60, description="Full reconciliation scan interval in incremental mode")
+    MONITORING_INCREMENTAL_OVERLAP_SECONDS: float = Field(default=30.0, description="Re-read window behind the updated_at high-water mark for late commits")
+    MONITORING_ADAPTIVE_CADENCE: bool = Field(default=True, description="Schedule per-user eSIM usage polls by forecast time-to-threshold")
+    MONITORING_BURN_RATE_WINDOW_MINUTES: float = Field(default=60.0, description="Decay window for per-pack burn-rate estimates from usage_logs")
+    MONITORING_BURN_RATE_OVERLAP_SECONDS: float = Field(default=300.0, description="Re-read window behind the usage_logs high-water mark for rows flushed late or retried")
+    MONITORING_MIN_CHECK_SECONDS: float = Field(default=60.0, description="Shortest check interval for packs about to cross a threshold")
+    MONITORING_MAX_CHECK_MINUTES: float = Field(default=360.0, description="Longest check interval for idle packs")
+    MONITORING_FORECAST_SAFETY: float = Field(default=0.5, description="Check again after this fraction of the projected time-to-threshold")
+    MONITORING_STATS_MAX_AGE_SECONDS: float = Field(default=30.0, description="Staleness bound for the cached monitoring counts served to /health and stats")
+    EXPIRY_LOOKAHEAD_MINUTES: float = Field(default=60.0, description="Upcoming expires_at deadlines loaded into the expiry scheduler")
+    EXPIRY_REFRESH_SECONDS: float = Field(default=60.0, description="How often the expiry scheduler extends its lookahead window")
+    EXPIRY_RECONCILE_MINUTES: float = Field(default=60.0, description="Bulk catch-up of every overdue row (also run at startup)")
+    EXPIRY_REFRESH_BATCH: int = Field(default=5000, description="Max deadlines loaded per table per refresh")
+    
+    # Buffered usage_logs writer
+    USAGE_LOG_BATCH_SIZE: int = Field(default=500, description="Max usage_logs rows per bulk insert")
+    USAGE_LOG_FLUSH_INTERVAL_SECONDS: float = Field(default=2.0, description="Max seconds a usage_logs row waits before being flushed")
+    USAGE_LOG_MAX_QUEUE_SIZE: int = Field(default=50000, description="Max buffered usage_logs rows before the oldest are dropped")
     
     # Session download pricing - Free up to 5GB, then ₦800 for unlimited access
     BUNDLE_PRICING: dict = Field(
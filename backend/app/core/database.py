@@ -4,16 +4,154 @@ Uses Supabase Python SDK for HTTP-based database operations
 No direct PostgreSQL connections - fully serverless compatible
 """
 
+import asyncio
+import contextvars
 import logging
-from typing import Optional
-from supabase import create_client, Client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import httpx
+from supabase import (
+    create_client, acreate_client, Client, AsyncClient,
+    AsyncClientOptions, ClientOptions
+)
 
 from .config import settings
+from .resilience import ResilientAsyncTransport, ResilientTransport, db_breaker
+from .postgres import postgres_enabled, init_pg_pool, close_pg_pool, get_pg_pool_stats
 
 logger = logging.getLogger(__name__)
 
-# Global Supabase client instance
+# Global Supabase client instances
 _supabase_client: Optional[Client] = None
+_async_supabase_client: Optional[AsyncClient] = None
+_async_client_lock = asyncio.Lock()
+
+# Shared pooled HTTP transports - every PostgREST, auth and RPC call reuses these
+_async_http_client: Optional[httpx.AsyncClient] = None
+_sync_http_client: Optional[httpx.Client] = None
+_http_pool_stats: Dict[str, int] = {
+    "in_flight": 0,
+    "total_requests": 0,
+}
+# Sync requests run in run_db() threads
+_http_pool_stats_lock = threading.Lock()
+
+T = TypeVar("T")
+
+# Dedicated thread pool for legacy synchronous Supabase calls
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_executor_lock = threading.Lock()
+_db_executor_stats: Dict[str, float] = {
+    "queued": 0,
+    "active": 0,
+    "completed": 0,
+    "failed": 0,
+    "total_wait_ms": 0.0,
+    "max_wait_ms": 0.0,
+}
+
+
+def _http_limits() -> httpx.Limits:
+    """Connection pool limits shared by the sync and async transports"""
+    return httpx.Limits(
+        max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY_SECONDS
+    )
+
+
+def _http_timeout() -> httpx.Timeout:
+    """Per-request timeouts for Supabase calls"""
+    return httpx.Timeout(
+        settings.SUPABASE_REQUEST_TIMEOUT_SECONDS,
+        connect=settings.SUPABASE_CONNECT_TIMEOUT_SECONDS
+    )
+
+
+def _track_request_start() -> None:
+    with _http_pool_stats_lock:
+        _http_pool_stats["in_flight"] += 1
+        _http_pool_stats["total_requests"] += 1
+
+
+def _track_request_end() -> None:
+    with _http_pool_stats_lock:
+        _http_pool_stats["in_flight"] -= 1
+
+
+class _TrackedAsyncTransport(httpx.AsyncBaseTransport):
+    """Counts requests in flight, including ones that end in a transport error"""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _track_request_start()
+        try:
+            return await self.inner.handle_async_request(request)
+        finally:
+            _track_request_end()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class _TrackedTransport(httpx.BaseTransport):
+    """Sync counterpart of _TrackedAsyncTransport"""
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self.inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        _track_request_start()
+        try:
+            return self.inner.handle_request(request)
+        finally:
+            _track_request_end()
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def _get_async_http_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP transport, creating it on first use"""
+    global _async_http_client
+    
+    if _async_http_client is None or _async_http_client.is_closed:
+        transport = _TrackedAsyncTransport(ResilientAsyncTransport(
+            httpx.AsyncHTTPTransport(http2=settings.SUPABASE_HTTP2, limits=_http_limits())
+        ))
+        _async_http_client = httpx.AsyncClient(
+            transport=transport,
+            timeout=_http_timeout(),
+            follow_redirects=True
+        )
+        logger.info(
+            f"Supabase async HTTP pool ready (http2={settings.SUPABASE_HTTP2}, "
+            f"max_connections={settings.SUPABASE_MAX_CONNECTIONS})"
+        )
+    
+    return _async_http_client
+
+
+def _get_sync_http_client() -> httpx.Client:
+    """Get the shared sync HTTP transport used by run_db() callers"""
+    global _sync_http_client
+    
+    if _sync_http_client is None or _sync_http_client.is_closed:
+        transport = _TrackedTransport(ResilientTransport(
+            httpx.HTTPTransport(http2=settings.SUPABASE_HTTP2, limits=_http_limits())
+        ))
+        _sync_http_client = httpx.Client(
+            transport=transport,
+            timeout=_http_timeout(),
+            follow_redirects=True
+        )
+    
+    return _sync_http_client
 
 
 def get_supabase_client() -> Client:
@@ -23,6 +161,10 @@ def get_supabase_client() -> Client:
     """
     global _supabase_client
     
+    if _supabase_client is None and settings.DB_BACKEND == "memory":
+        from ..repositories.memory import MemoryClient, memory_store
+        _supabase_client = MemoryClient(memory_store)
+    
     if _supabase_client is None:
         logger.info("Initializing Supabase HTTP client...")
         logger.info(f"Supabase URL: {settings.SUPABASE_URL}")
@@ -30,7 +172,8 @@ def get_supabase_client() -> Client:
         try:
             _supabase_client = create_client(
                 settings.SUPABASE_URL,
-                settings.SUPABASE_KEY
+                settings.SUPABASE_KEY,
+                options=ClientOptions(httpx_client=_get_sync_http_client())
             )
             logger.info("✅ Supabase HTTP client initialized successfully")
         except Exception as e:
@@ -40,6 +183,134 @@ def get_supabase_client() -> Client:
     return _supabase_client
 
 
+async def get_async_supabase_client() -> AsyncClient:
+    """
+    Get async Supabase client with lazy initialization
+    Queries are awaited on the event loop instead of blocking it
+    """
+    global _async_supabase_client
+    
+    if _async_supabase_client is None and settings.DB_BACKEND == "memory":
+        from ..repositories.memory import MemoryClient, memory_store
+        _async_supabase_client = MemoryClient(memory_store, is_async=True)
+    
+    if _async_supabase_client is None:
+        async with _async_client_lock:
+            if _async_supabase_client is None:
+                logger.info("Initializing async Supabase HTTP client...")
+                
+                try:
+                    _async_supabase_client = await acreate_client(
+                        settings.SUPABASE_URL,
+                        settings.SUPABASE_KEY,
+                        options=AsyncClientOptions(httpx_client=_get_async_http_client())
+                    )
+                    logger.info("✅ Async Supabase HTTP client initialized successfully")
+                except Exception as e:
+                    logger.error(f"❌ Failed to initialize async Supabase client: {e}")
+                    raise
+    
+    return _async_supabase_client
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    """Get the DB thread pool, creating it on first use"""
+    global _db_executor
+    
+    with _db_executor_lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(
+                max_workers=settings.DB_EXECUTOR_MAX_WORKERS,
+                thread_name_prefix="supabase-db"
+            )
+            logger.info(f"DB executor started with {settings.DB_EXECUTOR_MAX_WORKERS} workers")
+    
+    return _db_executor
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking Supabase call on the dedicated DB thread pool
+    Keeps legacy sync query-builder chains off the event loop, e.g.
+    ``await run_db(get_supabase_client().table('x').select('*').execute)``
+    """
+    loop = asyncio.get_running_loop()
+    submitted_at = time.perf_counter()
+    
+    with _db_executor_lock:
+        _db_executor_stats["queued"] += 1
+    
+    def _call() -> T:
+        wait_ms = (time.perf_counter() - submitted_at) * 1000
+        with _db_executor_lock:
+            _db_executor_stats["queued"] -= 1
+            _db_executor_stats["active"] += 1
+            _db_executor_stats["total_wait_ms"] += wait_ms
+            _db_executor_stats["max_wait_ms"] = max(_db_executor_stats["max_wait_ms"], wait_ms)
+        
+        succeeded = False
+        try:
+            result = fn(*args, **kwargs)
+            succeeded = True
+            return result
+        finally:
+            with _db_executor_lock:
+                _db_executor_stats["active"] -= 1
+                _db_executor_stats["completed" if succeeded else "failed"] += 1
+    
+    # Carry the caller's context (e.g. db_deadline) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_get_db_executor(), context.run, _call)
+
+
+def get_db_executor_stats() -> Dict[str, Any]:
+    """Queue depth and wait-time metrics for the DB thread pool"""
+    with _db_executor_lock:
+        stats = dict(_db_executor_stats)
+    
+    finished = stats["completed"] + stats["failed"]
+    return {
+        "max_workers": settings.DB_EXECUTOR_MAX_WORKERS,
+        "queue_depth": int(stats["queued"]),
+        "active": int(stats["active"]),
+        "completed": int(stats["completed"]),
+        "failed": int(stats["failed"]),
+        "avg_wait_ms": round(stats["total_wait_ms"] / finished, 3) if finished else 0.0,
+        "max_wait_ms": round(stats["max_wait_ms"], 3)
+    }
+
+
+def _pool_connection_counts(client: Optional[Any]) -> Dict[str, int]:
+    """Best-effort open/idle connection counts from an httpx transport pool"""
+    try:
+        transport = client._transport
+        while hasattr(transport, "inner"):
+            transport = transport.inner
+        connections = list(transport._pool.connections)
+    except Exception:
+        return {"open": 0, "idle": 0}
+    return {
+        "open": len(connections),
+        "idle": sum(1 for conn in connections if conn.is_idle())
+    }
+
+
+def get_http_pool_stats() -> Dict[str, Any]:
+    """Configuration and live usage of the shared Supabase HTTP pool"""
+    return {
+        "http2": settings.SUPABASE_HTTP2,
+        "max_connections": settings.SUPABASE_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry_seconds": settings.SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+        "connect_timeout_seconds": settings.SUPABASE_CONNECT_TIMEOUT_SECONDS,
+        "request_timeout_seconds": settings.SUPABASE_REQUEST_TIMEOUT_SECONDS,
+        "in_flight": _http_pool_stats["in_flight"],
+        "total_requests": _http_pool_stats["total_requests"],
+        "async_connections": _pool_connection_counts(_async_http_client),
+        "sync_connections": _pool_connection_counts(_sync_http_client)
+    }
+
+
 async def test_supabase_connection():
     """
     Test Supabase HTTP connection
@@ -47,12 +318,12 @@ async def test_supabase_connection():
     """
     try:
         logger.info("Testing Supabase HTTP connection...")
-        client = get_supabase_client()
+        client = await get_async_supabase_client()
         
         # Simple test query - check if we can access the database
         # This will fail gracefully if tables don't exist yet
         try:
-            result = client.table('user_profiles').select('count', count='exact').limit(1).execute()
+            result = await client.table('user_profiles').select('count', count='exact').limit(1).execute()
             logger.info(f"✅ Supabase connection successful - can access tables")
             return True
         except Exception as table_error:
@@ -68,11 +339,15 @@ async def test_supabase_connection():
 async def init_db():
     """
     Initialize database connection
-    Only tests HTTP connectivity - no schema creation needed
+    Opens the shared HTTP pools and tests connectivity - no schema creation needed
     """
     try:
         logger.info("🗄️  Initializing Supabase connection...")
+        _get_async_http_client()
+        _get_sync_http_client()
         await test_supabase_connection()
+        if postgres_enabled():
+            await init_pg_pool()
         logger.info("✅ Database initialized successfully")
         return True
     except Exception as e:
@@ -84,8 +359,34 @@ async def init_db():
 async def close_db():
     """
     Clean up database connections
-    HTTP client doesn't need explicit cleanup
+    Closes the shared HTTP pools and drops the clients built on them
     """
+    global _async_supabase_client, _supabase_client, _async_http_client, _sync_http_client, _db_executor
+    
+    _async_supabase_client = None
+    _supabase_client = None
+    
+    if _async_http_client is not None:
+        try:
+            await _async_http_client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing async Supabase HTTP pool: {e}")
+        _async_http_client = None
+    
+    if _sync_http_client is not None:
+        try:
+            _sync_http_client.close()
+        except Exception as e:
+            logger.warning(f"Error closing sync Supabase HTTP pool: {e}")
+        _sync_http_client = None
+    
+    with _db_executor_lock:
+        executor, _db_executor = _db_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+    
+    await close_pg_pool()
+    
     logger.info("🔄 Database cleanup complete (HTTP client)")
 
 
@@ -96,26 +397,33 @@ def get_supabase() -> Client:
 
 
 # Simple health check for monitoring
-async def get_database_health():
+async def get_database_health(probe: bool = True):
     """
     Get database health status
-    Returns basic connectivity info
+    Returns basic connectivity info; probe=False skips the test query
     """
     try:
-        client = get_supabase_client()
+        client = await get_async_supabase_client()
         
         # Test basic connectivity
         health_data = {
             "status": "healthy",
             "connection_type": "supabase_http",
             "url": settings.SUPABASE_URL,
-            "client_initialized": client is not None
+            "client_initialized": client is not None,
+            "db_executor": get_db_executor_stats(),
+            "http_pool": get_http_pool_stats(),
+            "circuit_breaker": db_breaker.get_stats(),
+            "postgres_pool": get_pg_pool_stats()
         }
         
+        if not probe:
+            return health_data
+        
         # Try a simple query to verify access
         try:
             # This is a lightweight query that should work
-            result = client.rpc('version').execute()
+            result = await client.rpc('version').execute()
             health_data["database_accessible"] = True
         except:
             # Database might not have the version function, but that's okay
@@ -0,0 +1,67 @@
+"""
+Concurrency-bounded fan-out for background loops
+A fixed pool of workers drains the item list, so cycle time tracks
+N / limit x latency instead of N x latency
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class CycleTiming:
+    """Outcome of one fan-out cycle"""
+    items: int
+    failures: int
+    duration_ms: float
+    concurrency: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "failures": self.failures,
+            "duration_ms": round(self.duration_ms, 1),
+            "concurrency": self.concurrency
+        }
+
+
+async def run_bounded(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[Any]],
+    limit: int
+) -> CycleTiming:
+    """
+    Run worker(item) for every item with at most `limit` in flight
+    A failing item is logged and counted; it never cancels the rest of the cycle
+    """
+    started = time.perf_counter()
+    iterator = iter(items)
+    counts = {"items": 0, "failures": 0}
+
+    async def _drain():
+        for item in iterator:
+            counts["items"] += 1
+            try:
+                await worker(item)
+            except Exception as e:
+                counts["failures"] += 1
+                logger.error(f"Fan-out worker failed: {e}")
+
+    limit = max(1, limit)
+    async with asyncio.TaskGroup() as group:
+        for _ in range(limit):
+            group.create_task(_drain())
+
+    return CycleTiming(
+        items=counts["items"],
+        failures=counts["failures"],
+        duration_ms=(time.perf_counter() - started) * 1000,
+        concurrency=limit
+    )
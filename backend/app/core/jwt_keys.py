@@ -0,0 +1,91 @@
+"""
+Cached Supabase Auth signing keys (JWKS)
+Keys are fetched once, refreshed in the background and looked up by kid per request
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+import jwt
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Minimum gap between on-demand refreshes triggered by an unknown kid
+MIN_REFRESH_INTERVAL_SECONDS = 30.0
+
+
+class JWKSCache:
+    """kid -> signing key map for asymmetric (RS256/ES256) Supabase access tokens"""
+
+    def __init__(self, jwks_url: str, refresh_interval: float):
+        self.jwks_url = jwks_url
+        self.refresh_interval = refresh_interval
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._last_refresh = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"refreshes": 0, "failed_refreshes": 0}
+
+    async def refresh(self) -> bool:
+        """Fetch the JWKS document and replace the cached keys"""
+        async with self._refresh_lock:
+            try:
+                async with httpx.AsyncClient(timeout=settings.SUPABASE_CONNECT_TIMEOUT_SECONDS) as client:
+                    response = await client.get(self.jwks_url, headers={"apikey": settings.SUPABASE_ANON_KEY})
+                    response.raise_for_status()
+                jwk_set = jwt.PyJWKSet.from_dict(response.json())
+                self._keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+                self._stats["refreshes"] += 1
+                return True
+            except Exception as e:
+                self._stats["failed_refreshes"] += 1
+                logger.warning(f"⚠️  JWKS refresh failed: {e}")
+                return False
+            finally:
+                self._last_refresh = time.monotonic()
+
+    async def get_signing_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        """Look up a key by kid, refreshing once if it is unknown (key rotation)"""
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._last_refresh >= MIN_REFRESH_INTERVAL_SECONDS:
+            await self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+    async def start(self):
+        """Warm the cache and keep it fresh in the background"""
+        if self._task is None or self._task.done():
+            await self.refresh()
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._keys),
+            "last_refresh_age_seconds": round(time.monotonic() - self._last_refresh, 1) if self._last_refresh else None,
+            **self._stats
+        }
+
+
+jwks_cache = JWKSCache(
+    f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json",
+    refresh_interval=settings.SUPABASE_JWKS_REFRESH_SECONDS
+)
@@ -0,0 +1,108 @@
+"""
+Known-user registry
+Remembers which user ids already have a users row so hot flows skip the existence check
+"""
+
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from .config import settings
+from .database import get_async_supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+class KnownUserRegistry:
+    """Bounded in-process set of confirmed user ids, optionally shared through Redis"""
+
+    def __init__(self, max_entries: int, redis_url: Optional[str] = None, ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.namespace = "kswifi:known_user:"
+        self._local: "OrderedDict[str, None]" = OrderedDict()
+        self._redis = None
+        self._stats = {"hits": 0, "redis_hits": 0, "misses": 0, "upserts": 0}
+
+        if redis_url:
+            try:
+                import redis.asyncio as redis
+                self._redis = redis.from_url(redis_url)
+                logger.info("✅ Known-user registry using Redis")
+            except Exception as e:
+                logger.warning(f"⚠️  Redis unavailable for known-user registry, using in-process set: {e}")
+
+    def _remember(self, user_id: str):
+        self._local[user_id] = None
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def is_known(self, user_id: str) -> bool:
+        if user_id in self._local:
+            self._local.move_to_end(user_id)
+            self._stats["hits"] += 1
+            return True
+
+        if self._redis is not None:
+            try:
+                if await self._redis.exists(self.namespace + user_id):
+                    self._remember(user_id)
+                    self._stats["redis_hits"] += 1
+                    return True
+            except Exception as e:
+                logger.warning(f"Known-user Redis lookup failed: {e}")
+
+        self._stats["misses"] += 1
+        return False
+
+    async def mark_known(self, user_id: str):
+        """Record a user id confirmed to exist in the users table"""
+        self._remember(user_id)
+        if self._redis is not None:
+            try:
+                await self._redis.set(self.namespace + user_id, 1, px=int(self.ttl * 1000))
+            except Exception as e:
+                logger.warning(f"Known-user Redis write failed: {e}")
+
+    async def ensure_user(self, user_id: str, email: Optional[str] = None):
+        """
+        Make sure a users row exists for user_id
+        Unknown users get one upsert that leaves existing rows untouched - no separate read
+        """
+        if await self.is_known(user_id):
+            return
+
+        now = datetime.utcnow().isoformat()
+        supabase = await get_async_supabase_client()
+        await supabase.table('users').upsert({
+            'id': user_id,
+            'email': email or f"user_{user_id[:8]}@kswifi.app",
+            'first_name': 'KSWiFi',
+            'last_name': 'User',
+            'created_at': now,
+            'updated_at': now
+        }, on_conflict='id', ignore_duplicates=True).execute()
+        self._stats["upserts"] += 1
+
+        await self.mark_known(user_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis" if self._redis is not None else "memory",
+            "entries": len(self._local),
+            "max_entries": self.max_entries,
+            **self._stats
+        }
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+known_users = KnownUserRegistry(
+    max_entries=settings.KNOWN_USERS_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.KNOWN_USERS_BACKEND == "redis" else None,
+    ttl=settings.KNOWN_USERS_TTL_SECONDS
+)
@@ -0,0 +1,349 @@
+"""
+Lease-based leader election for background jobs
+Exactly one process runs the monitoring loops; another takes over when its lease lapses
+Lease stores: Redis (SET NX PX), Postgres advisory locks, or file locks for local runs
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import socket
+import tempfile
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import settings
+from .postgres import asyncpg_dsn
+
+logger = logging.getLogger(__name__)
+
+
+def _holder_id() -> str:
+    """Identity of this process in lease records"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class RedisLeaseStore:
+    """Leases as Redis keys with a PX expiry; only the holder may renew or release"""
+
+    name = "redis"
+
+    _RENEW = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    )
+    _RELEASE = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, url: str, holder: str, namespace: str = "kswifi:lease:"):
+        import redis.asyncio as redis
+        self._redis = redis.from_url(url, decode_responses=True)
+        self.holder = holder
+        self.namespace = namespace
+
+    async def acquire(self, name: str, ttl: float) -> bool:
+        """Take the lease if free, or renew it if we already hold it"""
+        key = self.namespace + name
+        ttl_ms = int(ttl * 1000)
+        if await self._redis.set(key, self.holder, nx=True, px=ttl_ms):
+            return True
+        return bool(await self._redis.eval(self._RENEW, 1, key, self.holder, ttl_ms))
+
+    async def release(self, name: str):
+        await self._redis.eval(self._RELEASE, 1, self.namespace + name, self.holder)
+
+    async def live(self, prefix: str) -> List[str]:
+        """Names of unexpired leases starting with prefix"""
+        names = []
+        async for key in self._redis.scan_iter(match=f"{self.namespace}{prefix}*", count=500):
+            names.append(key[len(self.namespace):])
+        return names
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class PostgresLeaseStore:
+    """
+    Leases as session-level advisory locks on dedicated connections
+    Postgres drops the lock when the holder's connection dies, which hands over leadership
+    Each lock connection carries its lease name as application_name so live() can list them
+    """
+
+    name = "postgres"
+    namespace = "lease:"
+    # application_name is cut at NAMEDATALEN - 1 bytes; longer names keep a hash suffix
+    MAX_APPLICATION_NAME = 63
+
+    def __init__(self, dsn: str, holder: str):
+        self.dsn = dsn
+        self.holder = holder
+        self._connections: Dict[str, Any] = {}
+        self._query_conn = None
+
+    @staticmethod
+    def _lock_key(name: str) -> int:
+        return int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big", signed=True)
+
+    @classmethod
+    def _application_name(cls, name: str) -> str:
+        label = cls.namespace + name
+        if len(label) <= cls.MAX_APPLICATION_NAME:
+            return label
+        digest = hashlib.sha1(name.encode()).hexdigest()[:12]
+        return f"{label[:cls.MAX_APPLICATION_NAME - len(digest) - 1]}#{digest}"
+
+    async def acquire(self, name: str, ttl: float) -> bool:
+        conn = self._connections.get(name)
+        if conn is not None:
+            try:
+                await conn.fetchval("SELECT 1", timeout=ttl)
+                return True
+            except Exception:
+                # Connection lost - the lock went with it
+                self._connections.pop(name, None)
+                return False
+
+        import asyncpg
+        conn = await asyncpg.connect(
+            self.dsn, timeout=ttl, statement_cache_size=0,
+            server_settings={"application_name": self._application_name(name)}
+        )
+        if await conn.fetchval("SELECT pg_try_advisory_lock($1)", self._lock_key(name)):
+            self._connections[name] = conn
+            return True
+        await conn.close()
+        return False
+
+    async def live(self, prefix: str) -> List[str]:
+        """
+        Names of held leases starting with prefix (names past the application_name
+        limit come back shortened, with a hash suffix keeping them distinct)
+        """
+        if self._query_conn is None or self._query_conn.is_closed():
+            import asyncpg
+            self._query_conn = await asyncpg.connect(self.dsn, statement_cache_size=0)
+
+        pattern = self.namespace + prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        rows = await self._query_conn.fetch(
+            """
+            SELECT DISTINCT a.application_name
+            FROM pg_locks l
+            JOIN pg_stat_activity a ON a.pid = l.pid
+            WHERE l.locktype = 'advisory' AND l.granted AND a.application_name LIKE $1
+            """,
+            pattern
+        )
+        return [row['application_name'][len(self.namespace):] for row in rows]
+
+    async def release(self, name: str):
+        conn = self._connections.pop(name, None)
+        if conn is not None:
+            try:
+                await conn.execute("SELECT pg_advisory_unlock($1)", self._lock_key(name))
+            finally:
+                await conn.close()
+
+    async def close(self):
+        for name in list(self._connections):
+            await self.release(name)
+        if self._query_conn is not None:
+            conn, self._query_conn = self._query_conn, None
+            await conn.close()
+
+
+class FileLeaseStore:
+    """
+    Leases as exclusive flock()s on files in a shared directory (single host, local testing)
+    The kernel drops the lock when the holding process exits
+    """
+
+    name = "file"
+
+    def __init__(self, directory: str, holder: str):
+        self.directory = directory
+        self.holder = holder
+        self._files: Dict[str, int] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _file_name(name: str) -> str:
+        return name.replace(':', '_').replace('/', '_')
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{self._file_name(name)}.lock")
+
+    async def acquire(self, name: str, ttl: float) -> bool:
+        if name in self._files:
+            return True
+
+        fd = os.open(self._path(name), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, self.holder.encode())
+        self._files[name] = fd
+        return True
+
+    async def release(self, name: str):
+        fd = self._files.pop(name, None)
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    async def live(self, prefix: str) -> List[str]:
+        """Lease files starting with prefix that some process currently holds locked"""
+        file_prefix = self._file_name(prefix)
+        names = []
+        for entry in os.listdir(self.directory):
+            if not (entry.startswith(file_prefix) and entry.endswith(".lock")):
+                continue
+            fd = os.open(os.path.join(self.directory, entry), os.O_RDONLY)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            except BlockingIOError:
+                names.append(entry[:-len(".lock")])
+            finally:
+                os.close(fd)
+        return names
+
+    async def close(self):
+        for name in list(self._files):
+            await self.release(name)
+
+
+def create_lease_store(backend: str):
+    """Build the configured lease store; None means every process leads (no election)"""
+    holder = _holder_id()
+    if backend == "redis":
+        return RedisLeaseStore(settings.REDIS_URL, holder)
+    if backend == "postgres":
+        if not settings.DATABASE_URL:
+            raise RuntimeError("LEADER_ELECTION_BACKEND=postgres requires DATABASE_URL")
+        dsn, pgbouncer = asyncpg_dsn(settings.DATABASE_URL)
+        if pgbouncer:
+            # Session advisory locks would outlive the statement on a shared server connection
+            raise RuntimeError(
+                "LEADER_ELECTION_BACKEND=postgres needs a session connection - point DATABASE_URL "
+                "at the direct host or session pooler, not pgbouncer transaction pooling"
+            )
+        return PostgresLeaseStore(dsn, holder)
+    if backend == "file":
+        return FileLeaseStore(settings.LEADER_LOCK_DIR or os.path.join(tempfile.gettempdir(), "kswifi-leases"), holder)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown lease backend: {backend}")
+
+
+class LeaderElector:
+    """
+    Campaigns for a named lease and runs a job only while holding it
+    The lease is renewed every ttl/3; if renewal fails the job is cancelled
+    and the process goes back to campaigning
+    """
+
+    def __init__(self, name: str, store, ttl: float):
+        self.name = name
+        self.store = store
+        self.ttl = ttl
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._job: Optional[asyncio.Task] = None
+        self._stats = {"terms": 0, "lost_leases": 0}
+
+    def start(self, job: Callable[[], Awaitable[Any]], on_demoted: Optional[Callable[[], Awaitable[Any]]] = None):
+        """Campaign in the background; job() runs for as long as we lead"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._campaign(job, on_demoted))
+
+    async def _try_acquire(self) -> bool:
+        if self.store is None:
+            return True
+        try:
+            return await self.store.acquire(self.name, self.ttl)
+        except Exception as e:
+            logger.warning(f"⚠️  Lease {self.name} acquire/renew failed: {e}")
+            return False
+
+    async def _campaign(self, job, on_demoted):
+        renew_interval = self.ttl / 3
+        try:
+            while True:
+                held = await self._try_acquire()
+
+                if held and not self.is_leader:
+                    self.is_leader = True
+                    self._stats["terms"] += 1
+                    logger.info(f"👑 Acquired leadership of {self.name} as {getattr(self.store, 'holder', 'local')}")
+                    self._job = asyncio.create_task(job())
+                elif not held and self.is_leader:
+                    self._stats["lost_leases"] += 1
+                    logger.warning(f"⚠️  Lost leadership of {self.name}")
+                    await self._demote(on_demoted)
+
+                await asyncio.sleep(renew_interval)
+        finally:
+            if self.is_leader:
+                await self._demote(on_demoted)
+
+    async def _demote(self, on_demoted):
+        self.is_leader = False
+        if on_demoted is not None:
+            try:
+                await on_demoted()
+            except Exception as e:
+                logger.error(f"Error stopping leader job for {self.name}: {e}")
+        if self._job is not None:
+            self._job.cancel()
+            try:
+                await self._job
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._job = None
+
+    async def stop(self):
+        """Stop campaigning, stop the job and hand the lease to another process"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self.store is not None:
+            try:
+                await self.store.release(self.name)
+                await self.store.close()
+            except Exception as e:
+                logger.warning(f"Error releasing lease {self.name}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "lease": self.name,
+            "backend": getattr(self.store, "name", "none"),
+            "holder": getattr(self.store, "holder", None),
+            "is_leader": self.is_leader,
+            **self._stats
+        }
+
+
+def _create_monitoring_elector() -> LeaderElector:
+    try:
+        store = create_lease_store(settings.LEADER_ELECTION_BACKEND)
+    except Exception as e:
+        logger.warning(f"⚠️  {settings.LEADER_ELECTION_BACKEND} lease store unavailable, using file locks: {e}")
+        store = create_lease_store("file")
+    return LeaderElector("monitoring", store, ttl=settings.LEADER_LEASE_TTL_SECONDS)
+
+
+monitoring_leader = _create_monitoring_elector()
@@ -0,0 +1,70 @@
+"""
+Keyset (cursor) pagination helpers
+Pages are ordered newest first by (created_at, id) and addressed with opaque cursors
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """Keep requested page sizes between 1 and MAX_PAGE_SIZE"""
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Build an opaque cursor pointing just past this row"""
+    raw = json.dumps([row["created_at"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Return the (created_at, id) position encoded in a cursor
+    Both values are re-serialised from a parsed ISO 8601 timestamp and UUID, so
+    nothing from the client reaches the filter string verbatim
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        stamp = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        return stamp.isoformat(), str(uuid.UUID(row_id))
+    except Exception:
+        raise InvalidCursorError("Invalid pagination cursor")
+
+
+def apply_keyset(query, cursor: Optional[str], page_size: int):
+    """
+    Order a PostgREST query by (created_at, id) descending and seek past the cursor
+    Fetches one extra row so callers can tell whether another page exists
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt."{row_id}")'
+        )
+
+    return query.order('created_at', desc=True).order('id', desc=True).limit(page_size + 1)
+
+
+def split_page(rows: Optional[List[Dict[str, Any]]], page_size: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim the look-ahead row and return (page, next_cursor)"""
+    rows = rows or []
+    if len(rows) <= page_size:
+        return rows, None
+
+    page = rows[:page_size]
+    return page, encode_cursor(page[-1])
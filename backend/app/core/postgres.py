@@ -0,0 +1,105 @@
+"""
+Direct Postgres connection pool (asyncpg)
+Optional backend for hot paths, enabled with DB_BACKEND=asyncpg and DATABASE_URL
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_pg_pool = None
+
+# DSN query parameters asyncpg handles itself (plus application_name); asyncpg sends any
+# other parameter to the server as a setting, which Postgres rejects on connect
+ASYNCPG_DSN_PARAMS = {
+    "host", "port", "dbname", "database", "user", "password", "passfile", "service",
+    "sslmode", "sslcert", "sslkey", "sslrootcert", "sslnegotiation", "sslcrl", "sslpassword",
+    "ssl_min_protocol_version", "ssl_max_protocol_version", "target_session_attrs",
+    "krbsrvname", "gsslib", "application_name",
+}
+
+
+def asyncpg_dsn(dsn: str) -> Tuple[str, bool]:
+    """
+    DATABASE_URL reduced to what asyncpg accepts, and whether it points at pgbouncer
+    transaction pooling (pgbouncer=true, as in Supabase/Prisma pooler URLs)
+    """
+    parts = urlsplit(dsn)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    kept = [(key, value) for key, value in params if key in ASYNCPG_DSN_PARAMS]
+    dropped = sorted({key for key, _ in params} - {key for key, _ in kept})
+    if dropped:
+        logger.debug(f"Ignoring DATABASE_URL parameters asyncpg does not support: {', '.join(dropped)}")
+    pgbouncer = any(key == "pgbouncer" and value.lower() == "true" for key, value in params)
+    return urlunsplit(parts._replace(query=urlencode(kept))), pgbouncer
+
+
+def postgres_enabled() -> bool:
+    """Whether hot paths should use the direct Postgres backend"""
+    return settings.DB_BACKEND == "asyncpg"
+
+
+async def init_pg_pool():
+    """Create the asyncpg pool; called from init_db() when the backend is enabled"""
+    global _pg_pool
+
+    if _pg_pool is not None:
+        return _pg_pool
+
+    if not settings.DATABASE_URL:
+        raise RuntimeError("DB_BACKEND=asyncpg requires DATABASE_URL")
+
+    import asyncpg
+
+    dsn, pgbouncer = asyncpg_dsn(settings.DATABASE_URL)
+    statement_cache_size = settings.DB_STATEMENT_CACHE_SIZE
+    if pgbouncer and statement_cache_size:
+        # Transaction pooling hands each statement to any server connection
+        logger.info("DATABASE_URL uses pgbouncer transaction pooling - prepared statement cache disabled")
+        statement_cache_size = 0
+
+    logger.info("🐘 Opening direct Postgres pool...")
+    _pg_pool = await asyncpg.create_pool(
+        dsn=dsn,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        statement_cache_size=statement_cache_size,
+        command_timeout=settings.DB_CALL_DEADLINE_SECONDS
+    )
+    logger.info(f"✅ Postgres pool ready ({settings.DB_POOL_MIN_SIZE}-{settings.DB_POOL_MAX_SIZE} connections)")
+    return _pg_pool
+
+
+async def get_pg_pool():
+    """Get the asyncpg pool, creating it on first use"""
+    if _pg_pool is None:
+        return await init_pg_pool()
+    return _pg_pool
+
+
+async def close_pg_pool():
+    """Close all pooled Postgres connections"""
+    global _pg_pool
+
+    if _pg_pool is not None:
+        pool, _pg_pool = _pg_pool, None
+        try:
+            await pool.close()
+        except Exception as e:
+            logger.warning(f"Error closing Postgres pool: {e}")
+
+
+def get_pg_pool_stats() -> Optional[Dict[str, Any]]:
+    """Pool size and idle connections for health reporting"""
+    if _pg_pool is None:
+        return None
+    return {
+        "size": _pg_pool.get_size(),
+        "idle": _pg_pool.get_idle_size(),
+        "min_size": _pg_pool.get_min_size(),
+        "max_size": _pg_pool.get_max_size()
+    }
@@ -0,0 +1,59 @@
+"""
+Column projections for Supabase queries
+Each call site selects only the columns it reads instead of select('*')
+"""
+
+# data_packs
+PACK_USAGE_CHECK = "id, user_id, data_mb, used_data_mb, expires_at, alert_low_data_sent, alert_75_sent, alert_90_sent"  # MonitoringService.check_packs
+PACK_MONITOR_SCAN = PACK_USAGE_CHECK + ", updated_at"  # MonitoringService._load_active_packs (incremental high-water mark)
+PACK_ESIM_USAGE = "id, data_mb, used_data_mb"  # MonitoringService._update_esim_data_usage
+PACK_USAGE_COST = "id, name, data_mb, remaining_data_mb, price_ngn, expires_at"  # BundleService.calculate_usage_cost
+PACK_USAGE_UPDATE = "id, name, used_data_mb, remaining_data_mb, expires_at"  # BundleService.update_pack_usage
+PACK_SUMMARY = "status, data_mb, used_data_mb, price_ngn"  # BundleService.get_user_bundle_summary
+PACK_ACTIVATION = "id, name, plan_type, expires_at"  # BundleService.activate_data_pack
+PACK_OWNERSHIP = "id"  # BundleService.deactivate_data_pack
+PACK_ACTIVATABLE = "id, name, plan_type, data_mb, price, currency, expires_at"  # BundleService.get_activatable_packs
+PACK_ACTIVE = "id, name, plan_type, data_mb, used_data_mb, activated_at, expires_at"  # BundleService.get_active_pack
+
+# usage_logs
+USAGE_LOG_BURN_RATE = "id, data_pack_id, data_used_mb, created_at"  # BurnRateForecaster.refresh_rates
+
+# esims
+ESIM_PROVIDER_SYNC = "id, user_id, iccid, status"  # MonitoringService._sync_user_provider_data
+
+# internet_sessions
+# Usage is read and written as data_used_mb, but migration 00000000000003 only defines
+# used_data_mb - these call sites keep '*' until that schema drift is resolved, since
+# PostgREST rejects a projection naming a column the table lacks
+SESSION_LIST = "*"  # SessionService.get_user_sessions
+SESSION_STATUS = "id, status, progress_percent, data_mb, used_data_mb, expires_at, error_message"  # GET /sessions/{id}/status
+SESSION_DOWNLOAD = "id, data_mb"  # SessionService._download_session_from_wifi
+SESSION_COMPLETION = "id, user_id, data_mb, esim_id"  # SessionService._complete_session_download
+SESSION_ACTIVATION = "*"  # SessionService.activate_session
+SESSION_USAGE = "*"  # SessionService.track_session_usage
+SESSION_OWNERSHIP = "id, status, data_mb"  # connect profile / WiFi QR generation
+
+# kswifi_connect_profiles - only CONNECT_PROFILE_REUSE needs the VPN config and keys
+CONNECT_PROFILE_REUSE = (  # KSWiFiConnectService.generate_connect_profile
+    "id, vpn_config, client_ip, client_public_key, client_private_key, "
+    "bandwidth_limit_mbps, expires_at"
+)
+CONNECT_PROFILE_USAGE = "id, data_limit_mb, expires_at"  # KSWiFiConnectService.update_session_usage
+CONNECT_PROFILE_LIST = (  # KSWiFiConnectService.get_user_profiles
+    "id, session_id, status, data_used_mb, data_limit_mb, bandwidth_limit_mbps, "
+    "expires_at, created_at, client_ip"
+)
+CONNECT_PROFILE_STATUS = CONNECT_PROFILE_LIST + ", last_used_at"  # GET /api/connect/profile/{id}/status
+CONNECT_PROFILE_KEY = "id, client_public_key"  # DELETE /api/connect/profile/{id}
+
+# wifi_access_tokens
+WIFI_TOKEN_NETWORK = (  # WiFiCaptiveService.get_active_tokens_by_network
+    "id, user_id, session_id, access_token, network_name, status, expires_at, "
+    "data_limit_mb, bandwidth_limit_mbps, wifi_security"
+)
+WIFI_TOKEN_VALIDATION = (  # WiFiCaptiveService.validate_access_token / create_captive_session
+    "id, user_id, access_token, network_name, status, expires_at, data_limit_mb, "
+    "data_used_mb, time_limit_minutes, bandwidth_limit_mbps, sessions_used, "
+    "first_used_at, redirect_url"
+)
+WIFI_TOKEN_REVOKE = "id"  # DELETE /api/wifi/session/{id}
@@ -0,0 +1,280 @@
+"""
+Resilient transport for Supabase HTTP traffic
+Per-call deadlines, jittered retries for idempotent reads and a circuit breaker
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Methods that are safe to retry - PostgREST reads and HEAD counts
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+# Errors worth retrying a write for: connection, rollback (deadlock/serialization),
+# insufficient resources and operator intervention (statement timeout, shutdown)
+TRANSIENT_SQLSTATE_CLASSES = {"08", "40", "53", "57"}
+TRANSIENT_POSTGREST_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("db_deadline", default=None)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling Supabase while the circuit breaker is open"""
+
+
+class DeadlineExceededError(httpx.TimeoutException):
+    """Raised when a database call runs past its deadline"""
+
+
+@contextmanager
+def db_deadline(seconds: float) -> Iterator[None]:
+    """
+    Bound every database call made inside the block by one overall deadline
+    Nested deadlines can only shorten the outer one
+    """
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(min(current, new_deadline) if current else new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _current_deadline() -> float:
+    return _deadline.get() or (time.monotonic() + settings.DB_CALL_DEADLINE_SECONDS)
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open trial after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._stats = {"rejected": 0, "times_opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through now; half-open lets one trial call in"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("✅ Supabase circuit breaker closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """End a half-open trial without a verdict (e.g. cancelled) so the next call can try"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._stats["times_opened"] += 1
+                    logger.warning(f"⚠️  Supabase circuit breaker opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Breaker state for health reporting"""
+        with self._lock:
+            state = self._current_state()
+            retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)) if state == self.OPEN else 0.0
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in_seconds": round(retry_in, 1),
+                **self._stats
+            }
+
+
+db_breaker = CircuitBreaker(
+    failure_threshold=settings.DB_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=settings.DB_BREAKER_RECOVERY_SECONDS
+)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, settings.DB_RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+
+
+def _with_remaining_timeout(request: httpx.Request, deadline: float) -> float:
+    """Clamp the request's timeouts to the time left before the deadline"""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError("Database call deadline exceeded", request=request)
+
+    timeout = dict(request.extensions.get("timeout", {}))
+    for key in ("connect", "read", "write", "pool"):
+        current = timeout.get(key)
+        timeout[key] = remaining if current is None else min(current, remaining)
+    request.extensions["timeout"] = timeout
+    return remaining
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    Whether a failed database call may succeed on retry: transport errors, 5xx and
+    connection-class SQLSTATEs; constraint violations and bad rows are permanent
+    """
+    if isinstance(exc, (httpx.TransportError, OSError, asyncio.TimeoutError)):
+        return True
+    if type(exc).__name__ == "InterfaceError":  # asyncpg connection/pool state
+        return True
+
+    code = getattr(exc, "sqlstate", None) or getattr(exc, "code", None)
+    if isinstance(code, int):  # PostgREST errors without a JSON body carry the HTTP status
+        return code >= 500
+    if isinstance(code, str) and code:
+        return code in TRANSIENT_POSTGREST_CODES or code[:2] in TRANSIENT_SQLSTATE_CLASSES
+    return False
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    return response.status_code >= 500
+
+
+class ResilientAsyncTransport(httpx.AsyncBaseTransport):
+    """Wraps the pooled async transport with deadline, retry and breaker handling"""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, breaker: CircuitBreaker = db_breaker):
+        self.inner = inner
+        self.breaker = breaker
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        deadline = _current_deadline()
+        attempts = settings.DB_RETRY_ATTEMPTS if request.method in IDEMPOTENT_METHODS else 1
+
+        for attempt in range(attempts):
+            # Before allow_request(): a half-open trial must always reach a verdict
+            _with_remaining_timeout(request, deadline)
+            if not self.breaker.allow_request():
+                raise CircuitOpenError("Supabase circuit breaker is open", request=request)
+
+            last_attempt = attempt == attempts - 1
+            try:
+                response = await self.inner.handle_async_request(request)
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if last_attempt:
+                    raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # Cancelled mid-call says nothing about Supabase - let the next call try
+                self.breaker.release_trial()
+                raise
+            else:
+                if not _is_failure(response):
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if last_attempt or response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                await response.aclose()
+
+            delay = _backoff_delay(attempt)
+            if time.monotonic() + delay >= deadline:
+                raise DeadlineExceededError("Database call deadline exceeded", request=request)
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """Sync counterpart of ResilientAsyncTransport for run_db() callers"""
+
+    def __init__(self, inner: httpx.BaseTransport, breaker: CircuitBreaker = db_breaker):
+        self.inner = inner
+        self.breaker = breaker
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        deadline = _current_deadline()
+        attempts = settings.DB_RETRY_ATTEMPTS if request.method in IDEMPOTENT_METHODS else 1
+
+        for attempt in range(attempts):
+            # Before allow_request(): a half-open trial must always reach a verdict
+            _with_remaining_timeout(request, deadline)
+            if not self.breaker.allow_request():
+                raise CircuitOpenError("Supabase circuit breaker is open", request=request)
+
+            last_attempt = attempt == attempts - 1
+            try:
+                response = self.inner.handle_request(request)
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if last_attempt:
+                    raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # Cancelled mid-call says nothing about Supabase - let the next call try
+                self.breaker.release_trial()
+                raise
+            else:
+                if not _is_failure(response):
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if last_attempt or response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                response.close()
+
+            delay = _backoff_delay(attempt)
+            if time.monotonic() + delay >= deadline:
+                raise DeadlineExceededError("Database call deadline exceeded", request=request)
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.inner.close()
@@ -0,0 +1,151 @@
+"""
+Hash-sharded background monitoring
+Users map to one of SHARD_BUCKETS stable buckets (data_packs/esims.shard_bucket) and
+bucket % MONITORING_SHARDS picks the shard; worker processes split the shards between
+them through leases and rebalance when workers join or leave
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+from .config import settings
+from .leader import create_lease_store
+
+logger = logging.getLogger(__name__)
+
+# Must match the shard_bucket generated columns (migration 00000000000007)
+SHARD_BUCKETS = 1024
+
+
+def shard_bucket(user_id: Any) -> int:
+    """Stable bucket for a user id - md5 like the database, never Python's salted hash()"""
+    return int(hashlib.md5(str(user_id).encode()).hexdigest()[:4], 16) % SHARD_BUCKETS
+
+
+@dataclass(frozen=True)
+class ShardAssignment:
+    """Shards of `count` owned by this process"""
+    count: int
+    owned: FrozenSet[int]
+
+    def owns(self, shard: int) -> bool:
+        return shard in self.owned
+
+    def owns_user(self, user_id: Any) -> bool:
+        return shard_bucket(user_id) % self.count in self.owned
+
+    def buckets(self) -> List[int]:
+        """shard_bucket values to filter queries on"""
+        return [bucket for bucket in range(SHARD_BUCKETS) if bucket % self.count in self.owned]
+
+
+class ShardCoordinator:
+    """
+    Holds a membership lease plus up to ceil(shards / live members) shard leases
+    Workers over their share release shards, under it they claim free ones, so
+    shards of a failed worker are picked up once its leases lapse
+    """
+
+    MEMBER_PREFIX = "monitoring:member:"
+    SHARD_PREFIX = "monitoring:shard:"
+
+    def __init__(self, store, shard_count: int, ttl: float):
+        self.store = store
+        self.shard_count = shard_count
+        self.ttl = ttl
+        self.member_name = self.MEMBER_PREFIX + store.holder
+        self._owned: set = set()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"rebalances": 0, "members": 0}
+
+    def start(self, on_change: Callable[[ShardAssignment], Awaitable[Any]]):
+        """Coordinate in the background; on_change receives every new assignment"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._coordinate(on_change))
+
+    @property
+    def assignment(self) -> ShardAssignment:
+        return ShardAssignment(self.shard_count, frozenset(self._owned))
+
+    async def rebalance(self) -> bool:
+        """One coordination round; returns True when the owned shards changed"""
+        before = set(self._owned)
+
+        await self.store.acquire(self.member_name, self.ttl)
+        members = max(1, len(await self.store.live(self.MEMBER_PREFIX)))
+        self._stats["members"] = members
+        target = math.ceil(self.shard_count / members)
+
+        # Renew what we hold; anything we failed to renew may already belong to someone else
+        for shard in sorted(self._owned):
+            if not await self.store.acquire(self.SHARD_PREFIX + str(shard), self.ttl):
+                self._owned.discard(shard)
+
+        # Give up extras so joining workers can take them
+        for shard in sorted(self._owned, reverse=True)[:max(0, len(self._owned) - target)]:
+            await self.store.release(self.SHARD_PREFIX + str(shard))
+            self._owned.discard(shard)
+
+        # Claim free shards up to our share
+        for shard in range(self.shard_count):
+            if len(self._owned) >= target:
+                break
+            if shard not in self._owned and await self.store.acquire(self.SHARD_PREFIX + str(shard), self.ttl):
+                self._owned.add(shard)
+
+        return self._owned != before
+
+    async def _coordinate(self, on_change):
+        while True:
+            try:
+                if await self.rebalance():
+                    self._stats["rebalances"] += 1
+                    logger.info(f"🔀 Monitoring shards now {sorted(self._owned)} of {self.shard_count}")
+                    await on_change(self.assignment)
+            except Exception as e:
+                logger.warning(f"⚠️  Shard rebalance failed: {e}")
+
+            await asyncio.sleep(self.ttl / 3)
+
+    async def stop(self):
+        """Stop coordinating and release every lease for the remaining workers"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            for shard in list(self._owned):
+                await self.store.release(self.SHARD_PREFIX + str(shard))
+            self._owned.clear()
+            await self.store.release(self.member_name)
+            await self.store.close()
+        except Exception as e:
+            logger.warning(f"Error releasing shard leases: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "shards": self.shard_count,
+            "owned": sorted(self._owned),
+            "backend": self.store.name,
+            **self._stats
+        }
+
+
+def create_shard_coordinator() -> ShardCoordinator:
+    """Coordinator over the configured lease store (redis, postgres or file)"""
+    store = create_lease_store(settings.LEADER_ELECTION_BACKEND)
+    if store is None:
+        raise RuntimeError("MONITORING_SHARDS > 1 requires a lease store (LEADER_ELECTION_BACKEND=redis, postgres or file)")
+    return ShardCoordinator(
+        store,
+        shard_count=settings.MONITORING_SHARDS,
+        ttl=settings.LEADER_LEASE_TTL_SECONDS
+    )
@@ -0,0 +1,53 @@
+"""
+Single-flight request coalescing
+Concurrent identical reads share one in-flight query and its result
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers await the same result"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await fn() for key, or join the call already in flight for it
+        The call runs as its own task so one caller being cancelled
+        does not cancel it for the others
+        """
+        task = self._calls.get(key)
+
+        if task is None:
+            self._stats["calls"] += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._stats["shared"] += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Coalescing counters for health reporting"""
+        return {
+            "in_flight": len(self._calls),
+            **self._stats
+        }
+
+
+# Shared instance for database reads
+query_flight = SingleFlight()
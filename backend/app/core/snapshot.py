@@ -0,0 +1,103 @@
+"""
+Background-refreshed snapshots of expensive reads
+Health probes read the last snapshot (no query); other callers refresh it
+only when it is older than max_age, with concurrent refreshes coalesced
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RefreshingSnapshot(Generic[T]):
+    """Last result of loader(), refreshed every max_age / 2 once started"""
+
+    def __init__(self, name: str, loader: Callable[[], Awaitable[T]], max_age: float):
+        self.name = name
+        self.loader = loader
+        self.max_age = max_age
+        self._value: Optional[T] = None
+        self._loaded_at = 0.0
+        self._last_error: Optional[str] = None
+        self._flight = SingleFlight()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"refreshes": 0, "failures": 0}
+
+    async def refresh(self) -> T:
+        """Load a new value now (joins a refresh already in flight)"""
+        return await self._flight.do(self.name, self._load)
+
+    async def _load(self) -> T:
+        try:
+            value = await self.loader()
+        except Exception as e:
+            self._last_error = str(e)
+            self._stats["failures"] += 1
+            raise
+        self._value = value
+        self._loaded_at = time.monotonic()
+        self._last_error = None
+        self._stats["refreshes"] += 1
+        return value
+
+    def age(self) -> Optional[float]:
+        return time.monotonic() - self._loaded_at if self._loaded_at else None
+
+    def peek(self) -> Optional[T]:
+        """Last snapshot without touching the database (None before the first load)"""
+        return self._value
+
+    @property
+    def healthy(self) -> bool:
+        """Last refresh succeeded and the value is within twice its max age"""
+        age = self.age()
+        return self._last_error is None and age is not None and age <= 2 * self.max_age
+
+    async def get(self) -> T:
+        """Snapshot no older than max_age, refreshing it if needed"""
+        age = self.age()
+        if age is not None and age <= self.max_age:
+            return self._value
+        return await self.refresh()
+
+    async def start(self):
+        """Load once and keep the snapshot fresh in the background"""
+        if self._task is None or self._task.done():
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️  Initial {self.name} snapshot failed: {e}")
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.max_age / 2)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️  {self.name} snapshot refresh failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        age = self.age()
+        return {
+            "age_seconds": round(age, 1) if age is not None else None,
+            "max_age_seconds": self.max_age,
+            "last_error": self._last_error,
+            **self._stats
+        }
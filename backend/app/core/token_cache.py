@@ -0,0 +1,75 @@
+"""
+Verified-token cache
+Bounded LRU of decoded JWT claims keyed by the token's sha256, evicted at the token's exp
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .config import settings
+
+
+def token_digest(token: str) -> str:
+    """Cache key for a bearer token - the raw token is never stored as a key"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+@dataclass
+class VerifiedToken:
+    claims: Dict[str, Any]
+    expires_at: float  # token exp (epoch seconds)
+    issued_by_supabase: bool
+    revocation_checked_at: Optional[float] = None  # monotonic
+
+
+class TokenClaimsCache:
+    """LRU of verified token claims with expiry-aware eviction and hit-rate metrics"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, VerifiedToken]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    def get(self, key: str) -> Optional[VerifiedToken]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        if entry.expires_at <= time.time():
+            del self._entries[key]
+            self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry
+
+    def put(self, key: str, entry: VerifiedToken):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evicted"] += 1
+
+    def discard(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            **self._stats
+        }
+
+
+token_claims_cache = TokenClaimsCache(max_entries=settings.AUTH_TOKEN_CACHE_SIZE)
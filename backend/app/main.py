@@ -23,6 +23,14 @@ except Exception as e:
     print("❌ Check your deployment platform environment variables")
     raise
 from .core.database import init_db, close_db
+from .core.cache import query_cache
+from .core.singleflight import query_flight
+from .core.batch_writer import usage_log_writer
+from .core.jwt_keys import jwks_cache
+from .core.token_cache import token_claims_cache
+from .core.known_users import known_users
+from .core.leader import monitoring_leader
+from .core.resilience import CircuitBreaker, CircuitOpenError, db_breaker
 from .routes import (
     auth_router,
     bundles_router,
@@ -103,11 +111,46 @@ async def lifespan(app: FastAPI):
         # Continue anyway - some services might work without DB
         logger.warning("⚠️  Continuing without database - some features may not work")
     
-    # Monitoring service
+    # Supabase Auth signing keys for local JWT verification
     try:
-        logger.info("📊 Starting background monitoring service...")
-        asyncio.create_task(monitoring_service.start_monitoring())
-        logger.info("✅ Background monitoring service started")
+        await jwks_cache.start()
+        
+    except Exception as e:
+        logger.error("❌ JWKS cache failed to start", 
+                    error=str(e), 
+                    error_type=type(e).__name__)
+    
+    # Buffered usage_logs writer
+    try:
+        await usage_log_writer.start()
+        
+    except Exception as e:
+        logger.error("❌ Usage log writer failed to start", 
+                    error=str(e), 
+                    error_type=type(e).__name__)
+        logger.warning("⚠️  Usage logs will be written synchronously")
+    
+    # Monitoring counts snapshot served to health probes
+    try:
+        await monitoring_service.counts_snapshot.start()
+        
+    except Exception as e:
+        logger.error("❌ Monitoring counts snapshot failed to start", 
+                    error=str(e), 
+                    error_type=type(e).__name__)
+    
+    # Monitoring service - only the process holding the monitoring lease runs the loops
+    try:
+        if settings.RUN_BACKGROUND_JOBS and settings.MONITORING_SHARDS > 1:
+            # Sharded monitoring runs in worker processes; an API leader would monitor every user again
+            logger.error("❌ MONITORING_SHARDS > 1 requires RUN_BACKGROUND_JOBS=false on the API - "
+                         "not starting monitoring here, run it with worker.py")
+        elif settings.RUN_BACKGROUND_JOBS:
+            logger.info("📊 Starting background monitoring service...")
+            monitoring_leader.start(monitoring_service.start_monitoring, on_demoted=monitoring_service.stop_monitoring)
+            logger.info("✅ Background monitoring service campaigning for leadership")
+        else:
+            logger.info("📊 Background jobs disabled - monitoring runs in the worker process")
         
     except Exception as e:
         logger.error("❌ Monitoring service failed to start", 
@@ -124,9 +167,11 @@ async def lifespan(app: FastAPI):
     logger.info("🔄 Shutting down KSWiFi Backend Service...")
     
     try:
-        # Stop monitoring service
+        # Stop monitoring service and hand the lease to another worker
         logger.info("📊 Stopping monitoring service...")
+        await monitoring_leader.stop()
         await monitoring_service.stop_monitoring()
+        await monitoring_service.counts_snapshot.stop()
         logger.info("✅ Monitoring service stopped")
         
     except Exception as e:
@@ -134,6 +179,35 @@ async def lifespan(app: FastAPI):
                     error=str(e), 
                     error_type=type(e).__name__)
     
+    try:
+        # Flush buffered usage logs before the database goes away
+        logger.info("📝 Flushing buffered usage logs...")
+        await usage_log_writer.stop()
+        
+    except Exception as e:
+        logger.error("❌ Error flushing usage logs", 
+                    error=str(e), 
+                    error_type=type(e).__name__)
+    
+    try:
+        # Stop signing key refresh
+        await jwks_cache.stop()
+        
+    except Exception as e:
+        logger.error("❌ Error stopping JWKS cache", 
+                    error=str(e), 
+                    error_type=type(e).__name__)
+    
+    try:
+        # Release query cache connections
+        await query_cache.close()
+        await known_users.close()
+        
+    except Exception as e:
+        logger.error("❌ Error closing query cache", 
+                    error=str(e), 
+                    error_type=type(e).__name__)
+    
     try:
         # Close database connections
         logger.info("🗄️  Closing database connections...")
@@ -177,6 +251,16 @@ async def http_exception_handler(request, exc):
         content={"detail": exc.detail, "path": str(request.url.path)}
     )
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request, exc):
+    """Fail fast with 503 while the Supabase circuit breaker is open"""
+    logger.warning("Circuit breaker open", path=request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database temporarily unavailable", "path": str(request.url.path)},
+        headers={"Retry-After": str(int(settings.DB_BREAKER_RECOVERY_SECONDS))}
+    )
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Global exception handler"""
@@ -201,23 +285,42 @@ app.include_router(debug_router, prefix="/api/debug", tags=["Debug"])
 # Health check endpoints
 @app.get("/health")
 async def health_check():
-    """Health check endpoint with Supabase PostgreSQL connection test"""
+    """Health check endpoint served from background snapshots - no database queries per probe"""
     try:
-        # Check Supabase PostgreSQL database connectivity
+        # Supabase connectivity is judged by the background monitoring counts refresh
         from .core.database import get_database_health
-        db_health = await get_database_health()
+        db_health = await get_database_health(probe=False)
+        counts_snapshot = monitoring_service.counts_snapshot
+        db_health["database_accessible"] = counts_snapshot.healthy if counts_snapshot.age() is not None else "unknown"
         
         # Check monitoring service
-        monitoring_stats = await monitoring_service.get_monitoring_stats()
+        monitoring_stats = await monitoring_service.get_monitoring_stats(snapshot_only=True)
         
-        return {
+        breaker = db_breaker.get_stats()
+        health = {
             "status": "healthy" if db_health["status"] == "healthy" else "unhealthy",
             "service": settings.APP_NAME,
             "version": settings.APP_VERSION,
             "database": db_health,
-            "monitoring": "running" if monitoring_stats.get('service_running') else "stopped",
+            "circuit_breaker": breaker,
+            "cache": query_cache.get_stats(),
+            "singleflight": query_flight.get_stats(),
+            "usage_log_writer": usage_log_writer.get_stats(),
+            "jwks": jwks_cache.get_stats(),
+            "token_cache": token_claims_cache.get_stats(),
+            "known_users": known_users.get_stats(),
+            "monitoring_leader": monitoring_leader.get_stats(),
+            "monitoring": "running" if monitoring_stats.get('service_running') else ("stopped" if settings.RUN_BACKGROUND_JOBS else "worker"),
+            "monitoring_counts": counts_snapshot.get_stats(),
             "timestamp": monitoring_stats.get('last_check')
         }
+        
+        # Let the load balancer shed traffic while Supabase is failing fast
+        if breaker["state"] == CircuitBreaker.OPEN:
+            health["status"] = "degraded"
+            return JSONResponse(status_code=503, content=health)
+        
+        return health
     except Exception as e:
         logger.error("Health check failed", error=str(e))
         return JSONResponse(
@@ -367,8 +470,8 @@ async def detailed_health_check():
         
         # Check database
         try:
-            from .core.database import get_supabase_client
-            test_response = get_supabase_client().table('users').select('id').limit(1).execute()
+            from .core.database import get_supabase_client, run_db
+            test_response = await run_db(get_supabase_client().table('users').select('id').limit(1).execute)
             health_data["components"]["database"] = {
                 "status": "healthy",
                 "response_time": "< 100ms"
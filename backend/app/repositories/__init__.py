@@ -0,0 +1,18 @@
+"""
+Data access repositories
+"""
+
+from .base import TABLES, QueryBuilder, Repository
+from .memory import MemoryClient, MemoryStore, memory_store
+from .postgres import PostgresRepository, get_postgres_repository
+
+__all__ = [
+    "TABLES",
+    "QueryBuilder",
+    "Repository",
+    "MemoryClient",
+    "MemoryStore",
+    "memory_store",
+    "PostgresRepository",
+    "get_postgres_repository"
+]
@@ -0,0 +1,58 @@
+"""
+Repository interface shared by the data backends
+Services talk to a PostgREST-style client: table(...) query chains and rpc(...)
+"""
+
+from typing import Any, Dict, Optional, Protocol
+
+# Tables the service layer reads and writes
+TABLES = (
+    "users",
+    "user_profiles",
+    "data_packs",
+    "internet_sessions",
+    "esims",
+    "notifications",
+    "usage_logs",
+    "kswifi_connect_profiles",
+    "wifi_access_tokens",
+    "wifi_device_connections",
+    "user_devices",
+)
+
+# Tables with an update_updated_at_column() trigger
+UPDATED_AT_TABLES = {"users", "data_packs", "esims", "internet_sessions", "notifications"}
+
+# Columns whose updates leave updated_at alone (alert bookkeeping, migration 6)
+UPDATED_AT_IGNORED_COLUMNS = {
+    "data_packs": {"alert_low_data_sent", "alert_75_sent", "alert_90_sent"},
+}
+
+
+class QueryBuilder(Protocol):
+    """Filter/order/limit subset of the PostgREST request builder used by services"""
+
+    def select(self, columns: str = "*", *, count: Optional[str] = None) -> "QueryBuilder": ...
+    def insert(self, rows: Any, **kwargs) -> "QueryBuilder": ...
+    def update(self, data: Dict[str, Any]) -> "QueryBuilder": ...
+    def upsert(self, rows: Any, *, on_conflict: str = "", **kwargs) -> "QueryBuilder": ...
+    def delete(self) -> "QueryBuilder": ...
+    def eq(self, column: str, value: Any) -> "QueryBuilder": ...
+    def neq(self, column: str, value: Any) -> "QueryBuilder": ...
+    def gt(self, column: str, value: Any) -> "QueryBuilder": ...
+    def gte(self, column: str, value: Any) -> "QueryBuilder": ...
+    def lt(self, column: str, value: Any) -> "QueryBuilder": ...
+    def lte(self, column: str, value: Any) -> "QueryBuilder": ...
+    def in_(self, column: str, values: Any) -> "QueryBuilder": ...
+    def or_(self, filters: str) -> "QueryBuilder": ...
+    def order(self, column: str, *, desc: bool = False) -> "QueryBuilder": ...
+    def limit(self, size: int) -> "QueryBuilder": ...
+    def single(self) -> "QueryBuilder": ...
+    def execute(self) -> Any: ...
+
+
+class Repository(Protocol):
+    """A data backend: the Supabase client or an in-memory stand-in"""
+
+    def table(self, name: str) -> QueryBuilder: ...
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None) -> Any: ...
@@ -0,0 +1,603 @@
+"""
+In-memory stand-in for the Supabase client
+Supports the PostgREST filter/order/limit/count subset the services use, so the
+service layer can be benchmarked and load-tested offline (DB_BACKEND=memory)
+"""
+
+import threading
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from postgrest import APIResponse
+from postgrest.base_request_builder import SingleAPIResponse
+from postgrest.exceptions import APIError
+
+from ..core.sharding import shard_bucket
+from .base import UPDATED_AT_IGNORED_COLUMNS, UPDATED_AT_TABLES
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+
+# Equality lookups on these columns are served from a hash index instead of a scan
+INDEXED_COLUMNS = (
+    "id", "user_id", "status", "session_id", "esim_id", "data_pack_id",
+    "access_token", "push_token", "iccid"
+)
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _normalize(value: Any) -> Any:
+    """Store values the way they come back from PostgREST JSON"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _looks_like_timestamp(value: str) -> bool:
+    return len(value) >= 10 and value[4:5] == "-" and value[7:8] == "-"
+
+
+def _as_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _comparable(row_value: Any, value: Any) -> Tuple[Any, Any]:
+    """Coerce a filter value (often a string from or_ syntax) to the row value's type"""
+    if isinstance(row_value, bool):
+        if isinstance(value, str):
+            value = value.lower() == "true"
+        return row_value, value
+    if isinstance(row_value, (int, float)) and isinstance(value, str):
+        return row_value, float(value)
+    if isinstance(row_value, str) and isinstance(value, str):
+        if _looks_like_timestamp(row_value) and _looks_like_timestamp(value):
+            try:
+                return _as_datetime(row_value), _as_datetime(value)
+            except ValueError:
+                pass
+        return row_value, value
+    if isinstance(row_value, str) and not isinstance(value, str):
+        return row_value, str(value)
+    return row_value, value
+
+
+def _compare(op: str, row_value: Any, value: Any) -> bool:
+    value = _normalize(value)
+
+    if op == "is":
+        if isinstance(value, str):
+            value = {"null": None, "true": True, "false": False}.get(value.lower(), value)
+        return row_value is value
+    if op == "in":
+        return any(_compare("eq", row_value, item) for item in value)
+    if row_value is None or value is None:
+        return op == "neq" and (row_value is None) != (value is None)
+
+    left, right = _comparable(row_value, value)
+    try:
+        if op == "eq":
+            return left == right
+        if op == "neq":
+            return left != right
+        if op == "gt":
+            return left > right
+        if op == "gte":
+            return left >= right
+        if op == "lt":
+            return left < right
+        if op == "lte":
+            return left <= right
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _parse_filter_value(raw: str) -> Any:
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        return raw[1:-1]
+    if raw.startswith("(") and raw.endswith(")"):
+        return [_parse_filter_value(item.strip()) for item in _split_top_level(raw[1:-1])]
+    return raw
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas that are not inside parentheses or double quotes"""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(text):
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part for part in parts if part]
+
+
+def _parse_logic_tree(text: str) -> Predicate:
+    """Compile PostgREST logic syntax, e.g. 'a.lt.1,and(b.eq.2,c.is.null)'"""
+    text = text.strip()
+    for combinator, reducer in (("and(", all), ("or(", any), ("not.and(", None), ("not.or(", None)):
+        if text.startswith(combinator) and text.endswith(")"):
+            children = [_parse_logic_tree(part) for part in _split_top_level(text[len(combinator):-1])]
+            if reducer is None:
+                inner = all if combinator == "not.and(" else any
+                return lambda row: not inner(child(row) for child in children)
+            return lambda row: reducer(child(row) for child in children)
+
+    column, op, raw_value = text.split(".", 2)
+    negate = op == "not"
+    if negate:
+        op, raw_value = raw_value.split(".", 1)
+    value = _parse_filter_value(raw_value)
+
+    def predicate(row: Row) -> bool:
+        result = _compare(op, row.get(column), value)
+        return not result if negate else result
+
+    return predicate
+
+
+def _sort_key(value: Any) -> Tuple[bool, Any]:
+    """Postgres ordering: NULLS LAST ascending (first when descending)"""
+    if value is None:
+        return True, 0
+    if isinstance(value, str) and _looks_like_timestamp(value):
+        try:
+            return False, _as_datetime(value)
+        except ValueError:
+            pass
+    return False, value
+
+
+def _compute_generated(table: str, row: Row):
+    """GENERATED ALWAYS columns maintained by Postgres"""
+    if table == "data_packs":
+        data_mb, used_mb = row.get("data_mb"), row.get("used_data_mb")
+        if isinstance(data_mb, (int, float)) and isinstance(used_mb, (int, float)):
+            row["remaining_data_mb"] = data_mb - used_mb
+    if table in ("data_packs", "esims", "usage_logs"):
+        user_id = row.get("user_id")
+        row["shard_bucket"] = shard_bucket(user_id) if user_id is not None else None
+
+
+def _project(row: Row, columns: Optional[List[str]]) -> Row:
+    if columns is None:
+        return dict(row)
+    return {column: row[column] for column in columns if column in row}
+
+
+class MemoryStore:
+    """Thread-safe table storage with hash indexes on common lookup columns"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tables: Dict[str, Dict[str, Row]] = defaultdict(dict)
+        self._indexes: Dict[str, Dict[str, Dict[Any, Set[str]]]] = defaultdict(
+            lambda: defaultdict(lambda: defaultdict(set))
+        )
+        self._rpcs: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "expire_overdue_data_packs": self._rpc_expire_overdue_data_packs,
+            "activate_data_pack": self._rpc_activate_data_pack,
+            "deactivate_data_pack": self._rpc_deactivate_data_pack,
+            "monitoring_counts": self._rpc_monitoring_counts,
+            "start_wifi_token_session": self._rpc_start_wifi_token_session,
+            "record_wifi_token_usage": self._rpc_record_wifi_token_usage,
+            "claim_session_downloads": self._rpc_claim_session_downloads,
+            "version": lambda params: "memory",
+        }
+
+    # Storage primitives (callers hold the lock)
+
+    def _index_add(self, table: str, row: Row):
+        indexes = self._indexes[table]
+        for column in INDEXED_COLUMNS:
+            value = row.get(column)
+            if value is not None:
+                indexes[column][value].add(row["id"])
+
+    def _index_remove(self, table: str, row: Row):
+        indexes = self._indexes[table]
+        for column in INDEXED_COLUMNS:
+            value = row.get(column)
+            if value is not None:
+                ids = indexes[column].get(value)
+                if ids is not None:
+                    ids.discard(row["id"])
+                    if not ids:
+                        del indexes[column][value]
+
+    def _put(self, table: str, row: Row) -> Row:
+        row = {key: _normalize(value) for key, value in row.items()}
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", _utcnow())
+        if table in UPDATED_AT_TABLES:
+            row.setdefault("updated_at", row["created_at"])
+        _compute_generated(table, row)
+
+        existing = self._tables[table].get(row["id"])
+        if existing is not None:
+            self._index_remove(table, existing)
+        self._tables[table][row["id"]] = row
+        self._index_add(table, row)
+        return row
+
+    def _patch(self, table: str, row: Row, data: Dict[str, Any]) -> Row:
+        self._index_remove(table, row)
+        row.update({key: _normalize(value) for key, value in data.items()})
+        if (table in UPDATED_AT_TABLES and "updated_at" not in data
+                and not data.keys() <= UPDATED_AT_IGNORED_COLUMNS.get(table, set())):
+            row["updated_at"] = _utcnow()
+        _compute_generated(table, row)
+        self._index_add(table, row)
+        return row
+
+    def _candidates(self, table: str, equalities: List[Tuple[str, Any]]) -> Iterable[Row]:
+        """Narrow a scan with the most selective indexed equality filter"""
+        rows = self._tables[table]
+        best: Optional[Set[str]] = None
+        for column, value in equalities:
+            if column in INDEXED_COLUMNS:
+                ids = self._indexes[table][column].get(_normalize(value), set())
+                if best is None or len(ids) < len(best):
+                    best = ids
+        if best is None:
+            return list(rows.values())
+        return [rows[row_id] for row_id in best]
+
+    def _match(self, table: str, equalities: List[Tuple[str, Any]], predicates: List[Predicate]) -> List[Row]:
+        return [
+            row for row in self._candidates(table, equalities)
+            if all(predicate(row) for predicate in predicates)
+        ]
+
+    # Public API
+
+    def load(self, table: str, rows: Iterable[Row]) -> int:
+        """Bulk-seed a table (e.g. millions of rows for a perf run)"""
+        count = 0
+        with self._lock:
+            for row in rows:
+                self._put(table, row)
+                count += 1
+        return count
+
+    def count(self, table: str) -> int:
+        with self._lock:
+            return len(self._tables[table])
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self._indexes.clear()
+
+    def register_rpc(self, name: str, fn: Callable[[Dict[str, Any]], Any]):
+        """Add or override a stored-procedure implementation"""
+        self._rpcs[name] = fn
+
+    def run_query(self, query: "MemoryQuery") -> APIResponse:
+        with self._lock:
+            table = query.table_name
+            count = None
+
+            if query.method == "insert":
+                data = []
+                for row in query.payload:
+                    existing = self._find_conflict(table, row, query.on_conflict) if query.on_conflict else None
+                    if existing is not None:
+                        if not query.ignore_duplicates:
+                            data.append(dict(self._patch(table, existing, row)))
+                    else:
+                        data.append(dict(self._put(table, row)))
+            else:
+                matched = self._match(table, query.equalities, query.predicates)
+
+                if query.method == "update":
+                    data = [dict(self._patch(table, row, query.payload)) for row in matched]
+                elif query.method == "delete":
+                    for row in matched:
+                        self._index_remove(table, row)
+                        del self._tables[table][row["id"]]
+                    data = [dict(row) for row in matched]
+                else:
+                    if query.count:
+                        count = len(matched)
+                    for column, desc in reversed(query.ordering):
+                        matched.sort(key=lambda row: _sort_key(row.get(column)), reverse=desc)
+                    end = None if query.limit_size is None else query.offset + query.limit_size
+                    data = [_project(row, query.columns) for row in matched[query.offset:end]]
+
+        if query.is_single:
+            if len(data) != 1:
+                raise APIError({
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "code": "PGRST116",
+                    "details": f"The result contains {len(data)} rows",
+                    "hint": None
+                })
+            return SingleAPIResponse.model_construct(data=data[0], count=count)
+        return APIResponse.model_construct(data=data, count=count)
+
+    def _find_conflict(self, table: str, row: Row, on_conflict: List[str]) -> Optional[Row]:
+        if not all(column in row for column in on_conflict):
+            return None
+        matches = self._match(table, [(column, row[column]) for column in on_conflict], [
+            (lambda r, c=column, v=row[column]: _compare("eq", r.get(c), v)) for column in on_conflict
+        ])
+        return matches[0] if matches else None
+
+    def run_rpc(self, name: str, params: Dict[str, Any]) -> APIResponse:
+        fn = self._rpcs.get(name)
+        if fn is None:
+            raise APIError({
+                "message": f"Could not find the function public.{name}",
+                "code": "PGRST202",
+                "details": None,
+                "hint": None
+            })
+        with self._lock:
+            return APIResponse.model_construct(data=fn(params or {}), count=None)
+
+    # Stored procedures (mirror supabase/migrations)
+
+    def _rpc_expire_overdue_data_packs(self, params: Dict[str, Any]) -> List[Row]:
+        now = datetime.now(timezone.utc)
+        expired = []
+        for row in self._match("data_packs", [("status", "active")], [
+            lambda r: r.get("status") == "active" and r.get("expires_at") is not None and _as_datetime(r["expires_at"]) < now
+        ]):
+            self._patch("data_packs", row, {"status": "expired"})
+            expired.append({"id": row["id"], "user_id": row.get("user_id")})
+        return expired
+
+    def _rpc_monitoring_counts(self, params: Dict[str, Any]) -> List[Row]:
+        recent_since = _as_datetime(params["recent_since"]) if params.get("recent_since") else (
+            datetime.now(timezone.utc) - timedelta(hours=1)
+        )
+        recent_logs = [
+            row for row in self._tables["usage_logs"].values()
+            if row.get("created_at") is not None and _as_datetime(row["created_at"]) >= recent_since
+        ]
+        return [{
+            "active_data_packs": len(self._match("data_packs", [("status", "active")], [])),
+            "active_esims": len(self._match("esims", [("status", "active")], [])),
+            "recent_usage_logs": len(recent_logs)
+        }]
+
+    def _rpc_start_wifi_token_session(self, params: Dict[str, Any]) -> Optional[int]:
+        token = self._tables["wifi_access_tokens"].get(_normalize(params["token_id"]))
+        if (token is None or token.get("status") != "active"
+                or _as_datetime(token["expires_at"]) <= datetime.now(timezone.utc)
+                or (token.get("data_used_mb") or 0) >= token["data_limit_mb"]):
+            return None
+        now = _utcnow()
+        self._patch("wifi_access_tokens", token, {
+            "sessions_used": (token.get("sessions_used") or 0) + 1,
+            "first_used_at": token.get("first_used_at") or now,
+            "last_used_at": now,
+            "updated_at": now
+        })
+        return token["sessions_used"]
+
+    def _rpc_record_wifi_token_usage(self, params: Dict[str, Any]) -> Optional[Row]:
+        token = self._tables["wifi_access_tokens"].get(_normalize(params["token_id"]))
+        if token is None:
+            return None
+        used = (token.get("data_used_mb") or 0) + params["used_mb"]
+        status = token.get("status")
+        if status == "active" and used >= token["data_limit_mb"]:
+            status = "used"
+        now = _utcnow()
+        self._patch("wifi_access_tokens", token, {
+            "data_used_mb": used, "status": status, "last_used_at": now, "updated_at": now
+        })
+        return {"data_used_mb": used, "data_limit_mb": token["data_limit_mb"], "status": status}
+
+    def _rpc_claim_session_downloads(self, params: Dict[str, Any]) -> List[Row]:
+        now = datetime.now(timezone.utc)
+        claimable = sorted(
+            (row for row in self._tables["internet_sessions"].values()
+             if row.get("status") in ("downloading", "transferring")
+             and (row.get("download_claimed_until") is None or _as_datetime(row["download_claimed_until"]) < now)),
+            key=lambda row: _sort_key(row.get("created_at"))
+        )[:params.get("max_rows", 50)]
+        until = (now + timedelta(seconds=params["lease_seconds"])).isoformat()
+        for row in claimable:
+            self._patch("internet_sessions", row, {"download_claimed_by": params["holder"], "download_claimed_until": until})
+        return [{"id": row["id"]} for row in claimable]
+
+    def _rpc_activate_data_pack(self, params: Dict[str, Any]) -> None:
+        pack = self._tables["data_packs"].get(_normalize(params["pack_id"]))
+        if pack is None:
+            return None
+        user_id = pack.get("user_id")
+        for row in self._match("data_packs", [("user_id", user_id)], [lambda r: r.get("is_active") is True]):
+            self._patch("data_packs", row, {"is_active": False})
+        self._patch("data_packs", pack, {"is_active": True, "activated_at": _utcnow(), "status": "active"})
+
+        esim_id = params.get("esim_id")
+        if esim_id is not None:
+            for row in self._match("esims", [("user_id", user_id)], [lambda r: r.get("is_active") is True]):
+                self._patch("esims", row, {"is_active": False})
+            esim = self._tables["esims"].get(_normalize(esim_id))
+            if esim is not None:
+                self._patch("esims", esim, {"is_active": True, "data_pack_id": pack["id"], "status": "active"})
+        return None
+
+    def _rpc_deactivate_data_pack(self, params: Dict[str, Any]) -> None:
+        pack_id = _normalize(params["pack_id"])
+        pack = self._tables["data_packs"].get(pack_id)
+        if pack is not None:
+            self._patch("data_packs", pack, {"is_active": False})
+        for row in self._match("esims", [("data_pack_id", pack_id)], []):
+            self._patch("esims", row, {"is_active": False, "status": "suspended"})
+        return None
+
+
+class MemoryQuery:
+    """Chainable query builder mirroring postgrest's sync request builder"""
+
+    def __init__(self, store: MemoryStore, table_name: str):
+        self.store = store
+        self.table_name = table_name
+        self.method = "select"
+        self.columns: Optional[List[str]] = None
+        self.count: Optional[str] = None
+        self.payload: Any = None
+        self.on_conflict: Optional[List[str]] = None
+        self.ignore_duplicates = False
+        self.equalities: List[Tuple[str, Any]] = []
+        self.predicates: List[Predicate] = []
+        self.ordering: List[Tuple[str, bool]] = []
+        self.limit_size: Optional[int] = None
+        self.offset = 0
+        self.is_single = False
+
+    # Operations
+
+    def select(self, *columns: str, count: Optional[str] = None, head: Optional[bool] = None) -> "MemoryQuery":
+        self.method = "select"
+        names = [name.strip() for name in ",".join(columns or ("*",)).split(",") if name.strip()]
+        self.columns = None if "*" in names else names
+        self.count = count
+        return self
+
+    def insert(self, rows: Any, *, count: Optional[str] = None, returning: Any = None,
+               upsert: bool = False, default_to_null: bool = True) -> "MemoryQuery":
+        self.method = "insert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        if upsert:
+            self.on_conflict = ["id"]
+        return self
+
+    def upsert(self, rows: Any, *, count: Optional[str] = None, returning: Any = None,
+               ignore_duplicates: bool = False, on_conflict: str = "",
+               default_to_null: bool = True) -> "MemoryQuery":
+        self.method = "insert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        self.on_conflict = [column.strip() for column in (on_conflict or "id").split(",")]
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, data: Dict[str, Any], *, count: Optional[str] = None, returning: Any = None) -> "MemoryQuery":
+        self.method = "update"
+        self.payload = data
+        return self
+
+    def delete(self, *, count: Optional[str] = None, returning: Any = None) -> "MemoryQuery":
+        self.method = "delete"
+        return self
+
+    # Filters
+
+    def _filter(self, column: str, op: str, value: Any) -> "MemoryQuery":
+        self.predicates.append(lambda row: _compare(op, row.get(column), value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "MemoryQuery":
+        self.equalities.append((column, value))
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "lte", value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "MemoryQuery":
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "is", "null" if value is None else value)
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "MemoryQuery":
+        self.predicates.append(_parse_logic_tree(f"or({filters})"))
+        return self
+
+    # Modifiers
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None,
+              foreign_table: Optional[str] = None) -> "MemoryQuery":
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size: int, *, foreign_table: Optional[str] = None) -> "MemoryQuery":
+        self.limit_size = size
+        return self
+
+    def range(self, start: int, end: int, foreign_table: Optional[str] = None) -> "MemoryQuery":
+        self.offset = start
+        self.limit_size = end - start + 1
+        return self
+
+    def single(self) -> "MemoryQuery":
+        self.is_single = True
+        return self
+
+    def execute(self) -> APIResponse:
+        return self.store.run_query(self)
+
+
+class AsyncMemoryQuery(MemoryQuery):
+    """Awaitable variant used in place of the async Supabase client"""
+
+    async def execute(self) -> APIResponse:
+        return self.store.run_query(self)
+
+
+class MemoryRpc:
+    def __init__(self, store: MemoryStore, name: str, params: Optional[Dict[str, Any]]):
+        self.store = store
+        self.name = name
+        self.params = params
+
+    def execute(self) -> APIResponse:
+        return self.store.run_rpc(self.name, self.params)
+
+
+class AsyncMemoryRpc(MemoryRpc):
+    async def execute(self) -> APIResponse:
+        return self.store.run_rpc(self.name, self.params)
+
+
+class MemoryClient:
+    """Drop-in for supabase.Client / AsyncClient table() and rpc() access"""
+
+    def __init__(self, store: MemoryStore, is_async: bool = False):
+        self.store = store
+        self.is_async = is_async
+
+    def table(self, name: str) -> MemoryQuery:
+        return (AsyncMemoryQuery if self.is_async else MemoryQuery)(self.store, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None) -> MemoryRpc:
+        return (AsyncMemoryRpc if self.is_async else MemoryRpc)(self.store, fn, params)
+
+
+# Shared by the sync and async clients so both see the same rows
+memory_store = MemoryStore()
@@ -0,0 +1,217 @@
+"""
+asyncpg-backed repository for high-volume paths
+Usage ingest and monitoring scans skip the PostgREST HTTP/JSON hop
+"""
+
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..core.postgres import get_pg_pool
+from ..models.enums import DataPackStatus
+
+# Columns accepted for usage_logs inserts (PostgREST rejects unknown ones too; usage_type is migration 10)
+USAGE_LOG_COLUMNS = (
+    "user_id", "data_pack_id", "data_used_mb", "session_duration",
+    "location", "device_info", "usage_type", "created_at"
+)
+
+TIMESTAMP_COLUMNS = {"created_at", "updated_at"}
+
+_SELECT_ACTIVE_PACKS = """
+    SELECT id, user_id, data_mb, used_data_mb, expires_at,
+           alert_low_data_sent, alert_75_sent, alert_90_sent, updated_at
+    FROM data_packs
+    WHERE status = 'active'
+"""
+
+
+_LOCK_ACTIVE_USER_PACKS = """
+    SELECT id, name, used_data_mb, remaining_data_mb
+    FROM data_packs
+    WHERE user_id = $1 AND status = 'active'
+    ORDER BY expires_at
+    FOR UPDATE
+"""
+
+_UPDATE_PACK_USAGE = """
+    UPDATE data_packs
+    SET used_data_mb = $2, status = $3::data_pack_status
+    WHERE id = $1
+"""
+
+_SET_ALERT_FLAGS = """
+    UPDATE data_packs
+    SET alert_low_data_sent = ($2::int & 1) <> 0,
+        alert_75_sent = ($2::int & 2) <> 0,
+        alert_90_sent = ($2::int & 4) <> 0
+    WHERE id = $1
+"""
+
+_EXPIRE_OVERDUE_PACKS = "SELECT id, user_id FROM expire_overdue_data_packs()"
+
+_MONITORING_COUNTS = "SELECT active_data_packs, active_esims, recent_usage_logs FROM monitoring_counts($1)"
+
+
+def _to_json_value(value: Any) -> Any:
+    """Convert asyncpg values to the JSON-style values PostgREST would return"""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _record_to_dict(record) -> Dict[str, Any]:
+    return {key: _to_json_value(value) for key, value in record.items()}
+
+
+def _to_db_value(column: str, value: Any) -> Any:
+    """Convert service-layer values (ISO strings, dicts) to asyncpg parameters"""
+    if column in TIMESTAMP_COLUMNS and isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+class PostgresRepository:
+    """Hot-path queries over a pooled asyncpg connection set"""
+
+    async def fetch_active_packs(
+        self,
+        updated_since: Optional[str] = None,
+        shard_count: int = 1,
+        shards: Optional[Sequence[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Active packs for the monitoring scan (same columns as PACK_MONITOR_SCAN)
+        shards restricts the scan to packs whose shard_bucket % shard_count is listed
+        """
+        query, args = _SELECT_ACTIVE_PACKS, []
+        if updated_since:
+            args.append(_to_db_value('updated_at', updated_since))
+            query += f"  AND updated_at >= ${len(args)}\n"
+        if shards is not None:
+            args.extend([shard_count, list(shards)])
+            query += f"  AND shard_bucket % ${len(args) - 1}::int = ANY(${len(args)}::int[])\n"
+
+        pool = await get_pg_pool()
+        rows = await pool.fetch(query, *args)
+        return [_record_to_dict(row) for row in rows]
+
+    async def expire_overdue_packs(self) -> List[Dict[str, Any]]:
+        """Run the set-based expiry function and return expired id/user_id pairs"""
+        pool = await get_pg_pool()
+        rows = await pool.fetch(_EXPIRE_OVERDUE_PACKS)
+        return [_record_to_dict(row) for row in rows]
+
+    async def monitoring_counts(self, recent_since: datetime) -> Dict[str, Any]:
+        """Active pack/eSIM and recent usage log counts in one query"""
+        pool = await get_pg_pool()
+        row = await pool.fetchrow(_MONITORING_COUNTS, recent_since)
+        return _record_to_dict(row)
+
+    async def set_alert_flags(self, flags: Sequence[Tuple[Any, int]]):
+        """Persist (pack_id, ALERT_* bit field) pairs to the alert columns in one prepared executemany"""
+        pool = await get_pg_pool()
+        await pool.executemany(_SET_ALERT_FLAGS, flags)
+
+    async def apply_pack_usage(
+        self,
+        user_id: str,
+        data_used_mb: float,
+        session_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Spread usage across the user's active packs (oldest expiry first)
+        Pack rows are locked and usage logs written in one transaction
+        """
+        pool = await get_pg_pool()
+        remaining_usage = data_used_mb
+        updated_packs = []
+        log_rows = []
+
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                packs = await conn.fetch(_LOCK_ACTIVE_USER_PACKS, user_id)
+                update_pack = await conn.prepare(_UPDATE_PACK_USAGE)
+
+                for pack in packs:
+                    if remaining_usage <= 0:
+                        break
+
+                    available_mb = pack['remaining_data_mb']
+                    if available_mb <= 0:
+                        continue
+
+                    usage_from_pack = min(remaining_usage, available_mb)
+                    new_used = pack['used_data_mb'] + usage_from_pack
+                    new_remaining = available_mb - usage_from_pack
+                    new_status = DataPackStatus.EXHAUSTED.value if new_remaining <= 0 else DataPackStatus.ACTIVE.value
+
+                    await update_pack.fetch(pack['id'], new_used, new_status)
+
+                    log_rows.append({
+                        'user_id': user_id,
+                        'data_pack_id': pack['id'],
+                        'data_used_mb': usage_from_pack,
+                        **(session_info or {})
+                    })
+                    updated_packs.append({
+                        'pack_id': str(pack['id']),
+                        'pack_name': pack['name'],
+                        'usage_mb': usage_from_pack,
+                        'new_used_mb': new_used,
+                        'new_remaining_mb': new_remaining,
+                        'status': new_status
+                    })
+
+                    remaining_usage -= usage_from_pack
+
+                await self._insert_usage_logs(conn, log_rows)
+
+        return {
+            'success': True,
+            'data_processed_mb': data_used_mb - remaining_usage,
+            'data_not_processed_mb': remaining_usage,
+            'updated_packs': updated_packs
+        }
+
+    async def insert_usage_logs(self, rows: Sequence[Dict[str, Any]]):
+        """Bulk insert usage_logs rows in one transaction"""
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await self._insert_usage_logs(conn, rows)
+
+    async def _insert_usage_logs(self, conn, rows: Sequence[Dict[str, Any]]):
+        """Insert rows grouped by column set, one prepared executemany per group"""
+        groups: Dict[tuple, List[tuple]] = {}
+        for row in rows:
+            unknown = set(row) - set(USAGE_LOG_COLUMNS)
+            if unknown:
+                raise ValueError(f"Unknown usage_logs columns: {', '.join(sorted(unknown))}")
+            columns = tuple(column for column in USAGE_LOG_COLUMNS if column in row)
+            groups.setdefault(columns, []).append(
+                tuple(_to_db_value(column, row[column]) for column in columns)
+            )
+
+        for columns, values in groups.items():
+            placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+            await conn.executemany(
+                f"INSERT INTO usage_logs ({', '.join(columns)}) VALUES ({placeholders})",
+                values
+            )
+
+
+_repository: Optional[PostgresRepository] = None
+
+
+def get_postgres_repository() -> PostgresRepository:
+    """Shared repository instance"""
+    global _repository
+    if _repository is None:
+        _repository = PostgresRepository()
+    return _repository
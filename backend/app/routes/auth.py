@@ -6,7 +6,9 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
-from ..core.database import get_supabase_client
+from ..core.database import get_supabase_client, run_db
+from ..core.cache import query_cache
+from ..core.known_users import known_users
 from ..services.notification_service import NotificationService
 
 router = APIRouter()
@@ -37,6 +39,9 @@ async def signup_webhook(user_data: dict):
         if not user_id:
             raise HTTPException(status_code=400, detail="Missing user_id")
         
+        # Create the users row up front so session/eSIM flows find the user known
+        await known_users.ensure_user(user_id, email=user_data.get('email'))
+        
         # Send welcome notification
         await notification_service.send_welcome_notification(user_id)
         
@@ -60,9 +65,10 @@ async def login_webhook(login_data: dict):
         # Update last login time
         from datetime import datetime
         supabase = get_supabase_client()
-        supabase.table('users').update({
+        await run_db(supabase.table('users').update({
             'last_login': datetime.utcnow().isoformat()
-        }).eq('id', user_id).execute()
+        }).eq('id', user_id).execute)
+        await query_cache.invalidate('users', select='*', id=user_id)
         
         return {"status": "success", "message": "Post-login actions completed"}
         
@@ -74,9 +80,12 @@ async def login_webhook(login_data: dict):
 async def get_user_profile(user_id: str):
     """Get user profile information"""
     try:
-        supabase = get_supabase_client()
-        response = supabase.table('users').select('*').eq('id', user_id).execute()
-        user = response.data[0] if response.data else None
+        async def _load_profile():
+            supabase = get_supabase_client()
+            response = await run_db(supabase.table('users').select('*').eq('id', user_id).execute)
+            return response.data[0] if response.data else None
+        
+        user = await query_cache.get_or_load('users', {'select': '*', 'id': user_id}, _load_profile)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -106,14 +115,19 @@ async def register_device(device_data: dict):
         }
         
         # Check if device already exists
-        existing_response = get_supabase_client().table('user_devices').select('id').eq('push_token', push_token).execute()
+        existing_response = await run_db(get_supabase_client().table('user_devices').select('id, user_id').eq('push_token', push_token).execute)
         
         if existing_response.data:
             # Update existing device
-            get_supabase_client().table('user_devices').update(device_record).eq('push_token', push_token).execute()
+            await run_db(get_supabase_client().table('user_devices').update(device_record).eq('push_token', push_token).execute)
         else:
             # Insert new device
-            get_supabase_client().table('user_devices').insert(device_record).execute()
+            await run_db(get_supabase_client().table('user_devices').insert(device_record).execute)
+        
+        # The token may have moved from another account
+        await notification_service.invalidate_device_cache(
+            device_record['user_id'], *(row['user_id'] for row in existing_response.data or [])
+        )
         
         return {"status": "success", "message": "Device registered successfully"}
         
@@ -131,7 +145,8 @@ async def unregister_device(device_data: dict):
             raise HTTPException(status_code=400, detail="Missing push_token")
         
         # Mark device as inactive
-        get_supabase_client().table('user_devices').update({'active': False}).eq('push_token', push_token).execute()
+        response = await run_db(get_supabase_client().table('user_devices').update({'active': False}).eq('push_token', push_token).execute)
+        await notification_service.invalidate_device_cache(*(row['user_id'] for row in response.data or []))
         
         return {"status": "success", "message": "Device unregistered successfully"}
         
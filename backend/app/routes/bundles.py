@@ -6,6 +6,9 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 
+from ..core.pagination import (
+    DEFAULT_PAGE_SIZE, InvalidCursorError, apply_keyset, clamp_page_size, split_page
+)
 from ..services.bundle_service import BundleService
 
 router = APIRouter()
@@ -106,36 +109,50 @@ async def get_user_bundle_summary(user_id: str):
 
 
 @router.get("/user/{user_id}/packs")
-async def get_user_packs(user_id: str, status: Optional[str] = None):
-    """Get user's data packs"""
+async def get_user_packs(
+    user_id: str,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
+    """Get user's data packs, newest first, one page at a time"""
     try:
-        from ..core.database import get_supabase_client
+        from ..core.database import get_supabase_client, run_db
+        page_size = clamp_page_size(limit)
         supabase = get_supabase_client()
         query = supabase.table('data_packs').select('*').eq('user_id', user_id)
         if status:
             query = query.eq('status', status)
-        response = query.execute()
-        packs = response.data if response.data else []
+        response = await run_db(apply_keyset(query, cursor, page_size).execute)
+        packs, next_cursor = split_page(response.data, page_size)
         return {
             "packs": packs,
-            "count": len(packs)
+            "count": len(packs),
+            "next_cursor": next_cursor
         }
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting user packs: {str(e)}")
 
 
 @router.get("/user/{user_id}/usage-history")
-async def get_usage_history(user_id: str, limit: int = 50):
-    """Get user's data usage history"""
+async def get_usage_history(user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get user's data usage history, newest first, one page at a time"""
     try:
-        from ..core.database import get_supabase_client
+        from ..core.database import get_supabase_client, run_db
+        page_size = clamp_page_size(limit)
         
-        response = get_supabase_client().table('usage_logs').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(limit).execute()
-        usage_history = response.data
+        query = get_supabase_client().table('usage_logs').select('*').eq('user_id', user_id)
+        response = await run_db(apply_keyset(query, cursor, page_size).execute)
+        usage_history, next_cursor = split_page(response.data, page_size)
         
         return {
             "usage_history": usage_history,
-            "count": len(usage_history)
+            "count": len(usage_history),
+            "next_cursor": next_cursor
         }
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting usage history: {str(e)}")
\ No newline at end of file
@@ -9,7 +9,9 @@ from typing import Dict, Any, Optional
 import logging
 
 from ..core.auth import get_current_user_id
-from ..core.database import get_supabase_client
+from ..core.database import get_supabase_client, run_db
+from ..core import projections
+from ..core.pagination import DEFAULT_PAGE_SIZE, InvalidCursorError
 from ..services.kswifi_connect_service import KSWiFiConnectService
 from datetime import datetime
 
@@ -85,17 +87,23 @@ async def update_session_usage(request: UpdateUsageRequest) -> Dict[str, Any]:
 
 @router.get("/my-profiles")
 async def get_my_connect_profiles(
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
     current_user_id: str = Depends(get_current_user_id)
 ) -> Dict[str, Any]:
-    """Get user's KSWiFi Connect profiles"""
+    """Get one page of the user's KSWiFi Connect profiles, newest first"""
     try:
-        profiles = await connect_service.get_user_profiles(current_user_id)
+        page = await connect_service.get_user_profiles(current_user_id, cursor=cursor, limit=limit)
+        profiles = page["profiles"]
         
         return {
             "profiles": profiles,
-            "count": len(profiles)
+            "count": len(profiles),
+            "next_cursor": page["next_cursor"]
         }
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ GET PROFILES ERROR: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -108,11 +116,11 @@ async def deactivate_connect_profile(
     """Deactivate a KSWiFi Connect profile"""
     try:
         # Get profile
-        response = get_supabase_client().table('kswifi_connect_profiles')\
-            .select('*')\
+        response = await run_db(get_supabase_client().table('kswifi_connect_profiles')\
+            .select(projections.CONNECT_PROFILE_KEY)\
             .eq('id', connect_id)\
             .eq('user_id', current_user_id)\
-            .execute()
+            .execute)
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Profile not found")
@@ -143,11 +151,11 @@ async def get_connect_profile_status(
 ) -> Dict[str, Any]:
     """Get real-time status of KSWiFi Connect profile"""
     try:
-        response = get_supabase_client().table('kswifi_connect_profiles')\
-            .select('*')\
+        response = await run_db(get_supabase_client().table('kswifi_connect_profiles')\
+            .select(projections.CONNECT_PROFILE_STATUS)\
             .eq('id', connect_id)\
             .eq('user_id', current_user_id)\
-            .execute()
+            .execute)
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Profile not found")
@@ -186,6 +194,8 @@ async def get_connect_profile_status(
 @router.get("/profiles/{user_id}")
 async def get_user_connect_profiles(
     user_id: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
     current_user_id: str = Depends(get_current_user_id)
 ) -> Dict[str, Any]:
     """Get KSWiFi Connect profiles for specified user (compatibility endpoint)"""
@@ -194,16 +204,20 @@ async def get_user_connect_profiles(
         if user_id != current_user_id:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        profiles = await connect_service.get_user_profiles(current_user_id)
+        page = await connect_service.get_user_profiles(current_user_id, cursor=cursor, limit=limit)
+        profiles = page["profiles"]
         
         return {
             "success": True,
             "connect_profiles": profiles,
-            "count": len(profiles)
+            "count": len(profiles),
+            "next_cursor": page["next_cursor"]
         }
         
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ GET USER PROFILES ERROR: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
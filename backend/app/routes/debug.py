@@ -7,7 +7,7 @@ from typing import Dict, Any
 
 from ..services.session_service import SessionService
 from ..services.esim_service import ESIMService
-from ..core.database import get_supabase_client
+from ..core.database import get_supabase_client, run_db
 
 router = APIRouter()
 session_service = SessionService()
@@ -67,28 +67,28 @@ async def test_database():
         
         # Test users table
         try:
-            response = supabase.table('users').select('id').limit(1).execute()
+            response = await run_db(supabase.table('users').select('id').limit(1).execute)
             tests['users_table'] = "accessible"
         except Exception as e:
             tests['users_table'] = f"error: {str(e)}"
         
         # Test esims table
         try:
-            response = supabase.table('esims').select('id').limit(1).execute()
+            response = await run_db(supabase.table('esims').select('id').limit(1).execute)
             tests['esims_table'] = "accessible"
         except Exception as e:
             tests['esims_table'] = f"error: {str(e)}"
         
         # Test internet_sessions table
         try:
-            response = supabase.table('internet_sessions').select('id').limit(1).execute()
+            response = await run_db(supabase.table('internet_sessions').select('id').limit(1).execute)
             tests['sessions_table'] = "accessible"
         except Exception as e:
             tests['sessions_table'] = f"error: {str(e)}"
         
         # Test data_packs table
         try:
-            response = supabase.table('data_packs').select('id').limit(1).execute()
+            response = await run_db(supabase.table('data_packs').select('id').limit(1).execute)
             tests['data_packs_table'] = "accessible"
         except Exception as e:
             tests['data_packs_table'] = f"error: {str(e)}"
@@ -12,7 +12,7 @@ from datetime import datetime, timedelta
 
 from ..services.esim_service import ESIMService
 from ..core.auth import get_current_user_id
-from ..core.database import get_supabase_client
+from ..core.database import get_supabase_client, run_db
 
 router = APIRouter()
 esim_service = ESIMService()
@@ -83,10 +83,10 @@ async def get_esim_usage(esim_id: str):
 async def get_esim_qr_code(esim_id: str):
     """Get QR code and setup information for an eSIM"""
     try:
-        from ..core.database import get_supabase_client
+        from ..core.database import get_supabase_client, run_db
         
         # Get eSIM details
-        esim_response = get_supabase_client().table('esims').select('id, user_id, iccid, status').eq('id', esim_id).execute()
+        esim_response = await run_db(get_supabase_client().table('esims').select('id, user_id, iccid, status').eq('id', esim_id).execute)
         if not esim_response.data:
             raise HTTPException(status_code=404, detail="eSIM not found")
         
@@ -132,11 +132,11 @@ async def generate_esim_qr_code(request: GenerateESIMRequest):
             supabase = get_supabase_client()
             
             # Get session record
-            session_response = supabase.table('internet_sessions')\
+            session_response = await run_db(supabase.table('internet_sessions')\
                 .select('*')\
                 .eq('id', request.session_id)\
                 .single()\
-                .execute()
+                .execute)
             
             if not session_response.data:
                 raise HTTPException(status_code=404, detail="Session not found")
@@ -151,11 +151,11 @@ async def generate_esim_qr_code(request: GenerateESIMRequest):
             if session.get('esim_id'):
                 print(f"🔍 GENERATE QR: eSIM already exists, returning existing QR code")
                 # Return existing eSIM QR code
-                esim_response = supabase.table('esims')\
+                esim_response = await run_db(supabase.table('esims')\
                     .select('*')\
                     .eq('id', session['esim_id'])\
                     .single()\
-                    .execute()
+                    .execute)
                 
                 if esim_response.data:
                     esim = esim_response.data
@@ -200,10 +200,10 @@ async def generate_esim_qr_code(request: GenerateESIMRequest):
         # Update session with eSIM ID if session_id provided
         if request.session_id:
             print(f"🔍 GENERATE QR: Linking eSIM to session {request.session_id}")
-            supabase.table('internet_sessions')\
+            await run_db(supabase.table('internet_sessions')\
                 .update({'esim_id': esim_result['esim_id']})\
                 .eq('id', request.session_id)\
-                .execute()
+                .execute)
         
         return {
             'success': True,
@@ -229,7 +229,7 @@ async def get_user_esims(user_id: str):
     """Get all eSIMs for a user"""
     try:
         supabase = get_supabase_client()
-        response = supabase.table('esims').select('id, iccid, status').eq('user_id', user_id).execute()
+        response = await run_db(supabase.table('esims').select('id, iccid, status').eq('user_id', user_id).execute)
         esims = response.data if response.data else []
         return {
             "esims": esims,
@@ -243,7 +243,7 @@ async def get_user_esims(user_id: str):
 async def update_esim_config(esim_id: str, config: ESIMConfigRequest):
     """Update eSIM configuration"""
     try:
-        from ..core.database import get_supabase_client
+        from ..core.database import get_supabase_client, run_db
         
         update_data = {}
         if config.apn:
@@ -254,7 +254,7 @@ async def update_esim_config(esim_id: str, config: ESIMConfigRequest):
             update_data['password'] = config.password
         
         if update_data:
-            get_supabase_client().table('esims').update(update_data).eq('id', esim_id).execute()
+            await run_db(get_supabase_client().table('esims').update(update_data).eq('id', esim_id).execute)
         
         return {"status": "success", "message": "eSIM configuration updated"}
     except Exception as e:
@@ -265,10 +265,10 @@ async def update_esim_config(esim_id: str, config: ESIMConfigRequest):
 async def get_esim_status(esim_id: str):
     """Get detailed status of an eSIM"""
     try:
-        from ..core.database import get_supabase_client
+        from ..core.database import get_supabase_client, run_db
         
         # Get eSIM details
-        esim_response = get_supabase_client().table('esims').select('id, user_id, iccid, status').eq('id', esim_id).execute()
+        esim_response = await run_db(get_supabase_client().table('esims').select('id, user_id, iccid, status').eq('id', esim_id).execute)
         if not esim_response.data:
             raise HTTPException(status_code=404, detail="eSIM not found")
         
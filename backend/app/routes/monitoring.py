@@ -5,6 +5,7 @@ Monitoring and background task routes
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
+from ..core import projections
 from ..services.monitoring_service import MonitoringService
 
 router = APIRouter()
@@ -65,17 +66,15 @@ async def manual_user_sync(request: ManualDataSyncRequest):
 async def manual_usage_check():
     """Manually trigger usage check for all active packs"""
     try:
-        from ..core.database import get_supabase_client
+        from ..core.database import get_supabase_client, run_db
         from ..models.enums import DataPackStatus
         
         # Get all active packs
-        response = get_supabase_client().table('data_packs').select('*').eq('status', DataPackStatus.ACTIVE.value).execute()
+        response = await run_db(get_supabase_client().table('data_packs').select(projections.PACK_USAGE_CHECK).eq('status', DataPackStatus.ACTIVE.value).execute)
         active_packs = response.data
         
-        checked_count = 0
-        for pack in active_packs:
-            await monitoring_service._check_pack_usage(pack)
-            checked_count += 1
+        await monitoring_service.check_packs(active_packs)
+        checked_count = len(active_packs)
         
         return {
             "status": "success", 
@@ -89,21 +88,13 @@ async def manual_usage_check():
 async def manual_cleanup_expired():
     """Manually trigger cleanup of expired packs"""
     try:
-        from ..core.database import get_supabase_client
-        from ..models.enums import DataPackStatus
-        from datetime import datetime
-        
-        # Find expired packs
-        current_time = datetime.utcnow().isoformat()
-        response = get_supabase_client().table('data_packs').select('*').eq('status', DataPackStatus.ACTIVE.value).lt('expires_at', current_time).execute()
-        expired_packs = response.data
-        
-        for pack in expired_packs:
-            await monitoring_service._expire_data_pack(pack['id'])
+        # Expire all overdue packs in a single set-based update
+        expired_packs = await monitoring_service.expire_overdue_packs()
         
         return {
             "status": "success",
-            "message": f"Cleaned up {len(expired_packs)} expired packs"
+            "message": f"Cleaned up {len(expired_packs)} expired packs",
+            "expired_pack_ids": [pack['id'] for pack in expired_packs]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in cleanup: {str(e)}")
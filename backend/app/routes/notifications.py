@@ -6,6 +6,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 
+from ..core.pagination import DEFAULT_PAGE_SIZE, InvalidCursorError
 from ..services.notification_service import NotificationService
 
 router = APIRouter()
@@ -20,17 +21,21 @@ class MarkReadRequest(BaseModel):
 @router.get("/user/{user_id}")
 async def get_user_notifications(
     user_id: str, 
-    limit: int = 50, 
-    unread_only: bool = False
+    limit: int = DEFAULT_PAGE_SIZE, 
+    unread_only: bool = False,
+    cursor: Optional[str] = None
 ):
-    """Get notifications for a user"""
+    """Get notifications for a user, newest first, one page at a time"""
     try:
         result = await notification_service.get_user_notifications(
             user_id=user_id,
             limit=limit,
-            unread_only=unread_only
+            unread_only=unread_only,
+            cursor=cursor
         )
         return result
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting notifications: {str(e)}")
 
@@ -70,9 +75,9 @@ async def mark_all_notifications_read(user_id: str):
 async def get_unread_count(user_id: str):
     """Get unread notification count for a user"""
     try:
-        from ..core.database import get_supabase_client
+        from ..core.database import get_supabase_client, run_db
         
-        response = get_supabase_client().table('notifications').select('id', count='exact').eq('user_id', user_id).eq('read', False).execute()
+        response = await run_db(get_supabase_client().table('notifications').select('id', count='exact').eq('user_id', user_id).eq('read', False).execute)
         unread_count = response.count
         
         return {"unread_count": unread_count}
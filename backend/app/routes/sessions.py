@@ -7,6 +7,9 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
 from ..core.auth import verify_jwt_token
+from ..core.singleflight import query_flight
+from ..core import projections
+from ..core.pagination import DEFAULT_PAGE_SIZE, InvalidCursorError
 from ..services.session_service import SessionService
 
 
@@ -61,6 +64,13 @@ class UserSession(BaseModel):
     data_remaining_mb: int
 
 
+# One page of user sessions
+class UserSessionPage(BaseModel):
+    sessions: List[UserSession]
+    count: int
+    next_cursor: Optional[str] = None
+
+
 @router.get("/sessions/available", response_model=List[SessionInfo])
 async def get_available_sessions(wifi_network: Optional[str] = None, user_id: Optional[str] = None):
     """Get all available internet session options from connected WiFi network"""
@@ -124,15 +134,29 @@ async def activate_session(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/sessions/my-sessions", response_model=List[UserSession])
-async def get_my_sessions(user_data: dict = Depends(verify_jwt_token)):
-    """Get all sessions for the current user"""
+@router.get("/sessions/my-sessions", response_model=UserSessionPage)
+async def get_my_sessions(
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    user_data: dict = Depends(verify_jwt_token)
+):
+    """
+    Get one page of sessions for the current user, newest first
+    """
     try:
         user_id = user_data["sub"]
         print(f"🔍 MY SESSIONS ROUTE: JWT user_id = {user_id}")
         print(f"🔍 MY SESSIONS ROUTE: Full user_data = {user_data}")
-        sessions = await session_service.get_user_sessions(user_id)
-        return sessions
+        page = await session_service.get_user_sessions(user_id, cursor=cursor, limit=limit)
+        sessions = page["sessions"]
+        
+        return {
+            "sessions": sessions,
+            "count": len(sessions),
+            "next_cursor": page["next_cursor"]
+        }
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -168,15 +192,18 @@ async def get_session_status(
     try:
         user_id = user_data["sub"]
         
-        # Get session from database
-        from ..core.database import get_supabase_client
+        # Get session from database - concurrent polls share one query
+        from ..core.database import get_supabase_client, run_db
         
-        response = get_supabase_client().table('internet_sessions')\
-            .select('*')\
-            .eq('id', session_id)\
-            .eq('user_id', user_id)\
-            .single()\
-            .execute()
+        response = await query_flight.do(
+            f"internet_sessions:{session_id}:{user_id}",
+            lambda: run_db(get_supabase_client().table('internet_sessions')\
+                .select(projections.SESSION_STATUS)\
+                .eq('id', session_id)\
+                .eq('user_id', user_id)\
+                .single()\
+                .execute)
+        )
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -212,13 +239,13 @@ async def get_unlimited_access_status(user_data: dict = Depends(verify_jwt_token
         user_id = user_data.get('user_id') or user_data.get('sub')
         
         # Get user's total data usage for informational purposes only
-        from ..core.database import get_supabase_client
+        from ..core.database import get_supabase_client, run_db
         
         # Get total data from all sessions (for statistics only)
-        sessions_response = get_supabase_client().table('internet_sessions')\
+        sessions_response = await run_db(get_supabase_client().table('internet_sessions')\
             .select('data_mb')\
             .eq('user_id', user_id)\
-            .execute()
+            .execute)
         
         total_used_mb = sum(session.get('data_mb', 0) for session in sessions_response.data)
         
@@ -9,7 +9,9 @@ from typing import Optional, Dict, Any
 
 from ..services.wifi_captive_service import WiFiCaptiveService
 from ..core.auth import get_current_user_id
-from ..core.database import get_supabase_client
+from ..core.database import get_supabase_client, run_db
+from ..core import projections
+from ..core.pagination import DEFAULT_PAGE_SIZE, InvalidCursorError
 
 router = APIRouter()
 wifi_service = WiFiCaptiveService()
@@ -41,11 +43,11 @@ async def generate_wifi_qr(
         print(f"🔍 WIFI QR REQUEST: user_id={user_id}, session_id={request.session_id}, data_limit={request.data_limit_mb}")
         
         # Verify session exists and belongs to user
-        session_response = get_supabase_client().table('internet_sessions')\
-            .select('*')\
+        session_response = await run_db(get_supabase_client().table('internet_sessions')\
+            .select(projections.SESSION_OWNERSHIP)\
             .eq('id', request.session_id)\
             .eq('user_id', user_id)\
-            .execute()
+            .execute)
         
         if not session_response.data:
             raise HTTPException(status_code=404, detail="Session not found or access denied")
@@ -109,16 +111,12 @@ async def validate_wifi_connection(request: WiFiConnectionRequest):
 async def get_wifi_session_info(network_name: str):
     """Get WiFi session information by network name"""
     try:
-        response = get_supabase_client().table('wifi_access_tokens')\
-            .select('*')\
-            .eq('network_name', network_name)\
-            .eq('status', 'active')\
-            .execute()
+        tokens = await wifi_service.get_active_tokens_by_network(network_name)
         
-        if not response.data:
+        if not tokens:
             raise HTTPException(status_code=404, detail="WiFi session not found")
         
-        session_data = response.data[0]
+        session_data = tokens[0]
         
         return {
             "success": True,
@@ -161,16 +159,19 @@ async def track_wifi_usage(request: TrackUsageRequest):
 
 
 @router.get("/user-sessions/{user_id}")
-async def get_user_wifi_sessions(user_id: str):
-    """Get all WiFi sessions for a user"""
+async def get_user_wifi_sessions(user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get one page of WiFi sessions for a user, newest first"""
     try:
-        sessions = await wifi_service.get_user_sessions(user_id)
+        page = await wifi_service.get_user_wifi_tokens(user_id, cursor=cursor, limit=limit)
         
         return {
             "success": True,
-            "data": sessions
+            "data": page["tokens"],
+            "next_cursor": page["next_cursor"]
         }
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"❌ USER SESSIONS ERROR: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -184,20 +185,20 @@ async def delete_wifi_session(
     """Delete/revoke a WiFi session"""
     try:
         # Verify ownership
-        response = get_supabase_client().table('wifi_access_tokens')\
-            .select('*')\
+        response = await run_db(get_supabase_client().table('wifi_access_tokens')\
+            .select(projections.WIFI_TOKEN_REVOKE)\
             .eq('id', token_id)\
             .eq('user_id', user_id)\
-            .execute()
+            .execute)
         
         if not response.data:
             raise HTTPException(status_code=404, detail="WiFi session not found")
         
         # Revoke the session
-        get_supabase_client().table('wifi_access_tokens')\
+        await run_db(get_supabase_client().table('wifi_access_tokens')\
             .update({'status': 'revoked'})\
             .eq('id', token_id)\
-            .execute()
+            .execute)
         
         return {
             "success": True,
@@ -221,11 +222,11 @@ async def generate_qr_for_session(
         print(f"🔍 GENERATE QR FOR SESSION: user_id={user_id}, session_id={session_id}")
         
         # Get session details
-        session_response = get_supabase_client().table('internet_sessions')\
-            .select('*')\
+        session_response = await run_db(get_supabase_client().table('internet_sessions')\
+            .select(projections.SESSION_OWNERSHIP)\
             .eq('id', session_id)\
             .eq('user_id', user_id)\
-            .execute()
+            .execute)
         
         if not session_response.data:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -0,0 +1,88 @@
+"""
+Per-pack alert state
+One small bit field per data pack records which alert conditions have already been
+notified; it lives in memory and is persisted to the data_packs alert columns
+(alert_low_data_sent / alert_75_sent / alert_90_sent)
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import structlog
+
+from ..core.database import get_async_supabase_client
+from ..core.postgres import postgres_enabled
+from ..repositories import get_postgres_repository
+from .threshold_engine import ALERT_COLUMNS, alert_columns
+
+logger = structlog.get_logger(__name__)
+
+# Ids per PostgREST in_() filter, keeps request URLs short
+PERSIST_CHUNK_SIZE = 200
+
+
+class AlertStateStore:
+    """
+    Alert bit flags per pack
+    Stored flags always equal the conditions currently true *and* notified, so a bit
+    clears when its condition does (e.g. after a top-up) and a re-crossing alerts again
+    """
+
+    def __init__(self):
+        self._flags: Dict[Any, int] = {}
+
+    def current_flags(self, pack_ids: Sequence[Any], durable_flags: Sequence[Any]) -> np.ndarray:
+        """In-memory flags where known, otherwise the flags read from the alert columns"""
+        return np.fromiter(
+            (self._flags.get(pack_id, durable or 0) for pack_id, durable in zip(pack_ids, durable_flags)),
+            dtype=np.int16,
+            count=len(pack_ids)
+        )
+
+    async def record(self, pack_ids: Sequence[Any], flags: np.ndarray, changed: np.ndarray):
+        """Remember new flags and persist the packs whose flags changed"""
+        updates: Dict[int, List[Any]] = defaultdict(list)
+        for i in np.flatnonzero(changed):
+            pack_id = pack_ids[i]
+            value = int(flags[i])
+            self._flags[pack_id] = value
+            updates[value].append(pack_id)
+
+        if updates:
+            try:
+                await self._persist(updates)
+            except Exception as e:
+                # Memory still suppresses duplicates; the next change retries the write
+                logger.error(f"Failed to persist alert flags: {e}")
+
+    def forget(self, pack_id: Any):
+        """Drop state for a pack that left the active set"""
+        self._flags.pop(pack_id, None)
+
+    def clear(self):
+        """Drop all in-memory state (shard reassignment) - persisted flags take over"""
+        self._flags.clear()
+
+    async def _persist(self, updates: Dict[int, List[Any]]):
+        """One update per distinct persisted flag value (per chunk of ids)"""
+        persisted_mask = sum(ALERT_COLUMNS)
+        merged: Dict[int, List[Any]] = defaultdict(list)
+        for value, pack_ids in updates.items():
+            merged[value & persisted_mask].extend(pack_ids)
+        updates = merged
+
+        if postgres_enabled():
+            await get_postgres_repository().set_alert_flags(
+                [(pack_id, value) for value, pack_ids in updates.items() for pack_id in pack_ids]
+            )
+            return
+
+        supabase = await get_async_supabase_client()
+        for value, pack_ids in updates.items():
+            for start in range(0, len(pack_ids), PERSIST_CHUNK_SIZE):
+                chunk = pack_ids[start:start + PERSIST_CHUNK_SIZE]
+                await supabase.table('data_packs').update(alert_columns(value)).in_('id', chunk).execute()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"tracked_packs": len(self._flags)}
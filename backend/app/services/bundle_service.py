@@ -7,7 +7,11 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 
 from ..core.config import settings
-from ..core.database import get_supabase_client
+from ..core.database import get_async_supabase_client
+from ..core.batch_writer import usage_log_writer
+from ..core.postgres import postgres_enabled
+from ..core import projections
+from ..repositories import get_postgres_repository
 from ..models.enums import DataPackStatus
 
 
@@ -126,7 +130,8 @@ class BundleService:
                 'expires_at': expires_at.isoformat()
             }
             
-            response = get_supabase_client().table('data_packs').insert(pack_data).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('data_packs').insert(pack_data).execute()
             pack_record = response.data[0] if response.data else None
             
             return {
@@ -150,8 +155,8 @@ class BundleService:
         """Calculate cost of data usage across user's active packs"""
         try:
             # Get user's active data packs
-            supabase = get_supabase_client()
-            response = supabase.table('data_packs').select('*').eq('user_id', user_id).eq('status', DataPackStatus.ACTIVE.value).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('data_packs').select(projections.PACK_USAGE_COST).eq('user_id', user_id).eq('status', DataPackStatus.ACTIVE.value).execute()
             packs = response.data if response.data else []
             
             if not packs:
@@ -209,9 +214,13 @@ class BundleService:
     async def update_pack_usage(self, user_id: str, data_used_mb: float, session_info: Dict = None) -> Dict[str, Any]:
         """Update data pack usage and return updated status"""
         try:
+            if postgres_enabled():
+                # Row locks, pack updates and usage logs in one transaction
+                return await get_postgres_repository().apply_pack_usage(user_id, data_used_mb, session_info)
+            
             # Get active packs sorted by expiry date
-            supabase = get_supabase_client()
-            response = supabase.table('data_packs').select('*').eq('user_id', user_id).eq('status', DataPackStatus.ACTIVE.value).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('data_packs').select(projections.PACK_USAGE_UPDATE).eq('user_id', user_id).eq('status', DataPackStatus.ACTIVE.value).execute()
             packs = response.data if response.data else []
             packs.sort(key=lambda x: x['expires_at'])
             
@@ -240,7 +249,7 @@ class BundleService:
                     # remaining_data_mb is GENERATED - don't update it
                     'status': new_status
                 }
-                supabase.table('data_packs').update(update_data).eq('id', pack['id']).execute()
+                await supabase.table('data_packs').update(update_data).eq('id', pack['id']).execute()
                 
                 # Log the usage
                 log_data = {
@@ -249,7 +258,7 @@ class BundleService:
                     'data_used_mb': usage_from_pack,
                     **(session_info or {})
                 }
-                supabase.table('usage_logs').insert(log_data).execute()
+                await usage_log_writer.add(log_data)
                 
                 updated_packs.append({
                     'pack_id': pack['id'],
@@ -276,8 +285,8 @@ class BundleService:
         """Get comprehensive bundle summary for user"""
         try:
             # Get all user's data packs
-            supabase = get_supabase_client()
-            response = supabase.table('data_packs').select('*').eq('user_id', user_id).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('data_packs').select(projections.PACK_SUMMARY).eq('user_id', user_id).execute()
             all_packs = response.data if response.data else []
             
             summary = {
@@ -308,7 +317,8 @@ class BundleService:
         """Activate a purchased data pack for use"""
         try:
             # Verify pack belongs to user
-            pack_response = get_supabase_client().table('data_packs').select('*').eq('id', pack_id).eq('user_id', user_id).execute()
+            supabase = await get_async_supabase_client()
+            pack_response = await supabase.table('data_packs').select(projections.PACK_ACTIVATION).eq('id', pack_id).eq('user_id', user_id).execute()
             if not pack_response.data:
                 raise Exception("Data pack not found or doesn't belong to user")
             
@@ -325,9 +335,9 @@ class BundleService:
             
             try:
                 if esim_id:
-                    result = get_supabase_client().rpc('activate_data_pack', {'pack_id': pack_id, 'esim_id': esim_id}).execute()
+                    result = await supabase.rpc('activate_data_pack', {'pack_id': pack_id, 'esim_id': esim_id}).execute()
                 else:
-                    result = get_supabase_client().rpc('activate_data_pack', {'pack_id': pack_id}).execute()
+                    result = await supabase.rpc('activate_data_pack', {'pack_id': pack_id}).execute()
                 
                 print(f"🔍 ACTIVATION DEBUG: RPC result: {result}")
                 
@@ -351,12 +361,13 @@ class BundleService:
         """Deactivate a data pack"""
         try:
             # Verify pack belongs to user
-            pack_response = get_supabase_client().table('data_packs').select('*').eq('id', pack_id).eq('user_id', user_id).execute()
+            supabase = await get_async_supabase_client()
+            pack_response = await supabase.table('data_packs').select(projections.PACK_OWNERSHIP).eq('id', pack_id).eq('user_id', user_id).execute()
             if not pack_response.data:
                 raise Exception("Data pack not found or doesn't belong to user")
             
             # Use database function to deactivate pack
-            get_supabase_client().rpc('deactivate_data_pack', {'pack_id': pack_id}).execute()
+            await supabase.rpc('deactivate_data_pack', {'pack_id': pack_id}).execute()
             
             return {
                 'success': True,
@@ -372,7 +383,8 @@ class BundleService:
         try:
             # Get purchased but inactive packs that haven't expired
             current_time = datetime.utcnow().isoformat()
-            response = get_supabase_client().table('data_packs').select('*').eq('user_id', user_id).eq('is_active', False).gt('expires_at', current_time).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('data_packs').select(projections.PACK_ACTIVATABLE).eq('user_id', user_id).eq('is_active', False).gt('expires_at', current_time).execute()
             
             activatable_packs = []
             for pack in response.data:
@@ -396,7 +408,8 @@ class BundleService:
     async def get_active_pack(self, user_id: str) -> Dict[str, Any]:
         """Get currently active data pack for user"""
         try:
-            response = get_supabase_client().table('data_packs').select('*').eq('user_id', user_id).eq('is_active', True).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('data_packs').select(projections.PACK_ACTIVE).eq('user_id', user_id).eq('is_active', True).execute()
             
             if not response.data:
                 return None
@@ -0,0 +1,206 @@
+"""
+Burn-rate forecasting for adaptive monitoring cadence
+Each pack's consumption rate is an exponentially decayed sum of its usage_logs
+deltas; the projected time to its next threshold decides how soon its owner's
+eSIM usage is polled again - near-exhausted packs often, idle ones rarely
+"""
+
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.database import get_async_supabase_client
+from ..core import projections
+from .threshold_engine import PackColumns
+
+
+def _epoch(value: str) -> float:
+    stamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.timestamp()
+
+
+class BurnRateForecaster:
+    """
+    Per-pack decayed usage S (MB) with time constant tau: S <- S * exp(-dt / tau) + delta,
+    so S / tau approximates MB per second over roughly the last tau seconds
+    usage_logs rows are buffered and can commit after newer ones, so each refresh re-reads
+    an overlap window behind the high-water mark and skips log ids already counted
+    """
+
+    def __init__(
+        self,
+        window_minutes: float,
+        min_interval_seconds: float,
+        max_interval_minutes: float,
+        safety: float,
+        low_data_threshold_mb: float,
+        overlap_seconds: float = 300.0,
+        batch_size: int = 5000
+    ):
+        self.tau = window_minutes * 60
+        self.min_interval = min_interval_seconds
+        self.max_interval = max_interval_minutes * 60
+        self.safety = safety
+        self.low_data_threshold = low_data_threshold_mb
+        self.overlap = overlap_seconds
+        self.batch_size = batch_size
+        self._decayed: Dict[Any, Tuple[float, float]] = {}  # pack_id -> (S, last log epoch)
+        self._log_high_water: Optional[float] = None  # newest created_at ingested (epoch)
+        self._counted: Dict[Any, float] = {}  # log id -> created_at epoch, for the overlap window
+        self._pack_intervals: Dict[Any, Tuple[Any, float]] = {}  # pack_id -> (user_id, seconds)
+        self._user_packs: Dict[Any, Dict[Any, float]] = defaultdict(dict)
+        self._last_polled: Dict[Any, float] = {}
+        self._stats = {"logs_ingested": 0, "polls_due": 0, "polls_skipped": 0}
+
+    def ingest(self, logs: Iterable[Dict[str, Any]]):
+        """Fold usage_logs rows (id, data_pack_id, data_used_mb, created_at) into the rates"""
+        for log in logs:
+            pack_id = log.get('data_pack_id')
+            delta = log.get('data_used_mb') or 0
+            if pack_id is None or delta <= 0 or not log.get('created_at'):
+                continue
+            log_id = log.get('id')
+            if log_id is not None and log_id in self._counted:
+                continue
+
+            stamp = _epoch(log['created_at'])
+            decayed, last = self._decayed.get(pack_id, (0.0, stamp))
+            if stamp >= last:
+                decayed = decayed * math.exp(-(stamp - last) / self.tau) + delta
+            else:
+                # Late row: decay its delta to the newest time already folded in
+                decayed += delta * math.exp(-(last - stamp) / self.tau)
+            self._decayed[pack_id] = (decayed, max(stamp, last))
+
+            if log_id is not None:
+                self._counted[log_id] = stamp
+            if self._log_high_water is None or stamp > self._log_high_water:
+                self._log_high_water = stamp
+            self._stats["logs_ingested"] += 1
+
+    def reset(self):
+        """Forget usage history (shard reassignment) - the next refresh re-reads the last window"""
+        self._decayed.clear()
+        self._counted.clear()
+        self._log_high_water = None
+
+    async def refresh_rates(self, query_filter: Optional[Callable[[Any], Any]] = None):
+        """
+        Read usage_logs from the overlap window behind the high-water mark onwards
+        (first call: the last decay window only); query_filter narrows the read, e.g.
+        to this process's shard buckets
+        """
+        if self._log_high_water is None:
+            since = time.time() - self.tau
+        else:
+            since = self._log_high_water - self.overlap
+            self._counted = {log_id: stamp for log_id, stamp in self._counted.items() if stamp >= since}
+
+        supabase = await get_async_supabase_client()
+        after: Optional[str] = None
+        while True:
+            query = supabase.table('usage_logs').select(projections.USAGE_LOG_BURN_RATE)
+            if query_filter is not None:
+                query = query_filter(query)
+            if after is None:
+                query = query.gte('created_at', datetime.fromtimestamp(since, timezone.utc).isoformat())
+            else:
+                query = query.gt('created_at', after)
+            response = await query.order('created_at').limit(self.batch_size).execute()
+            logs = response.data or []
+
+            self.ingest(logs)
+            if len(logs) < self.batch_size:
+                break
+            # Rows sharing the page's last timestamp are re-read by the next refresh's overlap
+            after = logs[-1]['created_at']
+
+    def rates(self, pack_ids: List[Any], now: float) -> np.ndarray:
+        """Current MB/s estimate per pack (0 for packs without recent usage)"""
+        state = [self._decayed.get(pack_id, (0.0, now)) for pack_id in pack_ids]
+        decayed = np.fromiter((s for s, _ in state), dtype=np.float64, count=len(state))
+        last = np.fromiter((t for _, t in state), dtype=np.float64, count=len(state))
+        return decayed * np.exp(-np.maximum(0.0, now - last) / self.tau) / self.tau
+
+    def check_intervals(self, columns: PackColumns, now: Optional[float] = None) -> np.ndarray:
+        """
+        Seconds until each pack should be checked again: safety x projected time to its
+        next uncrossed threshold (75%, 90%, low data, exhausted), clamped to [min, max]
+        """
+        now = time.time() if now is None else now
+        rate = self.rates(columns.ids, now)
+
+        thresholds = np.stack([
+            columns.data_mb * 0.75,
+            columns.data_mb * 0.90,
+            columns.data_mb - self.low_data_threshold,
+            columns.data_mb
+        ])
+        ahead = thresholds - columns.used_mb
+        distance = np.where(ahead > 0, ahead, np.inf).min(axis=0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            seconds = np.where(rate > 0, distance / rate, np.inf) * self.safety
+        return np.clip(np.nan_to_num(seconds, nan=self.max_interval, posinf=self.max_interval),
+                       self.min_interval, self.max_interval)
+
+    def update(self, columns: PackColumns, intervals: np.ndarray, full: bool = False):
+        """Record check intervals from a scan; a full scan also drops packs no longer active"""
+        if full:
+            self._pack_intervals.clear()
+            self._user_packs.clear()
+            active = set(columns.ids)
+            self._decayed = {pack_id: state for pack_id, state in self._decayed.items() if pack_id in active}
+
+        for pack_id, user_id, interval in zip(columns.ids, columns.user_ids, intervals):
+            previous = self._pack_intervals.get(pack_id)
+            if previous is not None and previous[0] != user_id:
+                self._user_packs[previous[0]].pop(pack_id, None)
+            self._pack_intervals[pack_id] = (user_id, float(interval))
+            self._user_packs[user_id][pack_id] = float(interval)
+
+    def forget(self, pack_id: Any):
+        previous = self._pack_intervals.pop(pack_id, None)
+        if previous is not None:
+            self._user_packs[previous[0]].pop(pack_id, None)
+        self._decayed.pop(pack_id, None)
+
+    def user_interval(self, user_id: Any) -> float:
+        packs = self._user_packs.get(user_id)
+        return min(packs.values()) if packs else self.max_interval
+
+    def due_users(self, user_ids: Iterable[Any], now: Optional[float] = None) -> List[Any]:
+        """Users whose provider usage should be polled now"""
+        now = time.time() if now is None else now
+        due = []
+        for user_id in user_ids:
+            last = self._last_polled.get(user_id)
+            if last is None or now - last >= self.user_interval(user_id):
+                due.append(user_id)
+            else:
+                self._stats["polls_skipped"] += 1
+        self._stats["polls_due"] += len(due)
+        return due
+
+    def mark_polled(self, user_id: Any, now: Optional[float] = None):
+        self._last_polled[user_id] = time.time() if now is None else now
+
+    def next_scan_delay(self, default_seconds: float) -> float:
+        """Delay before the next threshold scan: the tightest pack interval, capped at the default"""
+        tightest = min((interval for _, interval in self._pack_intervals.values()), default=default_seconds)
+        return max(self.min_interval, min(default_seconds, tightest))
+
+    def get_stats(self) -> Dict[str, Any]:
+        intervals = [interval for _, interval in self._pack_intervals.values()]
+        return {
+            "tracked_packs": len(intervals),
+            "packs_with_usage": len(self._decayed),
+            "median_interval_seconds": float(np.median(intervals)) if intervals else None,
+            **self._stats
+        }
@@ -9,7 +9,8 @@ from typing import Dict, Optional, Any
 from datetime import datetime, timedelta
 
 from ..core.config import settings
-from ..core.database import get_supabase_client
+from ..core.database import get_async_supabase_client
+from ..core.known_users import known_users
 from ..models.enums import ESIMStatus
 
 
@@ -75,35 +76,12 @@ class ESIMService:
             
             print(f"🔍 ESIM DEBUG: Storing eSIM in database...")
             
-            supabase = get_supabase_client()
+            supabase = await get_async_supabase_client()
             print(f"🔍 ESIM DEBUG: Supabase client obtained")
             
             # Ensure user exists in database (create if needed)
             try:
-                print(f"🔍 ESIM DEBUG: Checking if user exists: {user_id}")
-                # Check if user exists
-                user_response = supabase.table('users').select('id').eq('id', user_id).execute()
-                if not user_response.data:
-                    print(f"🔍 ESIM DEBUG: User not found, creating user record...")
-                    # Create basic user record
-                    user_data = {
-                        'id': user_id,
-                        'email': f"user_{user_id[:8]}@kswifi.app",
-                        'first_name': 'KSWiFi',
-                        'last_name': 'User',
-                        'created_at': datetime.utcnow().isoformat(),
-                        'updated_at': datetime.utcnow().isoformat()
-                    }
-                    user_create_response = supabase.table('users').insert(user_data).execute()
-                    print(f"🔍 ESIM DEBUG: User create response: {user_create_response}")
-                    
-                    if user_create_response.data:
-                        print(f"🔍 ESIM DEBUG: User created successfully: {user_create_response.data[0]['id']}")
-                    else:
-                        print(f"❌ ESIM ERROR: Failed to create user - no data returned")
-                        raise Exception("Failed to create user record")
-                else:
-                    print(f"🔍 ESIM DEBUG: User exists: {user_response.data[0]['id']}")
+                await known_users.ensure_user(user_id)
             except Exception as user_error:
                 print(f"❌ ESIM ERROR: User creation/verification failed: {user_error}")
                 print(f"❌ ESIM ERROR: User error type: {type(user_error).__name__}")
@@ -128,7 +106,7 @@ class ESIMService:
             }
             print(f"🔍 ESIM DEBUG: eSIM data prepared: {list(esim_data.keys())}")
             
-            response = supabase.table('esims').insert(esim_data).execute()
+            response = await supabase.table('esims').insert(esim_data).execute()
             print(f"🔍 ESIM DEBUG: eSIM insert response: {response}")
             
             esim_record = response.data[0] if response.data else None
@@ -155,7 +133,7 @@ class ESIMService:
             }
             print(f"🔍 ESIM DEBUG: Data pack data prepared")
             
-            pack_response = supabase.table('data_packs').insert(data_pack_data).execute()
+            pack_response = await supabase.table('data_packs').insert(data_pack_data).execute()
             print(f"🔍 ESIM DEBUG: Data pack insert response: {pack_response}")
             
             data_pack_record = pack_response.data[0] if pack_response.data else None
@@ -214,7 +192,8 @@ class ESIMService:
         """Activate an eSIM (inbuilt or external provider)"""
         try:
             # Get eSIM details from database
-            esim_response = get_supabase_client().table('esims').select('*').eq('id', esim_id).execute()
+            supabase = await get_async_supabase_client()
+            esim_response = await supabase.table('esims').select('*').eq('id', esim_id).execute()
             if not esim_response.data:
                 raise Exception("eSIM not found")
             
@@ -222,7 +201,7 @@ class ESIMService:
             
             # KSWiFi inbuilt eSIMs - update status in database
             # Update eSIM status in database
-            get_supabase_client().table('esims').update({
+            await supabase.table('esims').update({
                 'status': ESIMStatus.ACTIVE.value
             }).eq('id', esim_id).execute()
             
@@ -255,15 +234,15 @@ class ESIMService:
         """Suspend an eSIM with the provider"""
         try:
             # Get eSIM details
-            esim_response = get_supabase_client().table('esims').select('id, user_id, iccid, imsi, status').eq('id', esim_id).execute()
+            supabase = await get_async_supabase_client()
+            esim_response = await supabase.table('esims').select('id, user_id, iccid, imsi, status').eq('id', esim_id).execute()
             if not esim_response.data:
                 raise Exception("eSIM not found")
             
             esim = esim_response.data[0]
             
             # KSWiFi inbuilt eSIM - update status in database
-            supabase = get_supabase_client()
-            supabase.table('esims').update({
+            await supabase.table('esims').update({
                 'status': ESIMStatus.SUSPENDED.value
             }).eq('id', esim_id).execute()
             
@@ -280,7 +259,8 @@ class ESIMService:
         """Get current data usage from eSIM (inbuilt or external provider)"""
         try:
             # Get eSIM details
-            esim_response = get_supabase_client().table('esims').select('id, user_id, iccid, status').eq('id', esim_id).execute()
+            supabase = await get_async_supabase_client()
+            esim_response = await supabase.table('esims').select('id, user_id, iccid, status').eq('id', esim_id).execute()
             if not esim_response.data:
                 raise Exception("eSIM not found")
             
@@ -288,7 +268,7 @@ class ESIMService:
             
             # KSWiFi inbuilt eSIMs - get usage from our database/monitoring
             # Check for session usage records
-            usage_response = get_supabase_client().table('data_usage')\
+            usage_response = await supabase.table('data_usage')\
                 .select('*')\
                 .eq('esim_id', esim_id)\
                 .order('created_at', desc=True)\
@@ -305,7 +285,7 @@ class ESIMService:
             
             # Get bundle size from associated data pack
             try:
-                pack_response = get_supabase_client().table('data_packs')\
+                pack_response = await supabase.table('data_packs')\
                     .select('total_data_mb, used_data_mb, remaining_data_mb')\
                     .eq('user_id', esim['user_id'])\
                     .eq('status', 'active')\
@@ -315,7 +295,7 @@ class ESIMService:
             except Exception as db_error:
                 # Fallback if remaining_data_mb column doesn't exist
                 try:
-                    pack_response = get_supabase_client().table('data_packs')\
+                    pack_response = await supabase.table('data_packs')\
                         .select('total_data_mb, used_data_mb')\
                         .eq('user_id', esim['user_id'])\
                         .eq('status', 'active')\
@@ -355,7 +335,8 @@ class ESIMService:
         """Check if eSIM has internet connectivity for browsing"""
         try:
             # Get eSIM details
-            esim_response = get_supabase_client().table('esims').select('id, user_id, iccid, status, apn').eq('id', esim_id).execute()
+            supabase = await get_async_supabase_client()
+            esim_response = await supabase.table('esims').select('id, user_id, iccid, status, apn').eq('id', esim_id).execute()
             if not esim_response.data:
                 raise Exception("eSIM not found")
             
@@ -0,0 +1,181 @@
+"""
+Deadline-driven expiry for data packs, internet sessions and connect profiles
+Upcoming expires_at values are kept in a min-heap; when a deadline passes the
+table's set-based "expire everything overdue" statement runs once, so expiry
+lands within seconds without polling the whole table
+"""
+
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+from ..core.database import get_async_supabase_client
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class ExpiryTarget:
+    """A table whose rows in `statuses` expire at expires_at"""
+    table: str
+    statuses: Tuple[str, ...]
+    expire: Callable[[], Awaitable[int]]  # bulk-expires every overdue row, returns the count
+
+
+def _epoch(value: str) -> float:
+    stamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.timestamp()
+
+
+class ExpiryScheduler:
+    """
+    Min-heap of (deadline, table) entries
+    - refresh() loads deadlines in (loaded_until, now + lookahead] per table, so every
+      row is read at most once per lookahead window
+    - catch_up() runs every bulk expiry (startup and periodic reconciliation), covering
+      rows created after their window was loaded and anything missed while down
+    """
+
+    def __init__(
+        self,
+        targets: List[ExpiryTarget],
+        lookahead_minutes: float,
+        refresh_seconds: float,
+        reconcile_minutes: float,
+        batch_size: int,
+        grace_seconds: float = 1.0
+    ):
+        self.targets = {target.table: target for target in targets}
+        self.lookahead = lookahead_minutes * 60
+        self.refresh_interval = refresh_seconds
+        self.reconcile_interval = reconcile_minutes * 60
+        self.batch_size = batch_size
+        self.grace = grace_seconds
+        self._heap: List[Tuple[float, str]] = []
+        self._queued: Set[Tuple[float, str]] = set()
+        self._loaded_until: Dict[str, float] = {}
+        self._wakeup = asyncio.Event()
+        self._stats = {"fired": 0, "expired_rows": 0, "catch_ups": 0, "refreshes": 0}
+
+    def schedule(self, table: str, expires_at: float):
+        """Queue an expiry deadline (deduplicated to the second)"""
+        entry = (float(int(expires_at) + 1), table)
+        if entry in self._queued:
+            return
+        self._queued.add(entry)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] == entry:
+            self._wakeup.set()
+
+    async def refresh(self, now: Optional[float] = None):
+        """Load deadlines that entered the lookahead window since the last refresh"""
+        now = time.time() if now is None else now
+        horizon = now + self.lookahead
+        supabase = await get_async_supabase_client()
+
+        for table, target in self.targets.items():
+            since = max(self._loaded_until.get(table, now), now)
+            response = await supabase.table(table)\
+                .select('expires_at')\
+                .in_('status', list(target.statuses))\
+                .gt('expires_at', datetime.fromtimestamp(since, timezone.utc).isoformat())\
+                .lte('expires_at', datetime.fromtimestamp(horizon, timezone.utc).isoformat())\
+                .order('expires_at')\
+                .limit(self.batch_size)\
+                .execute()
+            rows = response.data or []
+
+            for row in rows:
+                self.schedule(table, _epoch(row['expires_at']))
+
+            # A full batch means the window continues past the last row read
+            if len(rows) >= self.batch_size:
+                self._loaded_until[table] = _epoch(rows[-1]['expires_at'])
+            else:
+                self._loaded_until[table] = horizon
+
+        self._stats["refreshes"] += 1
+
+    async def catch_up(self):
+        """Expire everything already overdue in every table (one statement each)"""
+        for target in self.targets.values():
+            await self._expire(target)
+        self._stats["catch_ups"] += 1
+
+    async def fire_due(self, now: Optional[float] = None) -> int:
+        """Run the bulk expiry of each table with a passed deadline; returns rows expired"""
+        now = time.time() if now is None else now
+        due: Set[str] = set()
+        while self._heap and self._heap[0][0] + self.grace <= now:
+            entry = heapq.heappop(self._heap)
+            self._queued.discard(entry)
+            due.add(entry[1])
+
+        expired = 0
+        for table in due:
+            self._stats["fired"] += 1
+            expired += await self._expire(self.targets[table])
+        return expired
+
+    async def _expire(self, target: ExpiryTarget) -> int:
+        try:
+            count = await target.expire()
+        except Exception as e:
+            logger.error(f"Error expiring {target.table}: {e}")
+            return 0
+        if count:
+            logger.info(f"⏰ Expired {count} {target.table} rows")
+        self._stats["expired_rows"] += count
+        return count
+
+    async def run(self, is_active: Callable[[], bool], is_owner: Callable[[], bool] = lambda: True):
+        """Fire expiries at their deadlines while is_active(); idle unless is_owner()"""
+        next_refresh = next_reconcile = 0.0
+
+        while is_active():
+            now = time.time()
+            try:
+                if not is_owner():
+                    # Another worker owns expiry - reload everything if we take over
+                    self._heap.clear()
+                    self._queued.clear()
+                    self._loaded_until.clear()
+                    next_refresh = next_reconcile = 0.0
+                    await asyncio.sleep(self.refresh_interval)
+                    continue
+
+                if now >= next_reconcile:
+                    next_reconcile = now + self.reconcile_interval
+                    await self.catch_up()
+                if now >= next_refresh:
+                    next_refresh = now + self.refresh_interval
+                    await self.refresh(now)
+                await self.fire_due()
+
+            except Exception as e:
+                logger.error(f"Error in expiry scheduler: {e}")
+
+            wake_at = min(next_refresh, next_reconcile)
+            if self._heap:
+                wake_at = min(wake_at, self._heap[0][0] + self.grace)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.05, wake_at - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued_deadlines": len(self._heap),
+            "next_deadline": (
+                datetime.fromtimestamp(self._heap[0][0], timezone.utc).isoformat() if self._heap else None
+            ),
+            **self._stats
+        }
@@ -28,7 +28,11 @@ from datetime import datetime, timedelta
 import logging
 
 from ..core.config import settings
-from ..core.database import get_supabase_client
+from ..core.database import get_async_supabase_client
+from ..core import projections
+from ..core.pagination import (
+    DEFAULT_PAGE_SIZE, InvalidCursorError, apply_keyset, clamp_page_size, split_page
+)
 
 logger = logging.getLogger(__name__)
 
@@ -56,8 +60,9 @@ class KSWiFiConnectService:
             logger.info(f"🔍 CONNECT: Generating profile for session {session_id}")
             
             # Verify session exists and belongs to user
-            session_response = get_supabase_client().table('internet_sessions')\
-                .select('*')\
+            supabase = await get_async_supabase_client()
+            session_response = await supabase.table('internet_sessions')\
+                .select(projections.SESSION_OWNERSHIP)\
                 .eq('id', session_id)\
                 .eq('user_id', user_id)\
                 .execute()
@@ -90,8 +95,8 @@ class KSWiFiConnectService:
             )
             
             # Check if active profile already exists for this session
-            existing_response = get_supabase_client().table('kswifi_connect_profiles')\
-                .select('*')\
+            existing_response = await supabase.table('kswifi_connect_profiles')\
+                .select(projections.CONNECT_PROFILE_REUSE)\
                 .eq('session_id', session_id)\
                 .eq('status', 'active')\
                 .execute()
@@ -128,7 +133,7 @@ class KSWiFiConnectService:
                 }
                 
                 # Store in database
-                response = get_supabase_client().table('kswifi_connect_profiles').insert(profile_record).execute()
+                response = await supabase.table('kswifi_connect_profiles').insert(profile_record).execute()
                 
                 if not response.data:
                     raise Exception("Failed to create connect profile")
@@ -224,7 +229,8 @@ class KSWiFiConnectService:
         
         try:
             # Get used IPs from database
-            response = get_supabase_client().table('kswifi_connect_profiles')\
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('kswifi_connect_profiles')\
                 .select('client_ip')\
                 .eq('status', 'active')\
                 .execute()
@@ -372,8 +378,9 @@ AllowedIPs = {client_ip}/32
         
         try:
             # Find profile by public key
-            response = get_supabase_client().table('kswifi_connect_profiles')\
-                .select('*')\
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('kswifi_connect_profiles')\
+                .select(projections.CONNECT_PROFILE_USAGE)\
                 .eq('client_public_key', client_public_key)\
                 .eq('status', 'active')\
                 .execute()
@@ -398,7 +405,7 @@ AllowedIPs = {client_ip}/32
                 return {"session_valid": False, "error": "Data limit exceeded"}
             
             # Update usage
-            get_supabase_client().table('kswifi_connect_profiles')\
+            await supabase.table('kswifi_connect_profiles')\
                 .update({
                     "data_used_mb": data_used_mb,
                     "last_used_at": datetime.utcnow().isoformat()
@@ -422,7 +429,8 @@ AllowedIPs = {client_ip}/32
         
         try:
             # Update database
-            get_supabase_client().table('kswifi_connect_profiles')\
+            supabase = await get_async_supabase_client()
+            await supabase.table('kswifi_connect_profiles')\
                 .update({
                     "status": "deactivated",
                     "deactivated_reason": reason,
@@ -438,19 +446,43 @@ AllowedIPs = {client_ip}/32
         except Exception as e:
             logger.error(f"Error deactivating profile: {e}")
     
-    async def get_user_profiles(self, user_id: str) -> list:
-        """Get user's active connect profiles"""
+    async def expire_overdue_profiles(self) -> int:
+        """Deactivate every active profile past expires_at in one statement"""
+        now = datetime.utcnow().isoformat()
+        supabase = await get_async_supabase_client()
+        response = await supabase.table('kswifi_connect_profiles')\
+            .update({
+                "status": "deactivated",
+                "deactivated_reason": "expired",
+                "deactivated_at": now
+            })\
+            .eq('status', 'active')\
+            .lt('expires_at', now)\
+            .execute()
+        
+        # Note: In production, this would call VPS API to remove the expired clients
+        return len(response.data or [])
+    
+    async def get_user_profiles(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Dict[str, Any]:
+        """Get one page of the user's connect profiles, newest first"""
         
         try:
-            response = get_supabase_client().table('kswifi_connect_profiles')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('created_at', desc=True)\
-                .execute()
+            page_size = clamp_page_size(limit)
+            supabase = await get_async_supabase_client()
+            query = supabase.table('kswifi_connect_profiles')\
+                .select(projections.CONNECT_PROFILE_LIST)\
+                .eq('user_id', user_id)
+            response = await apply_keyset(query, cursor, page_size).execute()
+            rows, next_cursor = split_page(response.data, page_size)
             
             profiles = []
-            if response.data:
-                for profile in response.data:
+            if rows:
+                for profile in rows:
                     profiles.append({
                         "connect_id": profile["id"],
                         "session_id": profile["session_id"],
@@ -464,8 +496,10 @@ AllowedIPs = {client_ip}/32
                         "access_method": "kswifi_connect"
                     })
             
-            return profiles
+            return {"profiles": profiles, "next_cursor": next_cursor}
             
+        except InvalidCursorError:
+            raise
         except Exception as e:
             logger.error(f"Error getting user profiles: {e}")
-            return []
\ No newline at end of file
+            return {"profiles": [], "next_cursor": None}
\ No newline at end of file
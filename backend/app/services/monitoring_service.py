@@ -3,15 +3,33 @@ Data monitoring and background task service
 """
 
 import asyncio
-from typing import Dict, List, Any
-from datetime import datetime, timedelta
+import time
+from typing import Dict, List, Any, Optional
+from datetime import datetime, timedelta, timezone
+import numpy as np
 import structlog
 
 from ..core.config import settings
-from ..core.database import get_supabase_client
+from ..core.database import get_async_supabase_client
+from ..core.batch_writer import usage_log_writer
+from ..core.postgres import postgres_enabled
+from ..core.fanout import run_bounded
+from ..core.sharding import ShardAssignment
+from ..core.snapshot import RefreshingSnapshot
+from ..core import projections
+from ..repositories import get_postgres_repository
 from ..models.enums import DataPackStatus, ESIMStatus
 from .esim_service import ESIMService
 from .notification_service import NotificationService
+from .threshold_engine import (
+    PackColumns, evaluate_thresholds,
+    ALERT_LOW_DATA, ALERT_USAGE_75, ALERT_USAGE_90, ALERT_EXPIRED
+)
+from .alert_state import AlertStateStore
+from .expiry_scheduler import ExpiryScheduler, ExpiryTarget
+from .burn_rate import BurnRateForecaster
+from .session_service import SessionService, SessionStatus
+from .kswifi_connect_service import KSWiFiConnectService
 
 logger = structlog.get_logger(__name__)
 
@@ -25,6 +43,45 @@ class MonitoringService:
         self.check_interval = settings.DATA_CHECK_INTERVAL_MINUTES
         self.low_data_threshold = settings.LOW_DATA_THRESHOLD_MB
         self._running = False
+        self.alert_state = AlertStateStore()
+        self.concurrency = settings.MONITORING_CONCURRENCY
+        self._cycle_timings: Dict[str, Dict[str, Any]] = {}
+        # Incremental scan state: updated_at high-water mark and last full reconciliation
+        self._pack_high_water: Optional[datetime] = None
+        self._last_full_scan = 0.0
+        self._scan_stats = {"full_scans": 0, "incremental_scans": 0, "last_scan_packs": 0}
+        # Shards of hash(user_id) this process monitors; None monitors every user
+        self.shards: Optional[ShardAssignment] = None
+        # Per-user eSIM usage polls scheduled by forecast time-to-threshold
+        self.forecaster = BurnRateForecaster(
+            window_minutes=settings.MONITORING_BURN_RATE_WINDOW_MINUTES,
+            min_interval_seconds=settings.MONITORING_MIN_CHECK_SECONDS,
+            max_interval_minutes=settings.MONITORING_MAX_CHECK_MINUTES,
+            safety=settings.MONITORING_FORECAST_SAFETY,
+            low_data_threshold_mb=self.low_data_threshold,
+            overlap_seconds=settings.MONITORING_BURN_RATE_OVERLAP_SECONDS
+        ) if settings.MONITORING_ADAPTIVE_CADENCE else None
+        # Monitored row counts, refreshed in the background for health probes
+        self.counts_snapshot = RefreshingSnapshot(
+            "monitoring_counts", self._load_counts, max_age=settings.MONITORING_STATS_MAX_AGE_SECONDS
+        )
+        self.session_service = SessionService()
+        self.connect_service = KSWiFiConnectService()
+        self.expiry_scheduler = ExpiryScheduler(
+            targets=[
+                ExpiryTarget('data_packs', (DataPackStatus.ACTIVE.value,), self._expire_overdue_pack_count),
+                ExpiryTarget(
+                    'internet_sessions',
+                    (SessionStatus.STORED.value, SessionStatus.ACTIVE.value),
+                    self.session_service.expire_overdue_sessions
+                ),
+                ExpiryTarget('kswifi_connect_profiles', ('active',), self.connect_service.expire_overdue_profiles)
+            ],
+            lookahead_minutes=settings.EXPIRY_LOOKAHEAD_MINUTES,
+            refresh_seconds=settings.EXPIRY_REFRESH_SECONDS,
+            reconcile_minutes=settings.EXPIRY_RECONCILE_MINUTES,
+            batch_size=settings.EXPIRY_REFRESH_BATCH
+        )
     
     async def start_monitoring(self):
         """Start the background monitoring tasks"""
@@ -45,84 +102,233 @@ class MonitoringService:
         self._running = False
         logger.info("Stopping data monitoring service")
     
+    async def set_shards(self, assignment: ShardAssignment):
+        """Switch to a new shard assignment (from the shard coordinator)"""
+        self.shards = assignment
+        # Newly owned shards need a full scan, and their alert state lives in the database
+        self._pack_high_water = None
+        self.alert_state.clear()
+        if self.forecaster is not None:
+            self.forecaster.reset()
+    
+    def _owns_no_shards(self) -> bool:
+        return self.shards is not None and not self.shards.owned
+    
+    def _shard_filter(self, query):
+        """Restrict a data_packs/esims/usage_logs query to this process's shards"""
+        if self.shards is None:
+            return query
+        return query.in_('shard_bucket', self.shards.buckets())
+    
     async def _monitor_data_usage(self):
         """Monitor data usage and send alerts for low balances"""
         logger.info("Starting data usage monitoring")
         
         while self._running:
             try:
-                # Get all active data packs
-                response = get_supabase_client().table('data_packs').select('*').eq('status', DataPackStatus.ACTIVE.value).execute()
-                active_packs = response.data
-                
-                for pack in active_packs:
-                    await self._check_pack_usage(pack)
-                
-                logger.debug(f"Checked {len(active_packs)} active data packs")
+                await self.scan_active_packs()
                 
             except Exception as e:
                 logger.error(f"Error in data usage monitoring: {e}")
             
-            # Wait for next check
-            await asyncio.sleep(self.check_interval * 60)
+            # Wait for next check - sooner when a pack is forecast to cross a threshold
+            delay = self.check_interval * 60
+            if self.forecaster is not None:
+                delay = self.forecaster.next_scan_delay(delay)
+            await asyncio.sleep(delay)
     
-    async def _check_pack_usage(self, pack: Dict[str, Any]):
-        """Check individual pack usage and send alerts"""
-        try:
-            remaining_mb = max(0, pack.get('data_mb', 0) - pack.get('used_data_mb', 0))  # Calculate from schema fields
-            total_mb = pack.get('data_mb', 0)
-            user_id = pack.get('user_id')
-            pack_id = pack.get('id')
+    async def _load_active_packs(self, updated_since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Active packs in our shards, optionally only those modified at or after updated_since"""
+        if self._owns_no_shards():
+            return []
+        
+        if postgres_enabled():
+            return await get_postgres_repository().fetch_active_packs(
+                updated_since=updated_since,
+                shard_count=self.shards.count if self.shards else 1,
+                shards=sorted(self.shards.owned) if self.shards else None
+            )
+        
+        supabase = await get_async_supabase_client()
+        query = supabase.table('data_packs').select(projections.PACK_MONITOR_SCAN).eq('status', DataPackStatus.ACTIVE.value)
+        query = self._shard_filter(query)
+        if updated_since:
+            query = query.gte('updated_at', updated_since)
+        response = await query.execute()
+        return response.data or []
+    
+    def _incremental_since(self) -> Optional[str]:
+        """Lower updated_at bound for the next scan, or None when a full scan is due"""
+        if not settings.MONITORING_INCREMENTAL or self._pack_high_water is None:
+            return None
+        if time.monotonic() - self._last_full_scan >= settings.MONITORING_FULL_SCAN_INTERVAL_MINUTES * 60:
+            return None
+        
+        # Re-read a short window so rows committed late with an older updated_at are not missed
+        return (self._pack_high_water - timedelta(seconds=settings.MONITORING_INCREMENTAL_OVERLAP_SECONDS)).isoformat()
+    
+    async def scan_active_packs(self) -> int:
+        """
+        Evaluate active packs - only those changed since the last cycle in incremental
+        mode, with a periodic full reconciliation scan
+        Time-based expiry of untouched packs is handled by the cleanup loop
+        """
+        since = self._incremental_since()
+        scan_started = datetime.now(timezone.utc)
+        shards = self.shards
+        packs = await self._load_active_packs(since)
+        columns = PackColumns.from_rows(packs)
+        
+        await self.check_columns(columns)
+        
+        if self.forecaster is not None:
+            try:
+                await self.forecaster.refresh_rates(self._shard_filter)
+                self.forecaster.update(columns, self.forecaster.check_intervals(columns), full=since is None)
+            except Exception as e:
+                logger.error(f"Error updating burn-rate forecasts: {e}")
+        
+        if self.shards is not shards:
+            # Reassigned mid-scan - leave the high-water mark reset for a full scan
+            return len(packs)
+        
+        if since is None:
+            self._last_full_scan = time.monotonic()
+            self._scan_stats["full_scans"] += 1
+        else:
+            self._scan_stats["incremental_scans"] += 1
+        self._scan_stats["last_scan_packs"] = len(packs)
+        
+        updated_marks = [
+            datetime.fromisoformat(pack['updated_at'].replace('Z', '+00:00'))
+            for pack in packs if pack.get('updated_at')
+        ]
+        if updated_marks:
+            newest = max(mark if mark.tzinfo else mark.replace(tzinfo=timezone.utc) for mark in updated_marks)
+            if self._pack_high_water is None or newest > self._pack_high_water:
+                self._pack_high_water = newest
+        elif self._pack_high_water is None:
+            self._pack_high_water = scan_started
+        
+        logger.debug(f"{'Full' if since is None else 'Incremental'} pack scan read {len(packs)} packs")
+        return len(packs)
+    
+    async def check_packs(self, packs: List[Dict[str, Any]]) -> int:
+        """
+        Evaluate all packs in one vectorised pass and act only on new threshold crossings
+        Alert flags suppress conditions that were already notified
+        Returns the number of packs that needed action
+        """
+        return await self.check_columns(PackColumns.from_rows(packs))
+    
+    async def check_columns(self, columns: PackColumns) -> int:
+        """check_packs over an already columnar batch"""
+        started = time.perf_counter()
+        masks = evaluate_thresholds(columns, self.low_data_threshold)
+        conditions = masks.flags()
+        previous = self.alert_state.current_flags(columns.ids, columns.alert_flags)
+        pending = conditions & ~previous
+        actionable = np.flatnonzero(pending)
+        evaluated_ms = (time.perf_counter() - started) * 1000
+        
+        expired_ids = []
+        for i in actionable:
+            pack_id = columns.ids[i]
+            user_id = columns.user_ids[i]
+            bits = int(pending[i])
+            failed = 0
             
             # Check if pack is low on data
-            if remaining_mb <= self.low_data_threshold:
-                await self.notification_service.send_low_data_alert(
-                    user_id,
-                    pack_id,
-                    remaining_mb,
-                    total_mb
-                )
+            if bits & ALERT_LOW_DATA:
+                try:
+                    await self.notification_service.send_low_data_alert(
+                        user_id,
+                        pack_id,
+                        float(masks.remaining_mb[i]),
+                        float(columns.data_mb[i])
+                    )
+                except Exception as e:
+                    failed |= ALERT_LOW_DATA
+                    logger.error(f"Error sending low data alert for pack {pack_id}: {e}")
             
             # Check if pack has expired
-            expires_at_str = pack.get('expires_at')
-            if expires_at_str:
-                expires_at = datetime.fromisoformat(expires_at_str.replace('Z', '+00:00'))
-                if expires_at <= datetime.now(expires_at.tzinfo):
+            if bits & ALERT_EXPIRED:
+                try:
                     await self._expire_data_pack(pack_id)
                     await self.notification_service.send_pack_expired_notification(user_id, pack_id)
+                    expired_ids.append(pack_id)
+                except Exception as e:
+                    failed |= ALERT_EXPIRED
+                    logger.error(f"Error expiring pack {pack_id}: {e}")
             
-            # Check usage percentage thresholds
-            usage_percent = ((total_mb - remaining_mb) / total_mb) * 100 if total_mb > 0 else 0
+            # Check usage percentage thresholds (the 90% alert also covers a pending 75%)
+            usage_bits = bits & (ALERT_USAGE_90 | ALERT_USAGE_75)
+            if usage_bits:
+                try:
+                    await self.notification_service.send_usage_threshold_alert(
+                        user_id, pack_id, 90 if usage_bits & ALERT_USAGE_90 else 75
+                    )
+                except Exception as e:
+                    failed |= usage_bits
+                    logger.error(f"Error sending usage alert for pack {pack_id}: {e}")
             
-            # Simplified alert logic - no tracking to match current schema
-            if usage_percent >= 90:
-                await self.notification_service.send_usage_threshold_alert(user_id, pack_id, 90)
-            elif usage_percent >= 75:
-                await self.notification_service.send_usage_threshold_alert(user_id, pack_id, 75)
-                
-        except Exception as e:
-            logger.error(f"Error checking pack usage for pack {pack.get('id')}: {e}")
+            # Leave only the failed actions' bits unset so just those are retried next cycle
+            conditions[i] &= ~failed
+        
+        await self.alert_state.record(columns.ids, conditions, conditions != previous)
+        for pack_id in expired_ids:
+            self.alert_state.forget(pack_id)
+        
+        logger.debug(f"Checked {len(columns)} active data packs in {evaluated_ms:.1f}ms, {len(actionable)} need action")
+        return len(actionable)
+    
+    async def _check_pack_usage(self, pack: Dict[str, Any]):
+        """Check individual pack usage and send alerts"""
+        await self.check_packs([pack])
     
     async def _monitor_esim_status(self):
         """Monitor eSIM status and sync with provider"""
         logger.info("Starting eSIM status monitoring")
         
+        active_esims: List[Dict[str, Any]] = []
+        listed_at: Optional[float] = None
+        
         while self._running:
             try:
-                # Get all active eSIMs
-                response = get_supabase_client().table('esims').select('id, user_id, iccid, status, apn, created_at').eq('status', ESIMStatus.ACTIVE.value).execute()
-                active_esims = response.data
+                # Get all active eSIMs in our shards (every 15 minutes)
+                if listed_at is None or time.monotonic() - listed_at >= 15 * 60:
+                    active_esims = await self._load_active_esims('id, user_id, iccid, status, apn, created_at')
+                    listed_at = time.monotonic()
                 
-                for esim in active_esims:
-                    await self._sync_esim_status(esim)
+                # With adaptive cadence only owners of packs due for a check are polled
+                esims = active_esims
+                if self.forecaster is not None:
+                    due = set(self.forecaster.due_users({esim['user_id'] for esim in active_esims}))
+                    esims = [esim for esim in active_esims if esim['user_id'] in due]
                 
-                logger.debug(f"Checked {len(active_esims)} active eSIMs")
+                timing = await run_bounded(esims, self._sync_esim_status, self.concurrency)
+                self._cycle_timings['esim_status'] = timing.as_dict()
+                
+                if self.forecaster is not None:
+                    for user_id in due:
+                        self.forecaster.mark_polled(user_id)
+                
+                logger.debug(f"Checked {timing.items} active eSIMs in {timing.duration_ms:.0f}ms")
                 
             except Exception as e:
                 logger.error(f"Error in eSIM status monitoring: {e}")
             
-            # Check eSIMs less frequently (every 15 minutes)
-            await asyncio.sleep(15 * 60)
+            # Check eSIMs less frequently (every 15 minutes) unless forecasts need sooner polls
+            await asyncio.sleep(self.forecaster.min_interval if self.forecaster is not None else 15 * 60)
+    
+    async def _load_active_esims(self, columns: str) -> List[Dict[str, Any]]:
+        """Active eSIMs in our shards"""
+        if self._owns_no_shards():
+            return []
+        supabase = await get_async_supabase_client()
+        query = supabase.table('esims').select(columns).eq('status', ESIMStatus.ACTIVE.value)
+        response = await self._shard_filter(query).execute()
+        return response.data or []
     
     async def _sync_esim_status(self, esim: Dict[str, Any]):
         """Sync individual eSIM status with provider"""
@@ -147,7 +353,8 @@ class MonitoringService:
             
             # Find active data packs for this user
             # Get active data packs for user (simplified to match schema)
-            response = get_supabase_client().table('data_packs').select('*').eq('user_id', user_id).eq('status', DataPackStatus.ACTIVE.value).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('data_packs').select(projections.PACK_ESIM_USAGE).eq('user_id', user_id).eq('status', DataPackStatus.ACTIVE.value).execute()
             packs = response.data if response.data else []
             
             if packs:
@@ -161,75 +368,77 @@ class MonitoringService:
                     new_remaining = max(0, pack.get('data_mb', 0) - pack.get('used_data_mb', 0)) - new_usage
                     
                     # Update data pack usage directly
-                    get_supabase_client().table('data_packs').update({
+                    await supabase.table('data_packs').update({
                         'used_data_mb': data_used_mb,
                         'status': DataPackStatus.EXHAUSTED.value if new_remaining <= 0 else DataPackStatus.ACTIVE.value
                     }).eq('id', pack['id']).execute()
                     
-                    # Log the usage directly
-                    get_supabase_client().table('usage_logs').insert({
+                    # Log the usage (buffered, flushed in bulk)
+                    await usage_log_writer.add({
                         'user_id': user_id,
                         'data_pack_id': pack['id'],
                         'data_used_mb': new_usage,
                         'usage_type': 'esim_data_usage',
                         'device_info': {'esim_iccid': esim.get('iccid')},
                         'created_at': datetime.utcnow().isoformat()
-                    }).execute()
+                    })
                     
         except Exception as e:
             logger.error(f"Error updating eSIM data usage: {e}")
     
     async def _cleanup_expired_packs(self):
-        """Clean up expired data packs"""
-        logger.info("Starting expired packs cleanup")
+        """Expire packs, sessions and connect profiles at their expires_at deadlines"""
+        logger.info("Starting expiry scheduler")
         
-        while self._running:
-            try:
-                # Find expired packs that are still marked as active
-                current_time = datetime.utcnow().isoformat()
-                response = get_supabase_client().table('data_packs').select('*').eq('status', DataPackStatus.ACTIVE.value).lt('expires_at', current_time).execute()
-                expired_packs = response.data
-                
-                for pack in expired_packs:
-                    await self._expire_data_pack(pack['id'])
-                    logger.info(f"Expired data pack {pack['id']}")
-                
-                if expired_packs:
-                    logger.info(f"Cleaned up {len(expired_packs)} expired data packs")
-                
-            except Exception as e:
-                logger.error(f"Error in expired packs cleanup: {e}")
-            
-            # Run cleanup every hour
-            await asyncio.sleep(60 * 60)
+        # Expiry runs set-based statements, so only shard 0 runs it when sharded
+        await self.expiry_scheduler.run(
+            is_active=lambda: self._running,
+            is_owner=lambda: self.shards is None or self.shards.owns(0)
+        )
+    
+    async def _expire_overdue_pack_count(self) -> int:
+        return len(await self.expire_overdue_packs())
     
     async def _sync_provider_data(self):
         """Sync data usage with eSIM providers"""
         logger.info("Starting provider data sync")
         
+        active_users: List[str] = []
+        listed_at: Optional[float] = None
+        
         while self._running:
             try:
-                # Get all users with active eSIMs
-                response = get_supabase_client().table('esims').select('user_id').eq('status', ESIMStatus.ACTIVE.value).execute()
-                active_users = list(set([esim['user_id'] for esim in response.data]))
+                # Get all users with active eSIMs in our shards (every 30 minutes)
+                if listed_at is None or time.monotonic() - listed_at >= 30 * 60:
+                    active_users = list(set([esim['user_id'] for esim in await self._load_active_esims('user_id')]))
+                    listed_at = time.monotonic()
+                
+                users = active_users
+                if self.forecaster is not None:
+                    users = self.forecaster.due_users(active_users)
                 
-                for user_id in active_users:
-                    await self._sync_user_provider_data(user_id)
+                timing = await run_bounded(users, self._sync_user_provider_data, self.concurrency)
+                self._cycle_timings['provider_sync'] = timing.as_dict()
                 
-                logger.debug(f"Synced provider data for {len(active_users)} users")
+                if self.forecaster is not None:
+                    for user_id in users:
+                        self.forecaster.mark_polled(user_id)
+                
+                logger.debug(f"Synced provider data for {timing.items} users in {timing.duration_ms:.0f}ms")
                 
             except Exception as e:
                 logger.error(f"Error in provider data sync: {e}")
             
-            # Sync with provider every 30 minutes
-            await asyncio.sleep(30 * 60)
+            # Sync with provider every 30 minutes unless forecasts need sooner polls
+            await asyncio.sleep(self.forecaster.min_interval if self.forecaster is not None else 30 * 60)
     
     async def _sync_user_provider_data(self, user_id: str):
         """Sync provider data for a specific user"""
         try:
             # Get user's active eSIMs
             # Get user eSIMs directly
-            response = get_supabase_client().table('esims').select('*').eq('user_id', user_id).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('esims').select(projections.ESIM_PROVIDER_SYNC).eq('user_id', user_id).execute()
             user_esims = response.data if response.data else []
             active_esims = [esim for esim in user_esims if esim['status'] == ESIMStatus.ACTIVE.value]
             
@@ -243,31 +452,71 @@ class MonitoringService:
         except Exception as e:
             logger.error(f"Error syncing provider data for user {user_id}: {e}")
     
+    async def expire_overdue_packs(self) -> List[Dict[str, Any]]:
+        """
+        Expire every overdue active pack in one round trip
+        Returns the expired pack ids/user ids and notifies their owners
+        """
+        if postgres_enabled():
+            expired_packs = await get_postgres_repository().expire_overdue_packs()
+        else:
+            supabase = await get_async_supabase_client()
+            response = await supabase.rpc('expire_overdue_data_packs', {}).execute()
+            expired_packs = response.data or []
+        
+        for pack in expired_packs:
+            await self.notification_service.send_pack_expired_notification(pack['user_id'], pack['id'])
+        
+        return expired_packs
+    
     async def _expire_data_pack(self, pack_id: str):
         """Mark a data pack as expired"""
-        get_supabase_client().table('data_packs').update({
+        supabase = await get_async_supabase_client()
+        await supabase.table('data_packs').update({
             'status': DataPackStatus.EXPIRED.value
         }).eq('id', pack_id).execute()
     
-    # _mark_alert_sent method removed - alert tracking disabled to match schema
+    async def _load_counts(self) -> Dict[str, Any]:
+        """Active packs, active eSIMs and last-hour usage logs in one round trip"""
+        recent_since = datetime.now(timezone.utc) - timedelta(hours=1)
+        if postgres_enabled():
+            return await get_postgres_repository().monitoring_counts(recent_since)
+        
+        supabase = await get_async_supabase_client()
+        response = await supabase.rpc('monitoring_counts', {'recent_since': recent_since.isoformat()}).execute()
+        rows = response.data or []
+        return rows[0] if isinstance(rows, list) else rows
     
-    async def get_monitoring_stats(self) -> Dict[str, Any]:
-        """Get monitoring service statistics"""
+    async def get_monitoring_stats(self, snapshot_only: bool = False) -> Dict[str, Any]:
+        """
+        Get monitoring service statistics
+        Counts come from a snapshot at most MONITORING_STATS_MAX_AGE_SECONDS old;
+        snapshot_only never queries the database (health probes)
+        """
         try:
             # Get counts of various items being monitored
-            active_packs_response = get_supabase_client().table('data_packs').select('id', count='exact').eq('status', DataPackStatus.ACTIVE.value).execute()
-            active_esims_response = get_supabase_client().table('esims').select('id', count='exact').eq('status', ESIMStatus.ACTIVE.value).execute()
-            
-            # Get recent usage logs
-            recent_logs_response = get_supabase_client().table('usage_logs').select('id', count='exact').gte('created_at', (datetime.utcnow() - timedelta(hours=1)).isoformat()).execute()
+            counts = self.counts_snapshot.peek() if snapshot_only else await self.counts_snapshot.get()
+            counts = counts or {}
             
             return {
                 'service_running': self._running,
                 'check_interval_minutes': self.check_interval,
                 'low_data_threshold_mb': self.low_data_threshold,
-                'active_data_packs': active_packs_response.count,
-                'active_esims': active_esims_response.count,
-                'recent_usage_logs': recent_logs_response.count,
+                'incremental_scan': {
+                    'enabled': settings.MONITORING_INCREMENTAL,
+                    'high_water_mark': self._pack_high_water.isoformat() if self._pack_high_water else None,
+                    **self._scan_stats
+                },
+                'alert_state': self.alert_state.get_stats(),
+                'expiry_scheduler': self.expiry_scheduler.get_stats(),
+                'burn_rate': self.forecaster.get_stats() if self.forecaster is not None else None,
+                'shards': {'count': self.shards.count, 'owned': sorted(self.shards.owned)} if self.shards else None,
+                'concurrency': self.concurrency,
+                'last_cycles': self._cycle_timings,
+                'active_data_packs': counts.get('active_data_packs'),
+                'active_esims': counts.get('active_esims'),
+                'recent_usage_logs': counts.get('recent_usage_logs'),
+                'counts_snapshot': self.counts_snapshot.get_stats(),
                 'last_check': datetime.utcnow().isoformat()
             }
             
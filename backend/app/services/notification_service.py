@@ -6,11 +6,20 @@ from typing import Dict, Any, Optional
 import structlog
 from datetime import datetime
 
-from ..core.database import get_supabase_client
+from ..core.database import get_async_supabase_client
+from ..core.cache import query_cache
+from ..core.pagination import (
+    DEFAULT_PAGE_SIZE, InvalidCursorError, apply_keyset, clamp_page_size, split_page
+)
 
 logger = structlog.get_logger(__name__)
 
 
+def _device_cache_filters(user_id: str) -> Dict[str, Any]:
+    """query_cache filters of a user's active push tokens"""
+    return {'select': 'push_token', 'user_id': user_id, 'active': True}
+
+
 class NotificationService:
     """Service for sending notifications to users"""
     
@@ -136,17 +145,29 @@ class NotificationService:
             notification_data['read'] = False
             
             # Store in notifications table
-            get_supabase_client().table('notifications').insert(notification_data).execute()
+            supabase = await get_async_supabase_client()
+            await supabase.table('notifications').insert(notification_data).execute()
             
         except Exception as e:
             logger.error(f"Error storing notification: {e}")
     
+    async def invalidate_device_cache(self, *user_ids: str):
+        """Drop the cached push tokens of the given device owners only"""
+        for user_id in set(filter(None, user_ids)):
+            await query_cache.invalidate('user_devices', **_device_cache_filters(user_id))
+    
     async def _send_push_notification(self, user_id: str, notification_data: Dict[str, Any]):
         """Send push notification to user's devices"""
         try:
-            # Get user's push tokens from database
-            response = get_supabase_client().table('user_devices').select('push_token').eq('user_id', user_id).eq('active', True).execute()
-            devices = response.data
+            # Get user's push tokens (cached; device register/unregister invalidates)
+            async def _load_devices():
+                supabase = await get_async_supabase_client()
+                response = await supabase.table('user_devices').select('push_token').eq('user_id', user_id).eq('active', True).execute()
+                return response.data
+            
+            devices = await query_cache.get_or_load(
+                'user_devices', _device_cache_filters(user_id), _load_devices, ttl=300
+            )
             
             if not devices:
                 logger.debug(f"No active devices found for user {user_id}")
@@ -169,40 +190,53 @@ class NotificationService:
         except Exception as e:
             logger.error(f"Error sending push notification: {e}")
     
-    async def get_user_notifications(self, user_id: str, limit: int = 50, unread_only: bool = False) -> Dict[str, Any]:
-        """Get notifications for a user"""
+    async def get_user_notifications(
+        self,
+        user_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        unread_only: bool = False,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get one page of notifications for a user, newest first"""
         try:
-            query = get_supabase_client().table('notifications').select('*').eq('user_id', user_id)
+            page_size = clamp_page_size(limit)
+            supabase = await get_async_supabase_client()
+            query = supabase.table('notifications').select('*').eq('user_id', user_id)
             
             if unread_only:
                 query = query.eq('read', False)
             
-            response = query.order('created_at', desc=True).limit(limit).execute()
-            notifications = response.data
+            response = await apply_keyset(query, cursor, page_size).execute()
+            notifications, next_cursor = split_page(response.data, page_size)
             
             # Get unread count
-            unread_response = get_supabase_client().table('notifications').select('id', count='exact').eq('user_id', user_id).eq('read', False).execute()
+            unread_response = await supabase.table('notifications').select('id', count='exact').eq('user_id', user_id).eq('read', False).execute()
             unread_count = unread_response.count
             
             return {
                 'notifications': notifications,
                 'unread_count': unread_count,
-                'total_returned': len(notifications)
+                'total_returned': len(notifications),
+                'next_cursor': next_cursor
             }
             
+        except InvalidCursorError:
+            raise
         except Exception as e:
             logger.error(f"Error getting user notifications: {e}")
             return {
                 'notifications': [],
                 'unread_count': 0,
                 'total_returned': 0,
+                'next_cursor': None,
                 'error': str(e)
             }
     
     async def mark_notification_read(self, notification_id: str, user_id: str) -> bool:
         """Mark a notification as read"""
         try:
-            get_supabase_client().table('notifications').update({
+            supabase = await get_async_supabase_client()
+            await supabase.table('notifications').update({
                 'read': True,
                 'read_at': datetime.utcnow().isoformat()
             }).eq('id', notification_id).eq('user_id', user_id).execute()
@@ -216,7 +250,8 @@ class NotificationService:
     async def mark_all_notifications_read(self, user_id: str) -> bool:
         """Mark all notifications as read for a user"""
         try:
-            get_supabase_client().table('notifications').update({
+            supabase = await get_async_supabase_client()
+            await supabase.table('notifications').update({
                 'read': True,
                 'read_at': datetime.utcnow().isoformat()
             }).eq('user_id', user_id).eq('read', False).execute()
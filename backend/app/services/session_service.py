@@ -4,13 +4,21 @@ Internet Session Download Service - Core KSWiFi functionality
 
 import asyncio
 import json
+import os
+import socket
 import uuid
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from enum import Enum
 
 from ..core.config import settings
-from ..core.database import get_supabase_client
+from ..core.database import get_async_supabase_client
+from ..core.known_users import known_users
+from ..core.singleflight import query_flight
+from ..core import projections
+from ..core.pagination import (
+    DEFAULT_PAGE_SIZE, InvalidCursorError, apply_keyset, clamp_page_size, split_page
+)
 from ..models.enums import ESIMStatus, DataPackStatus
 from .esim_service import ESIMService
 
@@ -34,6 +42,9 @@ class SessionService:
     def __init__(self):
         self.esim_service = ESIMService()
         self.pricing = settings.BUNDLE_PRICING
+        self._active_downloads: Dict[str, asyncio.Task] = {}
+        # Identity recorded on claimed download rows
+        self._download_holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
     
 
     
@@ -51,13 +62,13 @@ class SessionService:
             print(f"🔍 SESSION DEBUG: Starting session detection...")
             
             # Get sessions from connected WiFi network (if provided)
-            supabase = get_supabase_client()
+            supabase = await get_async_supabase_client()
             print(f"🔍 SESSION DEBUG: Supabase client initialized")
             
             if wifi_network:
                 print(f"🔍 SESSION DEBUG: Checking database for WiFi network: {wifi_network}")
                 # Query for sessions available on this WiFi network
-                wifi_sessions_response = supabase.table('internet_sessions').select('*').eq('source_network', wifi_network).eq('status', 'available').execute()
+                wifi_sessions_response = await supabase.table('internet_sessions').select('*').eq('source_network', wifi_network).eq('status', 'available').execute()
                 print(f"🔍 SESSION DEBUG: Database query result: {wifi_sessions_response.data}")
                 
                 if wifi_sessions_response.data:
@@ -320,30 +331,7 @@ class SessionService:
     async def _ensure_user_exists(self, user_id: str):
         """Ensure user exists in database, create if needed"""
         try:
-            print(f"🔍 SESSION DEBUG: Checking if user exists: {user_id}")
-            # Check if user exists
-            user_response = get_supabase_client().table('users').select('id').eq('id', user_id).execute()
-            if not user_response.data:
-                print(f"🔍 SESSION DEBUG: User not found, creating user record...")
-                # Create basic user record
-                user_data = {
-                    'id': user_id,
-                    'email': f"user_{user_id[:8]}@kswifi.app",
-                    'first_name': 'KSWiFi',
-                    'last_name': 'User',
-                    'created_at': datetime.utcnow().isoformat(),
-                    'updated_at': datetime.utcnow().isoformat()
-                }
-                user_create_response = get_supabase_client().table('users').insert(user_data).execute()
-                print(f"🔍 SESSION DEBUG: User create response: {user_create_response}")
-                
-                if user_create_response.data:
-                    print(f"🔍 SESSION DEBUG: User created successfully: {user_create_response.data[0]['id']}")
-                else:
-                    print(f"❌ SESSION ERROR: Failed to create user - no data returned")
-                    raise Exception("Failed to create user record")
-            else:
-                print(f"🔍 SESSION DEBUG: User exists: {user_response.data[0]['id']}")
+            await known_users.ensure_user(user_id)
         except Exception as user_error:
             print(f"❌ SESSION ERROR: User creation/verification failed: {user_error}")
             print(f"❌ SESSION ERROR: User error type: {type(user_error).__name__}")
@@ -382,12 +370,18 @@ class SessionService:
                 'esim_id': esim_id,
                 'expires_at': None  # No expiry date
             }
+            if settings.RUN_BACKGROUND_JOBS:
+                # Downloaded here - claimed up front so a worker does not pick it up too
+                session_data.update(self._download_claim())
             
-            response = get_supabase_client().table('internet_sessions').insert(session_data).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('internet_sessions').insert(session_data).execute()
             session_record = response.data[0] if response.data else None
             
-            # Start background download process from WiFi
-            asyncio.create_task(self._download_session_from_wifi(session_record['id']))
+            # Start background download process from WiFi - with background jobs
+            # disabled the worker process picks up the 'downloading' row instead
+            if settings.RUN_BACKGROUND_JOBS:
+                self._spawn_download(session_record['id'])
             
             return {
                 'session_id': session_record['id'],
@@ -412,7 +406,8 @@ class SessionService:
             
             # It's a UUID, look up the session in database
             print(f"🔍 SESSION DEBUG: UUID detected, looking up in database")
-            response = get_supabase_client().table('internet_sessions')\
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('internet_sessions')\
                 .select('*')\
                 .eq('id', session_id)\
                 .eq('user_id', user_id)\
@@ -526,8 +521,9 @@ class SessionService:
     async def _check_unlimited_access(self, user_id: str) -> None:
         """Check if user has paid for unlimited access"""
         # Check for unlimited subscription
-        response = get_supabase_client().table('user_subscriptions')\
-            .select('*')\
+        supabase = await get_async_supabase_client()
+        response = await supabase.table('user_subscriptions')\
+            .select('id')\
             .eq('user_id', user_id)\
             .eq('subscription_type', 'unlimited')\
             .eq('status', 'active')\
@@ -541,7 +537,8 @@ class SessionService:
         # Get user's free sessions this month
         current_month = datetime.utcnow().replace(day=1)
         
-        response = get_supabase_client().table('internet_sessions')\
+        supabase = await get_async_supabase_client()
+        response = await supabase.table('internet_sessions')\
             .select('data_mb')\
             .eq('user_id', user_id)\
             .eq('price_ngn', 0)\
@@ -564,12 +561,57 @@ class SessionService:
         estimated_seconds = data_mb / 0.625  # MB per second
         return max(1, int(estimated_seconds / 60))  # Convert to minutes, minimum 1
     
+    def _spawn_download(self, session_record_id: str) -> bool:
+        """Run the download for a session in this process unless it is already running"""
+        if session_record_id in self._active_downloads:
+            return False
+        task = asyncio.create_task(self._download_session_from_wifi(session_record_id))
+        self._active_downloads[session_record_id] = task
+        task.add_done_callback(lambda _: self._active_downloads.pop(session_record_id, None))
+        return True
+    
+    def _download_claim(self) -> Dict[str, Any]:
+        """Columns that (re)claim a session download for this process"""
+        until = datetime.utcnow() + timedelta(seconds=settings.SESSION_DOWNLOAD_CLAIM_SECONDS)
+        return {'download_claimed_by': self._download_holder, 'download_claimed_until': until.isoformat() + '+00:00'}
+    
+    async def process_pending_downloads(self) -> int:
+        """Claim unclaimed (or lapsed) in-flight sessions and download them here (worker process)"""
+        supabase = await get_async_supabase_client()
+        response = await supabase.rpc('claim_session_downloads', {
+            'holder': self._download_holder,
+            'lease_seconds': settings.SESSION_DOWNLOAD_CLAIM_SECONDS
+        }).execute()
+        
+        return sum(self._spawn_download(row['id']) for row in response.data or [])
+    
+    async def stop_downloads(self) -> None:
+        """Cancel running downloads and release their claims for the next worker"""
+        session_ids = list(self._active_downloads)
+        tasks = list(self._active_downloads.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if session_ids:
+            try:
+                supabase = await get_async_supabase_client()
+                await supabase.table('internet_sessions')\
+                    .update({'download_claimed_until': None})\
+                    .in_('id', session_ids)\
+                    .eq('download_claimed_by', self._download_holder)\
+                    .execute()
+            except Exception as e:
+                # Claims lapse on their own after SESSION_DOWNLOAD_CLAIM_SECONDS
+                print(f"⚠️ Failed to release session download claims: {e}")
+    
     async def _download_session_from_wifi(self, session_record_id: str) -> None:
         """Background process to download session from connected WiFi with chunked processing"""
         try:
             # Get session record
-            response = get_supabase_client().table('internet_sessions')\
-                .select('*')\
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('internet_sessions')\
+                .select(projections.SESSION_DOWNLOAD)\
                 .eq('id', session_record_id)\
                 .single()\
                 .execute()
@@ -660,10 +702,21 @@ class SessionService:
         # For now, we'll assume connection is available
         await asyncio.sleep(0.1)  # Simulate connection check
     
+    async def expire_overdue_sessions(self) -> int:
+        """Expire every stored/active session past expires_at in one statement"""
+        supabase = await get_async_supabase_client()
+        response = await supabase.table('internet_sessions')\
+            .update({'status': SessionStatus.EXPIRED.value})\
+            .in_('status', [SessionStatus.STORED.value, SessionStatus.ACTIVE.value])\
+            .lt('expires_at', datetime.utcnow().isoformat())\
+            .execute()
+        return len(response.data or [])
+    
     async def _update_session_progress(self, session_id: str, progress: int) -> None:
-        """Update session download progress"""
-        get_supabase_client().table('internet_sessions')\
-            .update({'progress_percent': progress})\
+        """Update session download progress (and renew this process's claim on it)"""
+        supabase = await get_async_supabase_client()
+        await supabase.table('internet_sessions')\
+            .update({'progress_percent': progress, **self._download_claim()})\
             .eq('id', session_id)\
             .execute()
     
@@ -674,7 +727,8 @@ class SessionService:
         if error:
             print(f"⚠️ Session {session_id} error: {error}")  # Log error instead
         
-        get_supabase_client().table('internet_sessions')\
+        supabase = await get_async_supabase_client()
+        await supabase.table('internet_sessions')\
             .update(update_data)\
             .eq('id', session_id)\
             .execute()
@@ -683,8 +737,9 @@ class SessionService:
         """Complete the session download process"""
         try:
             # Get session record
-            response = get_supabase_client().table('internet_sessions')\
-                .select('*')\
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('internet_sessions')\
+                .select(projections.SESSION_COMPLETION)\
                 .eq('id', session_record_id)\
                 .single()\
                 .execute()
@@ -711,7 +766,7 @@ class SessionService:
                 # data_remaining_mb calculated in application, not stored in DB
             }
             
-            get_supabase_client().table('internet_sessions')\
+            await supabase.table('internet_sessions')\
                 .update(update_data)\
                 .eq('id', session_record_id)\
                 .execute()
@@ -719,31 +774,44 @@ class SessionService:
         except Exception as e:
             await self._update_session_status(session_record_id, SessionStatus.FAILED, str(e))
     
-    async def get_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all sessions for a user with can_activate status"""
+    async def get_user_sessions(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Dict[str, Any]:
+        """Get one page of a user's sessions (newest first) with can_activate status"""
         try:
-            # Get user sessions from database
-            response = get_supabase_client().table('internet_sessions')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('created_at', desc=True)\
-                .execute()
+            page_size = clamp_page_size(limit)
+            
+            # Get user sessions from database - concurrent polls share one query
+            async def _load_sessions():
+                supabase = await get_async_supabase_client()
+                query = supabase.table('internet_sessions')\
+                    .select(projections.SESSION_LIST)\
+                    .eq('user_id', user_id)
+                return await apply_keyset(query, cursor, page_size).execute()
+            
+            response = await query_flight.do(
+                f"user_sessions:{user_id}:{cursor}:{page_size}", _load_sessions
+            )
+            rows, next_cursor = split_page(response.data, page_size)
             
             print(f"🔍 GET USER SESSIONS DEBUG: user_id = {user_id}")
-            print(f"🔍 GET USER SESSIONS DEBUG: Raw response data count: {len(response.data) if response.data else 0}")
-            if response.data:
+            print(f"🔍 GET USER SESSIONS DEBUG: Raw response data count: {len(rows) if rows else 0}")
+            if rows:
                 status_counts = {}
-                for session in response.data:
+                for session in rows:
                     status = session.get('status', 'unknown')
                     status_counts[status] = status_counts.get(status, 0) + 1
                 
                 print(f"🔍 STATUS BREAKDOWN: {status_counts}")
                 
-                for i, session in enumerate(response.data):
+                for i, session in enumerate(rows):
                     print(f"🔍 SESSION {i+1}: id={session.get('id')}, status='{session.get('status')}', data_mb={session.get('data_mb')}")
             
             sessions = []
-            for session in response.data:
+            for session in rows:
                 # Calculate data size display
                 data_mb = session.get('data_mb', 0)
                 if data_mb == -1:
@@ -776,8 +844,10 @@ class SessionService:
             activatable_count = sum(1 for s in sessions if s['can_activate'])
             print(f"🔍 GET USER SESSIONS RESULT: Total sessions: {len(sessions)}, Can activate: {activatable_count}")
             
-            return sessions
+            return {"sessions": sessions, "next_cursor": next_cursor}
             
+        except InvalidCursorError:
+            raise
         except Exception as e:
             print(f"❌ GET USER SESSIONS ERROR: {str(e)}")
             raise Exception(f"Failed to get user sessions: {str(e)}")
@@ -786,8 +856,9 @@ class SessionService:
         """Activate a downloaded session for use"""
         try:
             # Get session record
-            response = get_supabase_client().table('internet_sessions')\
-                .select('*')\
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('internet_sessions')\
+                .select(projections.SESSION_ACTIVATION)\
                 .eq('id', session_id)\
                 .eq('user_id', user_id)\
                 .single()\
@@ -817,7 +888,7 @@ class SessionService:
                 esim_id = esim_result['esim_id']
                 
                 # Update session with new eSIM ID
-                get_supabase_client().table('internet_sessions')\
+                await supabase.table('internet_sessions')\
                     .update({'esim_id': esim_id})\
                     .eq('id', session_id)\
                     .execute()
@@ -835,14 +906,14 @@ class SessionService:
             }
             print(f"🔍 ACTIVATION: Update data: {update_data}")
             
-            update_response = get_supabase_client().table('internet_sessions')\
+            update_response = await supabase.table('internet_sessions')\
                 .update(update_data)\
                 .eq('id', session_id)\
                 .execute()
             print(f"🔍 ACTIVATION: Update response: {update_response}")
             
             # Verify the update worked
-            verify_response = get_supabase_client().table('internet_sessions')\
+            verify_response = await supabase.table('internet_sessions')\
                 .select('id, status')\
                 .eq('id', session_id)\
                 .single()\
@@ -884,8 +955,9 @@ class SessionService:
         """Track data usage for an active session"""
         try:
             # Get current session
-            response = get_supabase_client().table('internet_sessions')\
-                .select('*')\
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('internet_sessions')\
+                .select(projections.SESSION_USAGE)\
                 .eq('id', session_id)\
                 .single()\
                 .execute()
@@ -903,7 +975,7 @@ class SessionService:
                 new_status = session['status']
             
             # Update usage
-            get_supabase_client().table('internet_sessions')\
+            await supabase.table('internet_sessions')\
                 .update({
                     'data_used_mb': new_usage,  # Use data_used_mb to match schema
                     'status': new_status,
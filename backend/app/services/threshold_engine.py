@@ -0,0 +1,126 @@
+"""
+Vectorised threshold evaluation for data pack monitoring
+Active packs are loaded into columnar NumPy arrays and every alert condition
+is computed in one pass, so only packs that need action reach Python code
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Alert condition bits
+ALERT_LOW_DATA = 1
+ALERT_USAGE_75 = 2
+ALERT_USAGE_90 = 4
+ALERT_EXPIRED = 8
+
+# data_packs columns the notified state of each bit persists to; expiry is not
+# persisted (expired packs leave the active set)
+ALERT_COLUMNS = {
+    ALERT_LOW_DATA: 'alert_low_data_sent',
+    ALERT_USAGE_75: 'alert_75_sent',
+    ALERT_USAGE_90: 'alert_90_sent',
+}
+
+
+def alert_flags_from_row(pack: Dict[str, Any]) -> Optional[int]:
+    """Persisted alert columns -> ALERT_* bit field, None when not selected"""
+    if not any(column in pack for column in ALERT_COLUMNS.values()):
+        return None
+    return sum(bit for bit, column in ALERT_COLUMNS.items() if pack.get(column))
+
+
+def alert_columns(flags: int) -> Dict[str, bool]:
+    """ALERT_* bit field -> data_packs alert column values"""
+    return {column: bool(flags & bit) for bit, column in ALERT_COLUMNS.items()}
+
+
+def _utc_naive_iso(value: Optional[str]) -> str:
+    """Reduce a PostgREST timestamp to a naive UTC ISO string NumPy can parse"""
+    if not value:
+        return "NaT"
+    if value.endswith("+00:00"):
+        return value[:-6]
+    if value.endswith("Z"):
+        return value[:-1]
+    if len(value) > 19 and value[-6] in "+-" and value[-3] == ":":
+        # Non-UTC offset - rare, convert exactly
+        return datetime.fromisoformat(value).astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+    return value
+
+
+def to_epoch_seconds(values: Sequence[Optional[str]]) -> np.ndarray:
+    """ISO timestamps -> float epoch seconds; missing values become +inf (never expire)"""
+    stamps = np.array([_utc_naive_iso(value) for value in values], dtype="datetime64[us]")
+    epochs = stamps.astype("int64").astype(np.float64) / 1e6
+    epochs[np.isnat(stamps)] = np.inf
+    return epochs
+
+
+@dataclass
+class PackColumns:
+    """Columnar view of the PACK_USAGE_CHECK projection"""
+    ids: List[Any]
+    user_ids: List[Any]
+    data_mb: np.ndarray
+    used_mb: np.ndarray
+    expires_at: np.ndarray
+    alert_flags: List[Any]  # persisted alert state, None when not selected
+
+    @classmethod
+    def from_rows(cls, packs: Sequence[Dict[str, Any]]) -> "PackColumns":
+        count = len(packs)
+        return cls(
+            ids=[pack.get('id') for pack in packs],
+            user_ids=[pack.get('user_id') for pack in packs],
+            data_mb=np.fromiter((pack.get('data_mb') or 0 for pack in packs), dtype=np.float64, count=count),
+            used_mb=np.fromiter((pack.get('used_data_mb') or 0 for pack in packs), dtype=np.float64, count=count),
+            expires_at=to_epoch_seconds([pack.get('expires_at') for pack in packs]),
+            alert_flags=[alert_flags_from_row(pack) for pack in packs]
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class ThresholdMasks:
+    """Per-pack results of one evaluation pass"""
+    remaining_mb: np.ndarray
+    low_data: np.ndarray
+    expired: np.ndarray
+    usage_90: np.ndarray
+    usage_75: np.ndarray  # 75% reached but not yet 90%
+
+    def flags(self) -> np.ndarray:
+        """Conditions as one ALERT_* bit field per pack"""
+        return (
+            self.low_data * ALERT_LOW_DATA
+            | self.usage_75 * ALERT_USAGE_75
+            | self.usage_90 * ALERT_USAGE_90
+            | self.expired * ALERT_EXPIRED
+        ).astype(np.int16)
+
+
+def evaluate_thresholds(columns: PackColumns, low_data_threshold: float, now: Optional[float] = None) -> ThresholdMasks:
+    """Compute low-data, expiry and 75%/90% usage masks for every pack at once"""
+    now = datetime.now(timezone.utc).timestamp() if now is None else now
+
+    remaining = np.maximum(0.0, columns.data_mb - columns.used_mb)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        usage_percent = np.where(
+            columns.data_mb > 0,
+            (columns.data_mb - remaining) / columns.data_mb * 100,
+            0.0
+        )
+
+    usage_90 = usage_percent >= 90
+    return ThresholdMasks(
+        remaining_mb=remaining,
+        low_data=remaining <= low_data_threshold,
+        expired=columns.expires_at <= now,
+        usage_90=usage_90,
+        usage_75=(usage_percent >= 75) & ~usage_90
+    )
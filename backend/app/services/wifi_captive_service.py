@@ -12,7 +12,11 @@ from datetime import datetime, timedelta
 import json
 
 from ..core.config import settings
-from ..core.database import get_supabase_client
+from ..core.database import get_async_supabase_client
+from ..core import projections
+from ..core.pagination import (
+    DEFAULT_PAGE_SIZE, InvalidCursorError, apply_keyset, clamp_page_size, split_page
+)
 
 
 class WiFiCaptiveService:
@@ -68,7 +72,8 @@ class WiFiCaptiveService:
             print(f"🔍 DB DEBUG: Attempting to insert token_record: {token_record}")
             
             try:
-                response = get_supabase_client().table('wifi_access_tokens').insert(token_record).execute()
+                supabase = await get_async_supabase_client()
+                response = await supabase.table('wifi_access_tokens').insert(token_record).execute()
                 print(f"🔍 DB DEBUG: Insert response: {response}")
                 
                 if not response.data:
@@ -215,16 +220,13 @@ class WiFiCaptiveService:
             session_suffix = network_name.replace("KSWiFi_Global_", "")
             
             # Find active token by network name
-            response = get_supabase_client().table('wifi_access_tokens')\
-                .select('*')\
-                .eq('network_name', network_name)\
-                .eq('status', 'active')\
-                .execute()
+            supabase = await get_async_supabase_client()
+            tokens = await self.get_active_tokens_by_network(network_name)
             
-            if not response.data:
+            if not tokens:
                 raise Exception("No active session found for this network")
             
-            token_data = response.data[0]
+            token_data = tokens[0]
             
             # Check if session is still valid
             expires_at = datetime.fromisoformat(token_data['expires_at'].replace('Z', '+00:00'))
@@ -243,10 +245,10 @@ class WiFiCaptiveService:
             
             # Store connection (create wifi_device_connections table if needed)
             try:
-                get_supabase_client().table('wifi_device_connections').upsert(connection_record, on_conflict="device_mac,token_id").execute()
+                await supabase.table('wifi_device_connections').upsert(connection_record, on_conflict="device_mac,token_id").execute()
             except:
                 # Table might not exist, create connection tracking in existing table
-                get_supabase_client().table('wifi_access_tokens').update({
+                await supabase.table('wifi_access_tokens').update({
                     "last_connected_device": device_mac,
                     "last_connected_at": datetime.utcnow().isoformat()
                 }).eq('id', token_data["id"]).execute()
@@ -274,16 +276,19 @@ class WiFiCaptiveService:
         """Validate WiFi access token for captive portal"""
         
         try:
-            # Get token from database
-            response = get_supabase_client().table('wifi_access_tokens').select('*').eq('access_token', access_token).eq('status', 'active').execute()
+            # Always read the token fresh - status and usage are authorization state
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('wifi_access_tokens').select(projections.WIFI_TOKEN_VALIDATION).eq('access_token', access_token).eq('status', 'active').execute()
+            tokens = response.data
             
-            if not response.data:
+            if not tokens:
                 return {"valid": False, "error": "Invalid or expired access token"}
             
-            token = response.data[0]
+            token = tokens[0]
             
             # Check if token is expired
-            if datetime.fromisoformat(token['expires_at'].replace('Z', '+00:00')) < datetime.utcnow().replace(tzinfo=None):
+            expires_at = datetime.fromisoformat(token['expires_at'].replace('Z', '+00:00'))
+            if expires_at < datetime.utcnow().replace(tzinfo=expires_at.tzinfo):
                 return {"valid": False, "error": "Access token has expired"}
             
             # Check data limit
@@ -333,22 +338,20 @@ class WiFiCaptiveService:
                 "expires_at": (datetime.utcnow() + timedelta(minutes=token_data["time_limit_minutes"])).isoformat()
             }
             
+            # Count the session atomically; fails if the token was revoked or used up meanwhile
+            supabase = await get_async_supabase_client()
+            started = await supabase.rpc('start_wifi_token_session', {'token_id': token_data["id"]}).execute()
+            if started.data is None:
+                raise Exception("Access token is no longer valid")
+            
             # Store session
-            response = get_supabase_client().table('captive_portal_sessions').insert(session_record).execute()
+            response = await supabase.table('captive_portal_sessions').insert(session_record).execute()
             
             if not response.data:
                 raise Exception("Failed to create captive session")
             
             session = response.data[0]
             
-            # Update token usage
-            get_supabase_client().table('wifi_access_tokens').update({
-                "sessions_used": token_data["sessions_used"] + 1,
-                "first_used_at": datetime.utcnow().isoformat() if not token_data.get("first_used_at") else token_data["first_used_at"],
-                "last_used_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            }).eq('id', token_data["id"]).execute()
-            
             return {
                 "success": True,
                 "session_id": session["id"],
@@ -370,48 +373,64 @@ class WiFiCaptiveService:
         
         try:
             # Get session
-            response = get_supabase_client().table('captive_portal_sessions').select('*, wifi_access_tokens!inner(*)').eq('session_token', session_token).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('captive_portal_sessions').select('*').eq('session_token', session_token).execute()
             
             if not response.data:
                 raise Exception("Session not found")
             
             session = response.data[0]
-            token = session["wifi_access_tokens"]
             
             # Update session usage
-            get_supabase_client().table('captive_portal_sessions').update({
-                "data_used_mb": session["data_used_mb"] + data_used_mb,
-                "duration_minutes": session["duration_minutes"] + duration_minutes,
+            await supabase.table('captive_portal_sessions').update({
+                "data_used_mb": (session.get("data_used_mb") or 0) + data_used_mb,
+                "duration_minutes": (session.get("duration_minutes") or 0) + duration_minutes,
                 "updated_at": datetime.utcnow().isoformat()
             }).eq('session_token', session_token).execute()
             
-            # Update token usage
-            new_total_usage = token["data_used_mb"] + data_used_mb
-            token_status = "used" if new_total_usage >= token["data_limit_mb"] else "active"
-            
-            get_supabase_client().table('wifi_access_tokens').update({
-                "data_used_mb": new_total_usage,
-                "status": token_status,
-                "last_used_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            }).eq('id', token["id"]).execute()
+            # Update token usage in one statement (concurrent reports must not overwrite each other)
+            usage = await supabase.rpc('record_wifi_token_usage', {'token_id': session["access_token_id"], 'used_mb': data_used_mb}).execute()
+            if usage.data is None:
+                raise Exception("Access token not found")
+            token_usage = usage.data
             
             return {
                 "success": True,
-                "data_used_mb": new_total_usage,
-                "remaining_data_mb": max(0, token["data_limit_mb"] - new_total_usage),
-                "status": token_status
+                "data_used_mb": token_usage["data_used_mb"],
+                "remaining_data_mb": max(0, token_usage["data_limit_mb"] - token_usage["data_used_mb"]),
+                "status": token_usage["status"]
             }
             
         except Exception as e:
             print(f"❌ WIFI ERROR: Usage tracking failed: {str(e)}")
             raise Exception(f"Failed to track session usage: {str(e)}")
     
-    async def get_user_wifi_tokens(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get user's WiFi access tokens"""
+    async def get_user_wifi_tokens(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Dict[str, Any]:
+        """Get one page of the user's WiFi access tokens, newest first"""
         try:
-            response = get_supabase_client().table('wifi_access_tokens').select('*').eq('user_id', user_id).execute()
-            return response.data if response.data else []
+            page_size = clamp_page_size(limit)
+            supabase = await get_async_supabase_client()
+            query = supabase.table('wifi_access_tokens').select('*').eq('user_id', user_id)
+            response = await apply_keyset(query, cursor, page_size).execute()
+            tokens, next_cursor = split_page(response.data, page_size)
+            return {"tokens": tokens, "next_cursor": next_cursor}
+        except InvalidCursorError:
+            raise
         except Exception as e:
             print(f"❌ WIFI ERROR: Failed to get user tokens: {str(e)}")
-            return []
\ No newline at end of file
+            return {"tokens": [], "next_cursor": None}
+    
+    async def get_active_tokens_by_network(self, network_name: str) -> List[Dict[str, Any]]:
+        """Get active WiFi access tokens for a network name (not cached: connection authorization)"""
+        supabase = await get_async_supabase_client()
+        response = await supabase.table('wifi_access_tokens')\
+            .select(projections.WIFI_TOKEN_NETWORK)\
+            .eq('network_name', network_name)\
+            .eq('status', 'active')\
+            .execute()
+        return response.data or []
@@ -0,0 +1,127 @@
+"""
+KSWiFi Background Worker
+Runs monitoring loops and session downloads in their own process so API
+workers (RUN_BACKGROUND_JOBS=false) only serve HTTP
+"""
+
+import asyncio
+import signal
+
+import structlog
+
+from .core.config import settings
+from .core.database import init_db, close_db
+from .core.batch_writer import usage_log_writer
+from .core.cache import query_cache
+from .core.known_users import known_users
+from .core.leader import monitoring_leader
+from .core.sharding import create_shard_coordinator
+from .services.monitoring_service import MonitoringService
+from .services.session_service import SessionService
+
+logger = structlog.get_logger(__name__)
+
+
+class BackgroundWorker:
+    """
+    Background jobs: session downloads run on the elected worker; monitoring runs there
+    too, or on every worker for its own shards when MONITORING_SHARDS > 1
+    """
+
+    def __init__(self):
+        self.monitoring_service = MonitoringService()
+        self.session_service = SessionService()
+        self.sharded = settings.MONITORING_SHARDS > 1
+        self._running = False
+
+    async def run_jobs(self):
+        """Leader job - runs until stop_jobs() or the lease is lost"""
+        self._running = True
+        jobs = [self._dispatch_session_downloads()]
+        if not self.sharded:
+            jobs.append(self.monitoring_service.start_monitoring())
+        await asyncio.gather(*jobs, return_exceptions=True)
+
+    async def stop_jobs(self):
+        self._running = False
+        if not self.sharded:
+            await self.monitoring_service.stop_monitoring()
+        await self.session_service.stop_downloads()
+
+    async def _dispatch_session_downloads(self):
+        """Pick up sessions left in downloading status by the API"""
+        logger.info("Starting session download dispatcher")
+
+        while self._running:
+            try:
+                started = await self.session_service.process_pending_downloads()
+                if started:
+                    logger.info(f"📥 Picked up {started} session downloads")
+            except Exception as e:
+                logger.error(f"Error dispatching session downloads: {e}")
+
+            await asyncio.sleep(settings.SESSION_DOWNLOAD_POLL_SECONDS)
+
+
+def check_lease_backend():
+    """
+    The worker's leases must be the ones API processes campaign on; otherwise an API
+    with RUN_BACKGROUND_JOBS=true wins its own election and runs every job a second time
+    """
+    backend = settings.LEADER_ELECTION_BACKEND
+    if backend == "none":
+        raise RuntimeError("worker.py needs leader election - set LEADER_ELECTION_BACKEND to redis, postgres or file")
+    if backend == "file" and not settings.LEADER_LOCK_DIR:
+        raise RuntimeError(
+            "LEADER_ELECTION_BACKEND=file in worker.py needs an explicit LEADER_LOCK_DIR shared with the API "
+            "processes - or use redis/postgres, the same backend the API is configured with"
+        )
+
+
+async def run_worker():
+    """Start the worker and block until SIGINT/SIGTERM"""
+    logger.info(f"🚀 Starting {settings.APP_NAME} background worker...")
+    check_lease_backend()
+    worker = BackgroundWorker()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await init_db()
+    await usage_log_writer.start()
+    monitoring_leader.start(worker.run_jobs, on_demoted=worker.stop_jobs)
+    logger.info("✅ Background worker campaigning for the monitoring lease")
+
+    shard_coordinator = None
+    monitoring_task = None
+    if worker.sharded:
+        # Every worker monitors the shards it holds; claim a first share before the loops start
+        shard_coordinator = create_shard_coordinator()
+        await shard_coordinator.rebalance()
+        await worker.monitoring_service.set_shards(shard_coordinator.assignment)
+        shard_coordinator.start(worker.monitoring_service.set_shards)
+        monitoring_task = asyncio.create_task(worker.monitoring_service.start_monitoring())
+        logger.info(f"✅ Sharded monitoring across {settings.MONITORING_SHARDS} shards")
+
+    await stop.wait()
+
+    logger.info("🔄 Shutting down background worker...")
+    try:
+        if shard_coordinator is not None:
+            await worker.monitoring_service.stop_monitoring()
+            # Loops may be mid-sleep; don't leave them running against a closed pool
+            monitoring_task.cancel()
+            try:
+                await monitoring_task
+            except asyncio.CancelledError:
+                pass
+            await shard_coordinator.stop()
+        await monitoring_leader.stop()
+        await usage_log_writer.stop()
+        await query_cache.close()
+        await known_users.close()
+    finally:
+        await close_db()
+    logger.info("👋 Background worker shutdown complete")
@@ -0,0 +1,43 @@
+"""
+Shared pytest setup: import path and the settings required to load app modules
+Tests run against the in-memory backend unless marked integration
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("DB_BACKEND", "memory")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "integration: needs a local Postgres (TEST_DATABASE_URL, see docker-compose postgres service)"
+    )
+
+
+@pytest.fixture
+def memory_store():
+    """The in-memory database behind DB_BACKEND=memory, emptied around each test"""
+    from app.repositories.memory import memory_store as store
+    store.clear()
+    yield store
+    store.clear()
+
+
+@pytest.fixture
+def database_url():
+    """DSN of the local Postgres for integration tests (skipped when TEST_DATABASE_URL is unset)"""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    return url
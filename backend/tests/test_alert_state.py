@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from app.core.database import get_supabase_client
+from app.services.alert_state import AlertStateStore
+from app.services.threshold_engine import (
+    ALERT_EXPIRED, ALERT_LOW_DATA, ALERT_USAGE_75, PackColumns, alert_columns
+)
+
+STALE = "2025-01-01T00:00:00+00:00"
+
+
+def pack(pack_id, **columns):
+    return {"id": pack_id, "user_id": "u", "data_mb": 100, "used_data_mb": 0, "status": "active",
+            "expires_at": "2030-01-01T00:00:00+00:00", "updated_at": STALE, **columns}
+
+
+def test_persisted_flags_are_read_from_the_alert_columns():
+    columns = PackColumns.from_rows([
+        pack("a", **alert_columns(ALERT_LOW_DATA | ALERT_USAGE_75)),
+        pack("b", **alert_columns(0)),
+        {"id": "c"},
+    ])
+    assert columns.alert_flags == [ALERT_LOW_DATA | ALERT_USAGE_75, 0, None]
+
+
+@pytest.mark.asyncio
+async def test_record_writes_alert_columns_without_touching_updated_at(memory_store):
+    memory_store.load("data_packs", [pack("a"), pack("b")])
+    store = AlertStateStore()
+
+    flags = np.array([ALERT_LOW_DATA | ALERT_EXPIRED, ALERT_USAGE_75], dtype=np.int16)
+    await store.record(["a", "b"], flags, np.array([True, True]))
+
+    rows = {row["id"]: row for row in get_supabase_client().table("data_packs").select("*").execute().data}
+    assert rows["a"]["alert_low_data_sent"] and not rows["a"]["alert_75_sent"]
+    assert rows["b"]["alert_75_sent"] and not rows["b"]["alert_low_data_sent"]
+    assert {row["updated_at"] for row in rows.values()} == {STALE}
+    # The expired bit is only kept in memory
+    assert list(store.current_flags(["a", "b"], [0, 0])) == list(flags)
+
+
+class FlakyNotifications:
+    """Records alerts sent; the usage threshold alert fails until fixed"""
+
+    def __init__(self):
+        self.sent = []
+        self.usage_fails = True
+
+    async def send_low_data_alert(self, user_id, pack_id, remaining_mb, total_mb):
+        self.sent.append(("low_data", pack_id))
+
+    async def send_usage_threshold_alert(self, user_id, pack_id, percent):
+        if self.usage_fails:
+            raise RuntimeError("push gateway down")
+        self.sent.append((percent, pack_id))
+
+
+@pytest.mark.asyncio
+async def test_failed_alert_is_retried_without_resending_the_others(memory_store):
+    from app.services.monitoring_service import MonitoringService
+
+    row = pack("a", used_data_mb=95)
+    memory_store.load("data_packs", [row])
+    service = MonitoringService()
+    service.low_data_threshold = 10
+    service.notification_service = notifications = FlakyNotifications()
+
+    await service.check_packs([row])
+    assert notifications.sent == [("low_data", "a")]
+
+    notifications.usage_fails = False
+    await service.check_packs([row])
+    assert notifications.sent == [("low_data", "a"), (90, "a")]
+
+    await service.check_packs([row])
+    assert len(notifications.sent) == 2
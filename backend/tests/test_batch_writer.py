@@ -0,0 +1,91 @@
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+from app.core.batch_writer import BatchWriter
+from app.core.resilience import is_transient_error
+
+
+class FakeTable:
+    """Insert target that rejects rows marked bad and can simulate outages"""
+
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+        self.outage = False
+
+    async def insert(self, batch):
+        self.calls += 1
+        if self.outage:
+            raise httpx.ConnectError("connection refused")
+        if any(row.get("bad") for row in batch):
+            raise APIError({"code": "23503", "message": "violates foreign key constraint"})
+        self.rows.extend(batch)
+
+
+async def started_writer(table: FakeTable, batch_size: int = 8) -> BatchWriter:
+    writer = BatchWriter("usage_logs", batch_size=batch_size, flush_interval=3600, max_queue_size=100)
+    writer._insert = table.insert
+    await writer.start()
+    return writer
+
+
+def test_error_classification():
+    assert is_transient_error(httpx.ConnectError("down"))
+    assert is_transient_error(APIError({"code": 503, "message": "JSON could not be generated"}))
+    assert is_transient_error(APIError({"code": "PGRST001", "message": "no connection"}))
+    assert is_transient_error(APIError({"code": "40P01", "message": "deadlock detected"}))
+    assert not is_transient_error(APIError({"code": "23503", "message": "fk violation"}))
+    assert not is_transient_error(APIError({"code": "PGRST204", "message": "unknown column"}))
+    assert not is_transient_error(ValueError("Unknown usage_logs columns: usage_type"))
+
+
+@pytest.mark.asyncio
+async def test_rejected_rows_are_dropped_without_blocking_the_batch():
+    table = FakeTable()
+    writer = await started_writer(table)
+    try:
+        for i in range(8):
+            await writer.add({"id": i, "bad": i in (2, 5)})
+
+        assert await writer.flush()
+        assert sorted(row["id"] for row in table.rows) == [0, 1, 3, 4, 6, 7]
+        stats = writer.get_stats()
+        assert stats["rejected_rows"] == 2
+        assert stats["rows_written"] == 6
+        assert stats["queue_depth"] == 0
+    finally:
+        await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_requeues_the_batch_in_order():
+    table = FakeTable()
+    writer = await started_writer(table)
+    try:
+        for i in range(5):
+            await writer.add({"id": i})
+
+        table.outage = True
+        assert not await writer.flush()
+        assert writer.get_stats()["queue_depth"] == 5
+
+        table.outage = False
+        assert await writer.flush()
+        assert [row["id"] for row in table.rows] == [0, 1, 2, 3, 4]
+    finally:
+        await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_add_without_flush_loop_inserts_immediately_and_raises():
+    table = FakeTable()
+    writer = BatchWriter("usage_logs", batch_size=8, flush_interval=3600, max_queue_size=100)
+    writer._insert = table.insert
+
+    await writer.add({"id": 1})
+    assert [row["id"] for row in table.rows] == [1]
+
+    with pytest.raises(APIError):
+        await writer.add({"id": 2, "bad": True})
+    assert writer.get_stats()["queue_depth"] == 0
@@ -0,0 +1,103 @@
+import math
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.sharding import ShardAssignment
+from app.services.burn_rate import BurnRateForecaster
+from app.services.threshold_engine import PackColumns
+
+
+def forecaster(**overrides) -> BurnRateForecaster:
+    options = dict(
+        window_minutes=60, min_interval_seconds=60, max_interval_minutes=360,
+        safety=0.5, low_data_threshold_mb=100, overlap_seconds=300
+    )
+    options.update(overrides)
+    return BurnRateForecaster(**options)
+
+
+def log(pack_id, mb, at: float):
+    return {
+        "id": str(uuid.uuid4()),
+        "data_pack_id": pack_id,
+        "data_used_mb": mb,
+        "created_at": datetime.fromtimestamp(at, timezone.utc).isoformat()
+    }
+
+
+def test_late_row_counts_the_same_as_in_order():
+    now = time.time()
+    rows = [log("p", 10, now - 120), log("p", 20, now - 60), log("p", 30, now)]
+
+    in_order = forecaster()
+    in_order.ingest(rows)
+    late = forecaster()
+    late.ingest([rows[0], rows[2]])
+    late.ingest([rows[1]])
+
+    assert math.isclose(in_order.rates(["p"], now)[0], late.rates(["p"], now)[0])
+
+
+def test_ingest_skips_log_ids_already_counted():
+    now = time.time()
+    rows = [log("p", 10, now - 30), log("p", 20, now)]
+    model = forecaster()
+    model.ingest(rows)
+    rate = model.rates(["p"], now)[0]
+
+    model.ingest(rows)
+    assert model.rates(["p"], now)[0] == rate
+    assert model.get_stats()["logs_ingested"] == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_picks_up_rows_committed_behind_the_high_water_mark(memory_store):
+    now = time.time()
+    model = forecaster()
+    memory_store.load("usage_logs", [log("p", 10, now - 60), log("p", 10, now - 10)])
+    await model.refresh_rates()
+    assert model.get_stats()["logs_ingested"] == 2
+
+    # Flushed late: created before the newest row already read
+    memory_store.load("usage_logs", [log("p", 50, now - 30)])
+    await model.refresh_rates()
+    await model.refresh_rates()
+    assert model.get_stats()["logs_ingested"] == 3
+
+
+def test_check_intervals_follow_time_to_next_threshold():
+    now = time.time()
+    model = forecaster(min_interval_seconds=1)
+    # 1 MB/s for one window: the decayed estimate has reached 1 - 1/e of the true rate
+    model.ingest(log("fast", 1, now - offset) for offset in range(3600, -1, -1))
+
+    columns = PackColumns.from_rows([
+        {"id": "fast", "user_id": "u1", "data_mb": 1000, "used_data_mb": 700},
+        {"id": "idle", "user_id": "u2", "data_mb": 1000, "used_data_mb": 0},
+    ])
+    fast, idle = model.check_intervals(columns, now)
+
+    # 50 MB to the 75% alert, halved by the safety factor
+    assert fast == pytest.approx(50 / (1 - math.exp(-1)) * 0.5, rel=0.02)
+    assert idle == model.max_interval
+
+
+@pytest.mark.asyncio
+async def test_refresh_reads_only_the_owned_shards(memory_store):
+    now = time.time()
+    users = [f"user-{i}" for i in range(20)]
+    memory_store.load("usage_logs", [
+        {**log(f"pack-{user}", 10, now - 60), "user_id": user} for user in users
+    ])
+    assignment = ShardAssignment(4, frozenset({1}))
+    model = forecaster()
+
+    await model.refresh_rates(lambda query: query.in_("shard_bucket", assignment.buckets()))
+
+    owned = [user for user in users if assignment.owns_user(user)]
+    assert 0 < len(owned) < len(users)
+    assert model.get_stats()["logs_ingested"] == len(owned)
+    assert all(rate > 0 for rate in model.rates([f"pack-{user}" for user in owned], now))
@@ -0,0 +1,40 @@
+import pytest
+
+from app.core.cache import query_cache
+from app.routes.auth import register_device, unregister_device
+from app.services.notification_service import _device_cache_filters
+
+
+async def cached_tokens(user_id):
+    found, value = await query_cache.backend.get(query_cache.make_key("user_devices", _device_cache_filters(user_id)))
+    return value if found else None
+
+
+async def prime(*user_ids):
+    for user_id in user_ids:
+        await query_cache.get_or_load("user_devices", _device_cache_filters(user_id), _stale_tokens)
+
+
+async def _stale_tokens():
+    return [{"push_token": "stale"}]
+
+
+@pytest.mark.asyncio
+async def test_device_changes_invalidate_only_the_owners_cache(memory_store):
+    await prime("alice", "bob", "carol")
+
+    await register_device({"user_id": "alice", "push_token": "t1", "device_type": "ios"})
+    assert await cached_tokens("alice") is None
+    assert await cached_tokens("bob") is not None
+
+    # Re-registering a token under another account refreshes both owners
+    await prime("alice")
+    await register_device({"user_id": "bob", "push_token": "t1", "device_type": "ios"})
+    assert await cached_tokens("alice") is None
+    assert await cached_tokens("bob") is None
+
+    await prime("alice", "bob")
+    await unregister_device({"push_token": "t1"})
+    assert await cached_tokens("bob") is None
+    assert await cached_tokens("alice") is not None
+    assert await cached_tokens("carol") is not None
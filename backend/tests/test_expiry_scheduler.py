@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.expiry_scheduler import ExpiryScheduler, ExpiryTarget
+
+NOW = 1_750_000_000.0
+
+
+def iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+class CountingExpiry:
+    def __init__(self, table: str):
+        self.table = table
+        self.calls = 0
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        return 1
+
+
+def scheduler(*tables: str, batch_size: int = 100):
+    expiries = {table: CountingExpiry(table) for table in tables}
+    targets = [ExpiryTarget(table, ("active",), expire) for table, expire in expiries.items()]
+    return ExpiryScheduler(targets, lookahead_minutes=10, refresh_seconds=60, reconcile_minutes=15,
+                           batch_size=batch_size, grace_seconds=1.0), expiries
+
+
+@pytest.mark.asyncio
+async def test_deadlines_fire_once_per_table_after_grace():
+    expiry, calls = scheduler("data_packs", "internet_sessions")
+    expiry.schedule("data_packs", NOW + 10.2)
+    expiry.schedule("data_packs", NOW + 10.7)  # same second: deduplicated
+    expiry.schedule("data_packs", NOW + 20)
+    expiry.schedule("internet_sessions", NOW + 15)
+    assert expiry.get_stats()["queued_deadlines"] == 3
+
+    assert await expiry.fire_due(NOW + 11.5) == 0
+    assert await expiry.fire_due(NOW + 12) == 1
+    assert (calls["data_packs"].calls, calls["internet_sessions"].calls) == (1, 0)
+
+    # Both tables due in the same pass: one bulk expiry each
+    assert await expiry.fire_due(NOW + 30) == 2
+    assert (calls["data_packs"].calls, calls["internet_sessions"].calls) == (2, 1)
+    assert expiry.get_stats()["queued_deadlines"] == 0
+
+
+@pytest.mark.asyncio
+async def test_refresh_loads_only_the_lookahead_window(memory_store):
+    memory_store.load("data_packs", [
+        {"id": "overdue", "status": "active", "expires_at": iso(NOW - 60)},
+        {"id": "soon", "status": "active", "expires_at": iso(NOW + 60)},
+        {"id": "done", "status": "expired", "expires_at": iso(NOW + 120)},
+        {"id": "later", "status": "active", "expires_at": iso(NOW + 3600)},
+    ])
+    expiry, _ = scheduler("data_packs")
+
+    await expiry.refresh(NOW)
+    assert expiry._heap == [(NOW + 61, "data_packs")]
+
+    # The next refresh only reads what entered the window since
+    memory_store.load("data_packs", [{"id": "new", "status": "active", "expires_at": iso(NOW + 30)}])
+    await expiry.refresh(NOW + 300)
+    assert expiry.get_stats()["queued_deadlines"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_batch_resumes_from_the_last_deadline_read(memory_store):
+    memory_store.load("data_packs", [
+        {"id": str(i), "status": "active", "expires_at": iso(NOW + 10 * (i + 1))} for i in range(5)
+    ])
+    expiry, _ = scheduler("data_packs", batch_size=2)
+
+    for _ in range(3):
+        await expiry.refresh(NOW)
+    assert sorted(deadline for deadline, _ in expiry._heap) == [NOW + 10 * (i + 1) + 1 for i in range(5)]
@@ -0,0 +1,47 @@
+import threading
+
+import httpx
+import pytest
+
+from app.core import database
+
+
+def failing(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("connection refused", request=request)
+
+
+def ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json=[])
+
+
+@pytest.fixture(autouse=True)
+def reset_stats(monkeypatch):
+    monkeypatch.setattr(database, "_http_pool_stats", {"in_flight": 0, "total_requests": 0})
+
+
+@pytest.mark.asyncio
+async def test_transport_errors_do_not_leak_in_flight_requests():
+    async with httpx.AsyncClient(transport=database._TrackedAsyncTransport(httpx.MockTransport(failing))) as client:
+        for _ in range(3):
+            with pytest.raises(httpx.ConnectError):
+                await client.get("http://supabase.test/rest/v1/data_packs")
+
+    stats = database.get_http_pool_stats()
+    assert (stats["in_flight"], stats["total_requests"]) == (0, 3)
+
+
+def test_sync_requests_from_threads_are_counted_exactly():
+    client = httpx.Client(transport=database._TrackedTransport(httpx.MockTransport(ok)))
+
+    def worker():
+        for _ in range(200):
+            client.get("http://supabase.test/rest/v1/data_packs")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = database.get_http_pool_stats()
+    assert (stats["in_flight"], stats["total_requests"]) == (0, 1600)
@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.leader import FileLeaseStore, PostgresLeaseStore
+
+
+def test_postgres_application_name_fits_and_stays_distinct():
+    short = PostgresLeaseStore._application_name("monitoring:shard:3")
+    assert short == "lease:monitoring:shard:3"
+
+    long_a = PostgresLeaseStore._application_name("monitoring:member:" + "a" * 60 + ":1")
+    long_b = PostgresLeaseStore._application_name("monitoring:member:" + "a" * 60 + ":2")
+    assert len(long_a) <= PostgresLeaseStore.MAX_APPLICATION_NAME
+    assert long_a.startswith("lease:monitoring:member:")
+    assert long_a != long_b
+
+
+@pytest.mark.asyncio
+async def test_file_leases_are_exclusive_and_listed(tmp_path):
+    first = FileLeaseStore(str(tmp_path), "first")
+    second = FileLeaseStore(str(tmp_path), "second")
+    try:
+        assert await first.acquire("monitoring:member:first", 15)
+        assert await second.acquire("monitoring:member:second", 15)
+        assert await first.acquire("monitoring:shard:0", 15)
+        assert not await second.acquire("monitoring:shard:0", 15)
+
+        members = await second.live("monitoring:member:")
+        assert sorted(members) == ["monitoring_member_first", "monitoring_member_second"]
+
+        await first.release("monitoring:member:first")
+        assert await second.live("monitoring:member:") == ["monitoring_member_second"]
+    finally:
+        await first.close()
+        await second.close()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_postgres_leases_are_exclusive_and_listed(database_url):
+    first = PostgresLeaseStore(database_url, "first")
+    second = PostgresLeaseStore(database_url, "second")
+    try:
+        assert await first.acquire("monitoring:member:first", 15)
+        assert await second.acquire("monitoring:member:second", 15)
+        assert await first.acquire("monitoring:shard:0", 15)
+        assert not await second.acquire("monitoring:shard:0", 15)
+        assert await first.acquire("monitoring:shard:0", 15)  # renewal
+
+        members = await second.live("monitoring:member:")
+        assert sorted(members) == ["monitoring:member:first", "monitoring:member:second"]
+        assert await first.live("monitoring:shard:") == ["monitoring:shard:0"]
+
+        await first.release("monitoring:shard:0")
+        assert await second.acquire("monitoring:shard:0", 15)
+        await first.close()
+        assert await second.live("monitoring:member:") == ["monitoring:member:second"]
+    finally:
+        await first.close()
+        await second.close()
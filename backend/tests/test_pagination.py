@@ -0,0 +1,83 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.database import get_supabase_client
+from app.core.pagination import (
+    InvalidCursorError, MAX_PAGE_SIZE, apply_keyset, clamp_page_size, decode_cursor, encode_cursor, split_page
+)
+
+
+def raw_cursor(created_at, row_id) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, row_id]).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    row = {"created_at": "2025-03-01T10:00:00.123456+00:00", "id": str(uuid.uuid4())}
+    assert decode_cursor(encode_cursor(row)) == (row["created_at"], row["id"])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 at all!",
+    base64.urlsafe_b64encode(b"{}").decode(),
+    raw_cursor("yesterday", str(uuid.uuid4())),
+    raw_cursor("2025-03-01T10:00:00+00:00", "1),id.gt.(0"),
+    raw_cursor('2025-03-01T10:00:00+00:00",user_id.neq."x', str(uuid.uuid4())),
+    raw_cursor(None, str(uuid.uuid4())),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_clamp_page_size():
+    assert clamp_page_size(None) == 50
+    assert clamp_page_size(0) == 50
+    assert clamp_page_size(10) == 10
+    assert clamp_page_size(10_000) == MAX_PAGE_SIZE
+
+
+def test_pages_walk_every_row_once_including_timestamp_ties(memory_store):
+    base = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    rows = [
+        # Pairs share a created_at so pages must break ties on id
+        {"id": str(uuid.uuid4()), "user_id": "u", "created_at": (base + timedelta(minutes=i // 2)).isoformat()}
+        for i in range(23)
+    ]
+    memory_store.load("notifications", rows)
+    client = get_supabase_client()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = client.table("notifications").select("id, created_at").eq("user_id", "u")
+        page, cursor = split_page(apply_keyset(query, cursor, 5).execute().data, 5)
+        seen += page
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 5
+    assert sorted(row["id"] for row in seen) == sorted(row["id"] for row in rows)
+    keys = [(row["created_at"], row["id"]) for row in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_my_sessions_returns_the_cursor_in_the_body(memory_store):
+    from app.routes.sessions import get_my_sessions
+
+    base = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    memory_store.load("internet_sessions", [
+        {"id": str(uuid.uuid4()), "user_id": "u", "status": "stored", "data_mb": 100,
+         "created_at": (base + timedelta(minutes=i)).isoformat()}
+        for i in range(3)
+    ])
+
+    first = await get_my_sessions(cursor=None, limit=2, user_data={"sub": "u"})
+    assert first["count"] == 2 and first["next_cursor"]
+
+    last = await get_my_sessions(cursor=first["next_cursor"], limit=2, user_data={"sub": "u"})
+    assert last["count"] == 1 and last["next_cursor"] is None
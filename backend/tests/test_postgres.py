@@ -0,0 +1,36 @@
+import pytest
+
+from app.core import postgres
+from app.core.config import settings
+from app.core.leader import create_lease_store
+from app.core.postgres import asyncpg_dsn
+
+POOLER_URL = "postgresql://postgres:pw@aws-0.pooler.supabase.com:6543/postgres?sslmode=require&pgbouncer=true&connection_limit=1"
+
+
+def test_dsn_keeps_only_parameters_asyncpg_understands():
+    dsn, pgbouncer = asyncpg_dsn(POOLER_URL)
+    assert dsn == "postgresql://postgres:pw@aws-0.pooler.supabase.com:6543/postgres?sslmode=require"
+    assert pgbouncer
+
+    direct = "postgresql://postgres:pw@db.example.supabase.co:5432/postgres?sslmode=require&application_name=kswifi"
+    assert asyncpg_dsn(direct) == (direct, False)
+
+
+def test_postgres_leases_refuse_transaction_pooling(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", POOLER_URL)
+    with pytest.raises(RuntimeError, match="session"):
+        create_lease_store("postgres")
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_pool_connects_with_a_pooler_style_url(database_url, monkeypatch):
+    separator = "&" if "?" in database_url else "?"
+    monkeypatch.setattr(settings, "DATABASE_URL", f"{database_url}{separator}pgbouncer=true&connection_limit=1")
+    monkeypatch.setattr(postgres, "_pg_pool", None)
+    try:
+        pool = await postgres.init_pg_pool()
+        assert await pool.fetchval("SELECT 1") == 1
+    finally:
+        await postgres.close_pg_pool()
@@ -0,0 +1,210 @@
+"""
+Projection checks
+- every projected column exists in the table's schema (supabase/migrations + KSWIFI_CONNECT_DATABASE.sql)
+- every row key a call site reads is in the projection it selected
+"""
+
+import ast
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+import pytest
+
+from app.core import projections
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+REPO_DIR = BACKEND_DIR.parent
+SCHEMA_FILES = sorted((REPO_DIR / "supabase" / "migrations").glob("*.sql")) + [REPO_DIR / "KSWIFI_CONNECT_DATABASE.sql"]
+
+PROJECTION_TABLES = {
+    "PACK_": "data_packs",
+    "USAGE_LOG_": "usage_logs",
+    "ESIM_": "esims",
+    "SESSION_": "internet_sessions",
+    "CONNECT_PROFILE_": "kswifi_connect_profiles",
+    "WIFI_TOKEN_": "wifi_access_tokens",
+}
+
+# Columns the services have always used that the checked-in migrations never created
+KNOWN_SCHEMA_DRIFT = {
+    "data_packs": {"data_mb"},  # migrations only define total_data_mb
+}
+
+# Tables without a schema file in the repo
+UNVERSIONED_TABLES = {"wifi_access_tokens"}
+
+SQL_KEYWORDS = {"constraint", "primary", "unique", "foreign", "check", "exclude"}
+
+
+def _columns(projection: str) -> Set[str]:
+    return {column.strip() for column in projection.split(",") if column.strip()}
+
+
+def _schema() -> Dict[str, Set[str]]:
+    tables: Dict[str, Set[str]] = {}
+    for path in SCHEMA_FILES:
+        sql = re.sub(r"--[^\n]*", "", path.read_text())
+
+        for match in re.finditer(r"CREATE TABLE IF NOT EXISTS (?:public\.)?(\w+)\s*\((.*?)\n\);", sql, re.S):
+            columns = tables.setdefault(match.group(1), set())
+            for line in match.group(2).split("\n"):
+                words = line.strip().split()
+                if words and words[0].lower() not in SQL_KEYWORDS:
+                    columns.add(words[0].strip(","))
+
+        for match in re.finditer(r"ALTER TABLE (?:public\.)?(\w+)((?:\s*ADD COLUMN IF NOT EXISTS \w+[^,;]*,?)+);", sql):
+            for column in re.findall(r"ADD COLUMN IF NOT EXISTS (\w+)", match.group(2)):
+                tables.setdefault(match.group(1), set()).add(column)
+
+        for table, column in re.findall(r"ALTER TABLE (?:public\.)?(\w+)\s+DROP COLUMN IF EXISTS (\w+)", sql):
+            tables.get(table, set()).discard(column)
+    return tables
+
+
+def _projections() -> Iterator[Tuple[str, str, str]]:
+    for name, value in vars(projections).items():
+        if name.isupper() and isinstance(value, str):
+            table = next(table for prefix, table in PROJECTION_TABLES.items() if name.startswith(prefix))
+            yield name, table, value
+
+
+def test_projected_columns_exist_in_schema():
+    schema = _schema()
+    missing = []
+    for name, table, projection in _projections():
+        if projection == "*" or table in UNVERSIONED_TABLES:
+            continue
+        known = schema[table] | KNOWN_SCHEMA_DRIFT.get(table, set())
+        missing += [f"{name}: {table}.{column}" for column in sorted(_columns(projection) - known)]
+    assert not missing, f"Projected columns missing from the schema: {missing}"
+
+
+class _RowReads(ast.NodeVisitor):
+    """
+    Follows rows from `x = await ...select(projections.NAME)...execute()` through
+    `.data`, indexing, `or []`, helper calls (split_page, SingleFlight loaders) and
+    loops/comprehensions, and records the string keys read
+    """
+
+    def __init__(self):
+        self.bound: Dict[str, str] = {}  # variable -> projection name
+        self.reads: List[Tuple[str, str, int]] = []  # (projection, key, line)
+
+    def _projection_of(self, node: ast.AST):
+        for child in ast.walk(node):
+            if (isinstance(child, ast.Call) and isinstance(child.func, ast.Attribute)
+                    and child.func.attr == "select" and child.args
+                    and isinstance(child.args[0], ast.Attribute)
+                    and isinstance(child.args[0].value, ast.Name)
+                    and child.args[0].value.id == "projections"):
+                return child.args[0].attr
+        return None
+
+    def _source(self, node: ast.AST):
+        """Projection a row expression derives from, if any"""
+        while True:
+            if isinstance(node, ast.Await):
+                node = node.value
+            elif isinstance(node, ast.BoolOp):
+                node = node.values[0]
+            elif isinstance(node, ast.Attribute) and node.attr == "data":
+                node = node.value
+            elif isinstance(node, ast.Subscript) and not _string_key(node.slice):
+                node = node.value
+            elif isinstance(node, ast.Call):
+                # Helpers that pass rows through, e.g. split_page(response.data) or flight.do(key, loader)
+                return next(filter(None, (self._source(arg) for arg in node.args)), None)
+            else:
+                break
+        if isinstance(node, ast.Name):
+            return self.bound.get(node.id)
+        return None
+
+    def _bind(self, target: ast.AST, projection):
+        if isinstance(target, ast.Tuple) and target.elts:
+            target = target.elts[0]  # rows, next_cursor = split_page(...)
+        if projection and isinstance(target, ast.Name):
+            self.bound[target.id] = projection
+
+    def visit_FunctionDef(self, node):
+        # Nested loaders: the name stands for the rows it selects
+        self._bind(ast.Name(id=node.name), self._projection_of(node))
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Assign(self, node: ast.Assign):
+        projection = self._projection_of(node.value) or self._source(node.value)
+        for target in node.targets:
+            self._bind(target, projection)
+        self.generic_visit(node)
+
+    def visit_For(self, node: ast.For):
+        self._bind(node.target, self._source(node.iter))
+        self.generic_visit(node)
+
+    visit_AsyncFor = visit_For
+
+    def visit_comprehension(self, node: ast.comprehension):
+        self._bind(node.target, self._source(node.iter))
+        self.generic_visit(node)
+
+    def _comprehension_first(self, node):
+        for generator in node.generators:
+            self.visit(generator)
+        for field in ("elt", "key", "value"):
+            if hasattr(node, field):
+                self.visit(getattr(node, field))
+
+    visit_ListComp = visit_SetComp = visit_GeneratorExp = visit_DictComp = _comprehension_first
+
+    def visit_Subscript(self, node: ast.Subscript):
+        key = _string_key(node.slice)
+        projection = self._source(node.value)
+        if key and projection and isinstance(node.ctx, ast.Load):
+            self.reads.append((projection, key, node.lineno))
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        if (isinstance(node.func, ast.Attribute) and node.func.attr == "get" and node.args
+                and _string_key(node.args[0])):
+            projection = self._source(node.func.value)
+            if projection:
+                self.reads.append((projection, node.args[0].value, node.lineno))
+        self.generic_visit(node)
+
+
+def _string_key(node: ast.AST):
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+def _call_site_reads() -> Iterator[Tuple[str, str, str, int]]:
+    for path in sorted((BACKEND_DIR / "app").rglob("*.py")):
+        tree = ast.parse(path.read_text())
+        for function in ast.walk(tree):
+            if isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                visitor = _RowReads()
+                for statement in function.body:
+                    visitor.visit(statement)
+                for projection, key, line in visitor.reads:
+                    yield str(path.relative_to(BACKEND_DIR)), projection, key, line
+
+
+def test_call_sites_read_only_projected_columns():
+    reads = list(_call_site_reads())
+    # Guard against the analysis silently finding nothing
+    assert len({projection for _, projection, _, _ in reads}) >= 10
+
+    violations = []
+    for path, name, key, line in reads:
+        projection = getattr(projections, name)
+        if projection != "*" and key not in _columns(projection):
+            violations.append(f"{path}:{line} reads '{key}' outside projections.{name}")
+    assert not violations, "\n".join(violations)
+
+
+@pytest.mark.parametrize("name", [name for name, _, _ in _projections()])
+def test_projection_has_no_duplicate_columns(name):
+    columns = [column.strip() for column in getattr(projections, name).split(",")]
+    assert len(columns) == len(set(columns))
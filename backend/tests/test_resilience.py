@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.resilience import (
+    CircuitBreaker, CircuitOpenError, DeadlineExceededError, ResilientAsyncTransport, ResilientTransport, db_deadline
+)
+
+URL = "http://supabase.test/rest/v1/data_packs"
+
+
+def half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+class HangingTransport(httpx.AsyncBaseTransport):
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def handle_async_request(self, request):
+        self.started.set()
+        await asyncio.sleep(3600)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_trial_lets_the_next_call_try():
+    breaker = half_open_breaker()
+    inner = HangingTransport()
+    async with httpx.AsyncClient(transport=ResilientAsyncTransport(inner, breaker)) as client:
+        trial = asyncio.create_task(client.get(URL))
+        await inner.started.wait()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+    ok = httpx.MockTransport(lambda request: httpx.Response(200, json=[]))
+    async with httpx.AsyncClient(transport=ResilientAsyncTransport(ok, breaker)) as client:
+        assert (await client.get(URL)).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_expired_deadline_does_not_take_the_half_open_trial():
+    breaker = half_open_breaker()
+    ok = httpx.MockTransport(lambda request: httpx.Response(200, json=[]))
+    with httpx.Client(transport=ResilientTransport(ok, breaker)) as client:
+        with db_deadline(-1), pytest.raises(DeadlineExceededError):
+            client.get(URL)
+        assert client.get(URL).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_unexpected_trial_error_reopens_the_breaker():
+    breaker = half_open_breaker()
+
+    def broken(request):
+        raise RuntimeError("h2 state machine error")
+
+    with httpx.Client(transport=ResilientTransport(httpx.MockTransport(broken), breaker)) as client:
+        with pytest.raises(RuntimeError):
+            client.get(URL)
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            client.get(URL)
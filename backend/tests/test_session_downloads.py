@@ -0,0 +1,123 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.core.database import get_supabase_client
+from app.services.session_service import SessionService
+from app.worker import check_lease_backend
+
+MIGRATION = Path(__file__).resolve().parents[2] / "supabase" / "migrations" / "00000000000012_session_download_claims.sql"
+
+
+def session(status="downloading", **columns):
+    return {"id": str(uuid.uuid4()), "user_id": "u", "status": status, "data_mb": 100,
+            "created_at": datetime.now(timezone.utc).isoformat(), **columns}
+
+
+def service(monkeypatch) -> SessionService:
+    service = SessionService()
+    service.downloaded = []
+
+    async def download(session_id):
+        service.downloaded.append(session_id)
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(service, "_download_session_from_wifi", download)
+    return service
+
+
+def stored(session_id):
+    return get_supabase_client().table("internet_sessions").select("*").eq("id", session_id).execute().data[0]
+
+
+@pytest.mark.asyncio
+async def test_each_pending_download_is_claimed_by_one_process(memory_store, monkeypatch):
+    rows = [session(), session("transferring"), session(), session("stored")]
+    memory_store.load("internet_sessions", rows)
+    first, second = service(monkeypatch), service(monkeypatch)
+    try:
+        started = await asyncio.gather(first.process_pending_downloads(), second.process_pending_downloads())
+        await asyncio.sleep(0)
+        assert sum(started) == 3
+        assert sorted(first.downloaded + second.downloaded) == sorted(row["id"] for row in rows[:3])
+
+        # Claims held: polling again starts nothing
+        assert await first.process_pending_downloads() == 0
+        assert await second.process_pending_downloads() == 0
+    finally:
+        await first.stop_downloads()
+        await second.stop_downloads()
+
+
+@pytest.mark.asyncio
+async def test_released_and_lapsed_claims_are_picked_up(memory_store, monkeypatch):
+    lapsed = session(download_claimed_by="gone", download_claimed_until=(datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat())
+    held = session(download_claimed_by="api", download_claimed_until=(datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat())
+    memory_store.load("internet_sessions", [lapsed, held])
+    first, second = service(monkeypatch), service(monkeypatch)
+    try:
+        assert await first.process_pending_downloads() == 1
+        assert stored(lapsed["id"])["download_claimed_by"] == first._download_holder
+
+        # A stopping worker hands its downloads over right away
+        await first.stop_downloads()
+        assert stored(lapsed["id"])["download_claimed_until"] is None
+        assert await second.process_pending_downloads() == 1
+        await asyncio.sleep(0)
+        assert second.downloaded == [lapsed["id"]]
+    finally:
+        await first.stop_downloads()
+        await second.stop_downloads()
+
+
+def test_worker_refuses_leases_the_api_cannot_see(monkeypatch):
+    monkeypatch.setattr(settings, "LEADER_ELECTION_BACKEND", "none")
+    with pytest.raises(RuntimeError):
+        check_lease_backend()
+
+    monkeypatch.setattr(settings, "LEADER_ELECTION_BACKEND", "file")
+    monkeypatch.setattr(settings, "LEADER_LOCK_DIR", None)
+    with pytest.raises(RuntimeError):
+        check_lease_backend()
+
+    monkeypatch.setattr(settings, "LEADER_LOCK_DIR", "/srv/kswifi/leases")
+    check_lease_backend()
+    monkeypatch.setattr(settings, "LEADER_ELECTION_BACKEND", "redis")
+    check_lease_backend()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_claim_function_hands_out_each_row_once(database_url):
+    import asyncpg
+
+    schema = f"it_{uuid.uuid4().hex[:12]}"
+    admin = await asyncpg.connect(database_url)
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    pool = await asyncpg.create_pool(database_url, min_size=1, max_size=10, server_settings={"search_path": schema})
+    try:
+        await pool.execute("""
+            CREATE TABLE internet_sessions (
+                id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                status TEXT DEFAULT 'downloading',
+                created_at TIMESTAMPTZ DEFAULT NOW()
+            );
+            INSERT INTO internet_sessions (status)
+            SELECT CASE WHEN i % 5 = 0 THEN 'stored' ELSE 'downloading' END FROM generate_series(1, 100) i;
+        """)
+        await pool.execute(MIGRATION.read_text())
+
+        claims = await asyncio.gather(*(
+            pool.fetch("SELECT id FROM claim_session_downloads($1, 60, 7)", f"worker-{i}") for i in range(10)
+        ))
+        claimed = [row["id"] for rows in claims for row in rows]
+        assert len(claimed) == len(set(claimed)) == 70
+        assert len(await pool.fetch("SELECT id FROM claim_session_downloads('late', 60)")) == 10
+    finally:
+        await pool.close()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
@@ -0,0 +1,69 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from app.core.leader import FileLeaseStore
+from app.core.sharding import SHARD_BUCKETS, ShardAssignment, ShardCoordinator, shard_bucket
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "supabase" / "migrations"
+SHARD_MIGRATIONS = {
+    "00000000000007_monitoring_shard_bucket.sql": 2,  # data_packs, esims
+    "00000000000013_usage_logs_shard_bucket.sql": 1,
+}
+
+
+@pytest.mark.parametrize("user_id, bucket", [
+    # Values computed by the shard_bucket generated column in Postgres
+    ("00000000-0000-0000-0000-000000000000", 905),
+    ("3f2504e0-4f89-11d3-9a0c-0305e82c3301", 646),
+    ("9b2d6c1e-8a4f-4c2b-b1d7-5e0f3a6c9d12", 15),
+    ("user-1", 727),
+])
+def test_shard_bucket_matches_the_generated_column(user_id, bucket):
+    assert shard_bucket(user_id) == bucket
+
+
+@pytest.mark.parametrize("name, columns", SHARD_MIGRATIONS.items())
+def test_migrations_use_the_same_bucket_count(name, columns):
+    expressions = re.findall(r"GENERATED ALWAYS AS \((.*)\) STORED", (MIGRATIONS_DIR / name).read_text())
+    assert len(expressions) == columns
+    for expression in expressions:
+        assert "substr(md5(user_id::text), 1, 4))::bit(16)::int" in expression
+        assert f"% {SHARD_BUCKETS})" in expression
+
+
+def test_assignments_partition_the_buckets():
+    shards = [ShardAssignment(3, frozenset({shard})) for shard in range(3)]
+    buckets = [set(assignment.buckets()) for assignment in shards]
+
+    assert set.union(*buckets) == set(range(SHARD_BUCKETS))
+    assert sum(map(len, buckets)) == SHARD_BUCKETS
+
+    for user_id in ("user-1", "user-2", "user-3", "user-4"):
+        owners = [assignment for assignment in shards if assignment.owns_user(user_id)]
+        assert len(owners) == 1
+        assert shard_bucket(user_id) in owners[0].buckets()
+
+
+@pytest.mark.asyncio
+async def test_coordinators_split_shards_and_take_over_on_stop(tmp_path):
+    first = ShardCoordinator(FileLeaseStore(str(tmp_path), "first"), shard_count=4, ttl=15)
+    second = ShardCoordinator(FileLeaseStore(str(tmp_path), "second"), shard_count=4, ttl=15)
+    try:
+        await first.rebalance()
+        assert first.assignment.owned == {0, 1, 2, 3}
+
+        # A joining worker gets its share once the first gives up the extras
+        await second.rebalance()
+        await first.rebalance()
+        await second.rebalance()
+        assert len(first.assignment.owned) == len(second.assignment.owned) == 2
+        assert first.assignment.owned.isdisjoint(second.assignment.owned)
+
+        await first.stop()
+        await second.rebalance()
+        assert second.assignment.owned == {0, 1, 2, 3}
+    finally:
+        await first.stop()
+        await second.stop()
@@ -0,0 +1,64 @@
+import numpy as np
+
+from app.services.threshold_engine import (
+    ALERT_EXPIRED, ALERT_LOW_DATA, ALERT_USAGE_75, ALERT_USAGE_90, PackColumns, evaluate_thresholds, to_epoch_seconds
+)
+
+NOW = 1_750_000_000.0  # 2025-06-15T15:06:40Z
+
+
+def columns(*packs):
+    return PackColumns.from_rows([
+        {"id": str(i), "user_id": "u", "expires_at": "2030-01-01T00:00:00+00:00", **pack}
+        for i, pack in enumerate(packs)
+    ])
+
+
+def test_timestamps_parse_across_offsets():
+    epochs = to_epoch_seconds([
+        "2025-06-15T15:06:40+00:00",
+        "2025-06-15T15:06:40Z",
+        "2025-06-15T17:06:40+02:00",
+        "2025-06-15T15:06:40",
+        None,
+    ])
+    assert list(epochs[:4]) == [NOW] * 4
+    assert epochs[4] == np.inf
+
+
+def test_usage_bands_are_exclusive():
+    masks = evaluate_thresholds(columns(
+        {"data_mb": 1000, "used_data_mb": 740},
+        {"data_mb": 1000, "used_data_mb": 750},
+        {"data_mb": 1000, "used_data_mb": 899},
+        {"data_mb": 1000, "used_data_mb": 900},
+        {"data_mb": 1000, "used_data_mb": 1200},
+    ), low_data_threshold=100, now=NOW)
+
+    assert list(masks.usage_75) == [False, True, True, False, False]
+    assert list(masks.usage_90) == [False, False, False, True, True]
+    assert list(masks.remaining_mb) == [260, 250, 101, 100, 0]
+    assert list(masks.low_data) == [False, False, False, True, True]
+
+
+def test_flags_combine_every_condition():
+    masks = evaluate_thresholds(columns(
+        {"data_mb": 100, "used_data_mb": 95, "expires_at": "2025-06-15T15:06:39Z"},
+        {"data_mb": 1000, "used_data_mb": 800},
+        {"data_mb": 1000, "used_data_mb": 0, "expires_at": None},
+        {"data_mb": 0, "used_data_mb": 0},  # no quota: never a usage alert
+    ), low_data_threshold=50, now=NOW)
+
+    assert list(masks.flags()) == [
+        ALERT_LOW_DATA | ALERT_USAGE_90 | ALERT_EXPIRED,
+        ALERT_USAGE_75,
+        0,
+        ALERT_LOW_DATA,
+    ]
+    assert masks.flags().dtype == np.int16
+
+
+def test_missing_usage_counts_as_unused():
+    masks = evaluate_thresholds(columns({"data_mb": 500, "used_data_mb": None}), low_data_threshold=100, now=NOW)
+    assert list(masks.remaining_mb) == [500]
+    assert masks.flags()[0] == 0
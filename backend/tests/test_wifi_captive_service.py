@@ -0,0 +1,94 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app.core.database import get_supabase_client
+from app.services.wifi_captive_service import WiFiCaptiveService
+
+MIGRATION = Path(__file__).resolve().parents[2] / "supabase" / "migrations" / "00000000000011_wifi_token_counters.sql"
+
+
+def token(**columns):
+    return {
+        "id": str(uuid.uuid4()), "user_id": "u", "session_id": "s", "access_token": "wifi_abc",
+        "network_name": "KSWiFi_Global_abc", "status": "active", "data_limit_mb": 100, "data_used_mb": 0,
+        "time_limit_minutes": 60, "bandwidth_limit_mbps": 10, "sessions_used": 0, "redirect_url": "https://kswifi.app",
+        "expires_at": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(), **columns
+    }
+
+
+def stored_token(token_id):
+    return get_supabase_client().table("wifi_access_tokens").select("*").eq("id", token_id).execute().data[0]
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected_immediately(memory_store):
+    row = token()
+    memory_store.load("wifi_access_tokens", [row])
+    service = WiFiCaptiveService()
+    assert (await service.validate_access_token("wifi_abc", "aa:bb", "10.0.0.2"))["valid"]
+
+    # Another worker revokes it
+    get_supabase_client().table("wifi_access_tokens").update({"status": "revoked"}).eq("id", row["id"]).execute()
+
+    assert not (await service.validate_access_token("wifi_abc", "aa:bb", "10.0.0.2"))["valid"]
+    assert await service.get_active_tokens_by_network("KSWiFi_Global_abc") == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_and_usage_are_all_counted(memory_store):
+    row = token()
+    memory_store.load("wifi_access_tokens", [row])
+    service = WiFiCaptiveService()
+
+    sessions = await asyncio.gather(*(
+        service.create_captive_session("wifi_abc", f"aa:bb:{i}", "10.0.0.2") for i in range(5)
+    ))
+    assert stored_token(row["id"])["sessions_used"] == 5
+
+    await asyncio.gather(*(service.track_session_usage(session["session_token"], 30) for session in sessions[:4]))
+    stored = stored_token(row["id"])
+    assert (stored["data_used_mb"], stored["status"]) == (120, "used")
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_token_counter_functions(database_url):
+    import asyncpg
+
+    schema = f"it_{uuid.uuid4().hex[:12]}"
+    admin = await asyncpg.connect(database_url)
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    pool = await asyncpg.create_pool(database_url, min_size=1, max_size=10, server_settings={"search_path": schema})
+    try:
+        await pool.execute("""
+            CREATE TABLE wifi_access_tokens (
+                id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                status TEXT DEFAULT 'active',
+                expires_at TIMESTAMPTZ NOT NULL,
+                data_limit_mb INTEGER NOT NULL,
+                data_used_mb FLOAT DEFAULT 0,
+                sessions_used INTEGER DEFAULT 0,
+                first_used_at TIMESTAMPTZ,
+                last_used_at TIMESTAMPTZ,
+                updated_at TIMESTAMPTZ
+            )
+        """)
+        await pool.execute(MIGRATION.read_text())
+        token_id = await pool.fetchval(
+            "INSERT INTO wifi_access_tokens (expires_at, data_limit_mb) VALUES (NOW() + INTERVAL '1 hour', 100) RETURNING id"
+        )
+
+        await asyncio.gather(*(pool.fetchval("SELECT start_wifi_token_session($1)", token_id) for _ in range(8)))
+        await asyncio.gather(*(pool.fetchval("SELECT record_wifi_token_usage($1, 15)", token_id) for _ in range(8)))
+
+        row = await pool.fetchrow("SELECT sessions_used, data_used_mb, status FROM wifi_access_tokens")
+        assert (row["sessions_used"], row["data_used_mb"], row["status"]) == (8, 120, "used")
+        assert await pool.fetchval("SELECT start_wifi_token_session($1)", token_id) is None
+    finally:
+        await pool.close()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+KSWiFi Background Worker Startup Script
+Run alongside API instances started with RUN_BACKGROUND_JOBS=false
+"""
+
+import asyncio
+import os
+import sys
+from app.worker import run_worker
+
+if __name__ == "__main__":
+    # Print startup info
+    print("🚀 Starting KSWiFi Background Worker")
+    print(f"🔧 Python version: {sys.version}")
+    print(f"📍 Current directory: {os.getcwd()}")
+
+    asyncio.run(run_worker())
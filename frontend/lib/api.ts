@@ -374,8 +374,8 @@ class ApiService {
   }
 
   async getMySessions(): Promise<any[]> {
-    const response = await this.makeBackendRequest<any[]>('/sessions/my-sessions');
-    return response;
+    const response = await this.makeBackendRequest<{ sessions: any[]; count: number; next_cursor: string | null }>('/sessions/my-sessions');
+    return response.sessions;
   }
 
   async getSessionStatus(sessionId: string): Promise<any> {
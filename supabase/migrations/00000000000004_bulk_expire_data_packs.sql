@@ -0,0 +1,17 @@
+-- Migration: Set-based data pack expiry
+-- Description: Expire every overdue active pack in one statement and return the affected rows
+
+-- Supports the status + expiry scan used by the cleanup job
+CREATE INDEX IF NOT EXISTS idx_data_packs_status_expires_at ON data_packs(status, expires_at);
+
+CREATE OR REPLACE FUNCTION expire_overdue_data_packs()
+RETURNS TABLE (id UUID, user_id UUID) AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE data_packs AS dp
+    SET status = 'expired'
+    WHERE dp.status = 'active'
+      AND dp.expires_at < NOW()
+    RETURNING dp.id, dp.user_id;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,4 @@
+-- Migration: Incremental monitoring scans
+-- Description: Index the updated_at high-water-mark scan over active data packs
+
+CREATE INDEX IF NOT EXISTS idx_data_packs_status_updated_at ON data_packs(status, updated_at);
@@ -0,0 +1,29 @@
+-- Migration: Persistent alert state for data packs
+-- Description: Alerts already notified per pack live in alert_75_sent / alert_90_sent
+--   (migration 1) plus alert_low_data_sent; updates to them leave updated_at alone,
+--   since the incremental monitoring scan reads packs by updated_at
+
+ALTER TABLE data_packs
+ADD COLUMN IF NOT EXISTS alert_low_data_sent BOOLEAN DEFAULT FALSE;
+
+CREATE OR REPLACE FUNCTION update_data_packs_updated_at_column()
+RETURNS TRIGGER AS $$
+DECLARE
+    -- Generated columns are included: BEFORE triggers see them before they are recomputed
+    ignored CONSTANT TEXT[] := ARRAY[
+        'updated_at', 'alert_low_data_sent', 'alert_75_sent', 'alert_90_sent',
+        'remaining_data_mb', 'shard_bucket'
+    ];
+BEGIN
+    IF to_jsonb(NEW) - ignored IS DISTINCT FROM to_jsonb(OLD) - ignored THEN
+        NEW.updated_at = NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_data_packs_updated_at ON data_packs;
+CREATE TRIGGER update_data_packs_updated_at
+    BEFORE UPDATE ON data_packs
+    FOR EACH ROW
+    EXECUTE FUNCTION update_data_packs_updated_at_column();
@@ -0,0 +1,15 @@
+-- Migration: Hash-sharded monitoring
+-- Description: Stable per-user bucket (0-1023) on data_packs and esims so each monitoring
+--   shard selects only its own rows (bucket % MONITORING_SHARDS = shard index)
+--   Must match app.core.sharding.shard_bucket: first 16 bits of md5(user_id) mod 1024
+
+ALTER TABLE data_packs
+ADD COLUMN IF NOT EXISTS shard_bucket SMALLINT
+GENERATED ALWAYS AS ((('x' || substr(md5(user_id::text), 1, 4))::bit(16)::int % 1024)::smallint) STORED;
+
+ALTER TABLE esims
+ADD COLUMN IF NOT EXISTS shard_bucket SMALLINT
+GENERATED ALWAYS AS ((('x' || substr(md5(user_id::text), 1, 4))::bit(16)::int % 1024)::smallint) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_data_packs_status_shard_bucket ON data_packs(status, shard_bucket);
+CREATE INDEX IF NOT EXISTS idx_esims_status_shard_bucket ON esims(status, shard_bucket);
@@ -0,0 +1,4 @@
+-- Migration: Burn-rate forecasting
+-- Description: Index the created_at high-water-mark read of new usage_logs rows
+
+CREATE INDEX IF NOT EXISTS idx_usage_logs_created_at ON usage_logs(created_at);
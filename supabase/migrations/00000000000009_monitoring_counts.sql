@@ -0,0 +1,10 @@
+-- Migration: Single-round-trip monitoring stats
+-- Description: Active data packs, active eSIMs and recent usage logs counted in one call
+
+CREATE OR REPLACE FUNCTION monitoring_counts(recent_since TIMESTAMPTZ DEFAULT NOW() - INTERVAL '1 hour')
+RETURNS TABLE (active_data_packs BIGINT, active_esims BIGINT, recent_usage_logs BIGINT) AS $$
+    SELECT
+        (SELECT COUNT(*) FROM data_packs WHERE status = 'active'),
+        (SELECT COUNT(*) FROM esims WHERE status = 'active'),
+        (SELECT COUNT(*) FROM usage_logs WHERE created_at >= recent_since);
+$$ LANGUAGE sql STABLE;
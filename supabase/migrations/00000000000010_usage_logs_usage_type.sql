@@ -0,0 +1,4 @@
+-- Migration: Usage log source
+-- Description: usage_type column the monitoring service has always written (e.g. 'esim_data_usage')
+
+ALTER TABLE usage_logs ADD COLUMN IF NOT EXISTS usage_type TEXT;
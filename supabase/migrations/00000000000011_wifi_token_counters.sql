@@ -0,0 +1,48 @@
+-- Migration: Atomic WiFi access token counters
+-- Description: Captive portal session starts and usage update wifi_access_tokens in one
+--   statement each, so concurrent requests on different API workers never overwrite
+--   each other's counts and a revoked or exhausted token cannot start a session
+
+-- Returns the new sessions_used, or NULL when the token is no longer usable
+CREATE OR REPLACE FUNCTION start_wifi_token_session(token_id UUID)
+RETURNS INTEGER AS $$
+DECLARE
+    used INTEGER;
+BEGIN
+    UPDATE wifi_access_tokens AS t
+    SET sessions_used = COALESCE(t.sessions_used, 0) + 1,
+        first_used_at = COALESCE(t.first_used_at, NOW()),
+        last_used_at = NOW(),
+        updated_at = NOW()
+    WHERE t.id = token_id
+      AND t.status = 'active'
+      AND t.expires_at > NOW()
+      AND COALESCE(t.data_used_mb, 0) < t.data_limit_mb
+    RETURNING t.sessions_used INTO used;
+    RETURN used;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Adds usage and marks the token used at its data limit; NULL when the token is gone
+CREATE OR REPLACE FUNCTION record_wifi_token_usage(token_id UUID, used_mb DOUBLE PRECISION)
+RETURNS JSONB AS $$
+DECLARE
+    result JSONB;
+BEGIN
+    UPDATE wifi_access_tokens AS t
+    SET data_used_mb = COALESCE(t.data_used_mb, 0) + used_mb,
+        status = CASE
+            WHEN t.status = 'active' AND COALESCE(t.data_used_mb, 0) + used_mb >= t.data_limit_mb THEN 'used'
+            ELSE t.status
+        END,
+        last_used_at = NOW(),
+        updated_at = NOW()
+    WHERE t.id = token_id
+    RETURNING jsonb_build_object(
+        'data_used_mb', t.data_used_mb,
+        'data_limit_mb', t.data_limit_mb,
+        'status', t.status
+    ) INTO result;
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,33 @@
+-- Migration: Claimed session downloads
+-- Description: A process claims an in-flight session download for a lease period before
+--   running it, in one UPDATE ... RETURNING, so two processes never download the same
+--   session; running downloads renew the lease with every progress update
+
+ALTER TABLE internet_sessions
+ADD COLUMN IF NOT EXISTS download_claimed_by TEXT,
+ADD COLUMN IF NOT EXISTS download_claimed_until TIMESTAMPTZ;
+
+-- The worker polls this every few seconds; only in-flight rows are indexed
+CREATE INDEX IF NOT EXISTS idx_internet_sessions_download_claim
+ON internet_sessions(download_claimed_until)
+WHERE status IN ('downloading', 'transferring');
+
+CREATE OR REPLACE FUNCTION claim_session_downloads(holder TEXT, lease_seconds INTEGER, max_rows INTEGER DEFAULT 50)
+RETURNS TABLE (id UUID) AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE internet_sessions AS s
+    SET download_claimed_by = holder,
+        download_claimed_until = NOW() + make_interval(secs => lease_seconds)
+    WHERE s.id IN (
+        SELECT c.id
+        FROM internet_sessions c
+        WHERE c.status IN ('downloading', 'transferring')
+          AND (c.download_claimed_until IS NULL OR c.download_claimed_until < NOW())
+        ORDER BY c.created_at
+        LIMIT max_rows
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING s.id;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,10 @@
+-- Migration: Shard bucket on usage_logs
+-- Description: Same stable per-user bucket as data_packs/esims (migration 7) so each
+--   monitoring shard reads only its own users' recent usage for burn-rate forecasts
+--   Adding a stored generated column rewrites usage_logs - run in a quiet period
+
+ALTER TABLE usage_logs
+ADD COLUMN IF NOT EXISTS shard_bucket SMALLINT
+GENERATED ALWAYS AS ((('x' || substr(md5(user_id::text), 1, 4))::bit(16)::int % 1024)::smallint) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_usage_logs_shard_bucket_created_at ON usage_logs(shard_bucket, created_at);